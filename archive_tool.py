@@ -0,0 +1,60 @@
+# archive_tool.py (콜드 데이터 아카이브 수동 내보내기 및 조회 도구)
+
+import sys
+import logging
+import argparse
+import datetime
+
+from core.app_config import load_config, connect_db
+from core.archive_store import ArchiveExporter, ArchiveReader
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def cmd_export(config, args):
+    archive_config = dict(config.get('archive', {}))
+    if args.format: archive_config['format'] = args.format
+    if args.tables: archive_config['tables'] = args.tables
+    exporter = ArchiveExporter(archive_config, lambda: connect_db(config['database']))
+    until = datetime.date.fromisoformat(args.until) if args.until else None
+    summary = exporter.export_closed_partitions(until=until, purge=args.purge)
+    for table, label, n_rows in summary:
+        print(f"{table:<20} {label:<12} {n_rows:>10} rows")
+    print(f"--- Exported {len(summary)} partitions.")
+
+def cmd_read(config, args):
+    reader = ArchiveReader(config.get('archive', {}).get('directory', 'archive'))
+    filters = {}
+    if args.crate is not None: filters['crate'] = args.crate
+    if args.slot is not None: filters['slot'] = args.slot
+    if args.channels: filters['channel'] = (args.channels[0], args.channels[-1])
+    result = reader.read(args.table, args.start, args.end, columns=args.columns, filters=filters)
+    n_rows = len(next(iter(result.values()))) if result else 0
+    print(f"--- {n_rows} rows from {args.table} [{args.start} ~ {args.end}]")
+    for col, arr in result.items():
+        print(f"  {col:<16} {str(arr.dtype):<16} {arr[:3]}{' ...' if len(arr) > 3 else ''}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RENE-PM cold data archive tool")
+    parser.add_argument('--config', default="config_v3.json")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_export = sub.add_parser('export', help="마감된 파티션을 아카이브 파일로 내보내기")
+    p_export.add_argument('--until', help="이 날짜(YYYY-MM-DD) 이전 파티션까지 내보내기 (기본: 오늘)")
+    p_export.add_argument('--format', choices=['parquet', 'npz'])
+    p_export.add_argument('--tables', nargs='+')
+    p_export.add_argument('--purge', action='store_true', default=None, help="검증 후 keep_days_in_db 이전 행을 DB 에서 삭제")
+
+    p_read = sub.add_parser('read', help="아카이브 파일에서 시간 범위 조회")
+    p_read.add_argument('table')
+    p_read.add_argument('start', help="'YYYY-MM-DD HH:MM:SS'")
+    p_read.add_argument('end', help="'YYYY-MM-DD HH:MM:SS'")
+    p_read.add_argument('--columns', nargs='+')
+    p_read.add_argument('--crate', type=int, help="HV 크레이트 번호 (crate 컬럼 이전 파티션은 0)")
+    p_read.add_argument('--slot', type=int)
+    p_read.add_argument('--channels', type=int, nargs='+')
+
+    args = parser.parse_args()
+    config = load_config(args.config)
+    if not config: sys.exit(1)
+    if args.command == 'export': cmd_export(config, args)
+    elif args.command == 'read': cmd_read(config, args)
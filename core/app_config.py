@@ -0,0 +1,89 @@
+# core/app_config.py
+
+import os
+import json
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_config(config_file="config_v3.json"):
+    """
+    [공용 설정 로더]
+    GUI(main.py)와 명령행 도구(archive_tool.py, report_tool.py, migrate_schema.py)가 같은 규칙으로 설정을 읽는다.
+    상대 경로는 프로그램 폴더 기준이며, 파일이 없으면 config_v2.json 으로 대체한다.
+    실패하면 오류를 출력하고 None 을 돌려준다.
+    """
+    config_path = config_file if os.path.isabs(config_file) else os.path.join(BASE_DIR, config_file)
+    if not os.path.exists(config_path) and os.path.exists(config_file):
+        config_path = os.path.abspath(config_file)
+    if not os.path.exists(config_path):
+        config_path = os.path.join(BASE_DIR, "config_v2.json")
+        if not os.path.exists(config_path):
+            print(f"Error: Config file not found: {config_path}")
+            return None
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from {config_path}: {e}")
+        return None
+
+
+def connect_db(db_config, read_only=False):
+    """
+    풀 없이 단일 커넥션을 연다 (명령행 도구, 보고서 작업 프로세스용).
+    read_only 이면 GUI 의 읽기 풀과 같은 read_pool 설정(리플리카 host/port, 계정, database)을 따른다.
+    """
+    import mariadb
+    cfg = dict(db_config)
+    if read_only:
+        read_cfg = db_config.get('read_pool', {})
+        for key in ('user', 'password', 'database', 'host', 'port', 'unix_socket'):
+            if key in read_cfg: cfg[key] = read_cfg[key]
+        if 'host' in read_cfg or 'port' in read_cfg: cfg.pop('unix_socket', None)
+    conn_args = {'user': cfg['user'], 'password': cfg['password'], 'database': cfg['database']}
+    if cfg.get('unix_socket'):
+        conn_args['unix_socket'] = cfg['unix_socket']
+    else:
+        conn_args['host'] = cfg.get('host', '127.0.0.1')
+        conn_args['port'] = cfg.get('port', 3306)
+    return mariadb.connect(**conn_args)
+
+
+# 크레이트마다 따로 둘 수 없는 키. 스케줄러 한 틱이 모든 크레이트의 폴링 주기이다.
+_SHARED_HV_KEYS = ('enabled', 'polling_interval_ms', 'frame')
+
+
+def hv_mainframes(caen_config):
+    """
+    [CAEN 메인프레임 목록]
+    caen_hv.mainframes 의 각 항목을 caen_hv 의 공통 키(시스템 종류, 폴링 단계, 시뮬레이터 등) 위에 덮어쓴
+    크레이트별 설정 목록으로 돌려준다. mainframes 가 없으면 caen_hv 자체가 크레이트 0 하나이다.
+    crate 번호는 항목의 'crate' 또는 목록 순서이며 DB 의 crate 컬럼에 그대로 기록되므로 바꾸지 않는다.
+    """
+    shared = {k: v for k, v in caen_config.items() if k != 'mainframes'}
+    entries = caen_config.get('mainframes') or [{}]
+    mainframes = []
+    for i, entry in enumerate(entries):
+        mf = dict(shared, **{k: v for k, v in entry.items() if k not in _SHARED_HV_KEYS})
+        mf['crate'] = int(entry.get('crate', i))
+        mf['name'] = entry.get('name', 'main' if len(entries) == 1 else f"crate{mf['crate']}")
+        mainframes.append(mf)
+    return mainframes
+
+
+def hv_boards(caen_config):
+    """모든 크레이트의 보드 목록 [(crate, 크레이트 이름, slot, 보드 설정)] (crate, slot 순)."""
+    boards = []
+    for mf in hv_mainframes(caen_config):
+        for slot_str, board in mf.get('crate_map', {}).items():
+            boards.append((mf['crate'], mf['name'], int(slot_str), board))
+    return sorted(boards, key=lambda b: (b[0], b[2]))
+
+
+def hv_board_label(caen_config, crate, slot):
+    """화면 표시용 보드 이름. 크레이트가 하나뿐이면 기존처럼 슬롯 번호만 쓴다."""
+    mainframes = hv_mainframes(caen_config)
+    if len(mainframes) == 1: return f"S{slot}"
+    name = next((mf['name'] for mf in mainframes if mf['crate'] == crate), f"crate{crate}")
+    return f"{name}/S{slot}"
@@ -0,0 +1,348 @@
+# core/archive_store.py
+
+import os
+import glob
+import logging
+import datetime
+import numpy as np
+
+from core.db_schema import COLUMN_TYPES, ADDED_COLUMNS, column_names, rows_to_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+ARCHIVE_TABLES = list(COLUMN_TYPES.keys())
+
+
+def to_datetime64(value):
+    """문자열('YYYY-MM-DD HH:MM:SS'), datetime, datetime64 를 ms 해상도 datetime64 로 통일한다."""
+    if value is None: return None
+    if isinstance(value, np.datetime64): return value.astype('datetime64[ms]')
+    return np.datetime64(value, 'ms')
+
+
+def arrow_table(columns, names_dtypes):
+    """{컬럼: 배열} 을 (이름, dtype) 명세 순서의 pyarrow Table 로 바꾼다. 객체 컬럼은 문자열로 저장한다."""
+    arrays, fields = [], []
+    for name, dtype in names_dtypes:
+        if dtype == 'object':
+            arr = pa.array(columns[name].tolist(), type=pa.string())
+        else:
+            arr = pa.array(columns[name])
+        arrays.append(arr)
+        fields.append(pa.field(name, arr.type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def text_array(arr):
+    """객체 배열은 pickle 없이 읽을 수 있도록 유니코드 배열로 변환한다."""
+    return np.array(['' if v is None else str(v) for v in arr]) if arr.dtype == object else arr
+
+
+def _matches(value, cond):
+    """filters 조건 하나를 상수 값에 적용한다 (파티션에 없는 추가 컬럼용)."""
+    if isinstance(cond, tuple): return cond[0] <= value <= cond[1]
+    if isinstance(cond, (list, set)): return value in cond
+    return value == cond
+
+
+def _partition_bounds(day, granularity):
+    """파티션 시작일(date)로부터 [start, end) 구간을 계산한다."""
+    if granularity == 'month':
+        start = day.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+    else:
+        start = day
+        end = day + datetime.timedelta(days=1)
+    return start, end
+
+
+def _day_start(day):
+    return datetime.datetime.combine(day, datetime.time())
+
+
+def _partition_label(start, granularity):
+    return start.strftime('%Y-%m') if granularity == 'month' else start.strftime('%Y-%m-%d')
+
+
+class ArchiveExporter:
+    """
+    [콜드 데이터 아카이브 내보내기]
+    마감된 일(Day) 또는 월(Month) 단위 파티션을 센서 테이블별 압축 열 지향 파일
+    (Parquet 또는 청크 .npz)로 내보내고, 설정에 따라 검증 후 DB 에서 제거한다.
+    connect_fn 은 대상 database 가 선택된 DB-API 커넥션을 돌려주는 호출 가능 객체이다.
+    """
+    def __init__(self, archive_config, connect_fn):
+        self.config = archive_config
+        self.connect_fn = connect_fn
+        self.archive_dir = archive_config.get('directory', 'archive')
+        self.granularity = archive_config.get('granularity', 'day')
+        self.chunk_rows = archive_config.get('fetch_chunk_rows', 50000)
+        self.keep_days_in_db = archive_config.get('keep_days_in_db', 90)
+        self.purge_after_export = archive_config.get('purge_after_export', False)
+        self.tables = archive_config.get('tables', ARCHIVE_TABLES)
+
+        fmt = archive_config.get('format', 'parquet')
+        if fmt == 'parquet' and pa is None:
+            logging.warning("pyarrow not installed. Falling back to compressed .npz archive format.")
+            fmt = 'npz'
+        self.format = fmt
+
+    def partition_path(self, table, start):
+        ext = 'parquet' if self.format == 'parquet' else 'npz'
+        label = _partition_label(start, self.granularity)
+        return os.path.join(self.archive_dir, table, start.strftime('%Y'), f"{table}_{label}.{ext}")
+
+    def export_closed_partitions(self, until=None, purge=None):
+        """until(date) 이전에 마감된 모든 파티션 중 아직 내보내지 않은 것을 내보낸다."""
+        purge = self.purge_after_export if purge is None else purge
+        today = datetime.date.today()
+        if self.granularity == 'month':
+            until = until or today.replace(day=1)
+        else:
+            until = until or today
+        purge_before = today - datetime.timedelta(days=self.keep_days_in_db)
+
+        summary = []
+        conn = None
+        try:
+            conn = self.connect_fn()
+            cursor = conn.cursor()
+            for table in self.tables:
+                if table not in COLUMN_TYPES: continue
+                cursor.execute(f"SELECT MIN(`datetime`) FROM {table}")
+                first = cursor.fetchone()[0]
+                if first is None: continue
+
+                day, _ = _partition_bounds(first.date(), self.granularity)
+                while True:
+                    start, end = _partition_bounds(day, self.granularity)
+                    if end > until: break
+                    path = self.partition_path(table, start)
+                    if not os.path.exists(path):
+                        n_rows = self._export_partition(conn, cursor, table, start, end, path)
+                        summary.append((table, _partition_label(start, self.granularity), n_rows))
+                    if purge and end <= purge_before:
+                        self._purge_partition(conn, cursor, table, start, end, path)
+                    day = end
+        finally:
+            if conn: conn.close()
+        return summary
+
+    def _export_partition(self, conn, cursor, table, start, end, path):
+        names = column_names(table)
+        dtypes = [dt for _, dt in COLUMN_TYPES[table]]
+        missing = self._missing_columns(cursor, table)
+        col_list = ', '.join(f"{missing[c]} AS `{c}`" if c in missing else f"`{c}`" for c in names)
+        # [핵심] 버퍼링 커서는 execute() 에서 파티션 전체를 메모리에 받아 두므로 비버퍼링 커서로
+        # fetchmany 청크를 받는 즉시 파일에 기록한다.
+        try:
+            stream = conn.cursor(buffered=False)
+        except TypeError:
+            stream = conn.cursor()
+        try:
+            stream.execute(
+                f"SELECT {col_list} FROM {table} WHERE `datetime` >= ? AND `datetime` < ? ORDER BY `datetime`",
+                (_day_start(start), _day_start(end))
+            )
+            chunks = self._chunks(stream, names, dtypes)
+            if self.format == 'parquet':
+                n_rows = self._write_parquet(table, chunks, path)
+            else:
+                n_rows = self._write_npz(names, chunks, path)
+        finally:
+            stream.close()
+        if n_rows: logging.info(f"Archived {n_rows} rows of {table} to {path}")
+        return n_rows
+
+    def _chunks(self, cursor, names, dtypes):
+        while True:
+            rows = cursor.fetchmany(self.chunk_rows)
+            if not rows: return
+            yield rows_to_columns(rows, names, dtypes)
+
+    def _missing_columns(self, cursor, table):
+        """DB 테이블에 아직 없는 추가 컬럼 {컬럼: 기본값} (마이그레이션 전 DB)."""
+        added = ADDED_COLUMNS.get(table, {})
+        if not added: return {}
+        cursor.execute(f"SHOW COLUMNS FROM {table}")
+        present = {row[0] for row in cursor.fetchall()}
+        return {c: v for c, v in added.items() if c not in present}
+
+    def _write_parquet(self, table, chunks, path):
+        """청크 하나를 행 그룹(Row Group) 하나로 이어 쓴다. 행이 없으면 파일을 만들지 않는다."""
+        names_dtypes = COLUMN_TYPES[table]
+        schema = arrow_table({c: np.array([], dtype=dt) for c, dt in names_dtypes}, names_dtypes).schema
+        tmp_path = path + '.tmp'
+        writer, n_rows = None, 0
+        try:
+            for columns in chunks:
+                if writer is None:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    writer = pq.ParquetWriter(tmp_path, schema, compression=self.config.get('compression', 'zstd'))
+                writer.write_table(arrow_table(columns, names_dtypes))
+                n_rows += len(columns['datetime'])
+        except Exception:
+            if writer is not None:
+                writer.close()
+                os.remove(tmp_path)
+            raise
+        if writer is None: return 0
+        writer.close()
+        os.replace(tmp_path, path)
+        return n_rows
+
+    def _write_npz(self, names, chunks, path):
+        """.npz 는 이어쓰기가 안 되므로 (pyarrow 가 없을 때의 대체 형식) 파티션을 모아서 한 번에 쓴다."""
+        blocks = {c: [] for c in names}
+        for columns in chunks:
+            for col, arr in columns.items():
+                blocks[col].append(arr)
+        if not blocks['datetime']: return 0
+        out = {c: text_array(np.concatenate(blocks[c])) for c in names}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path[:-len('.npz')] + '.tmp.npz'
+        np.savez_compressed(tmp_path, **out)
+        os.replace(tmp_path, path)
+        return len(out['datetime'])
+
+    def _purge_partition(self, conn, cursor, table, start, end, path):
+        """아카이브 파일의 행 수가 DB 와 일치할 때에만 해당 구간을 DB 에서 삭제한다."""
+        bounds = (_day_start(start), _day_start(end))
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE `datetime` >= ? AND `datetime` < ?", bounds)
+        db_count = cursor.fetchone()[0]
+        if db_count == 0: return
+        archived = ArchiveReader.count_rows(path) if os.path.exists(path) else 0
+        if archived != db_count:
+            logging.warning(f"Skip purge of {table} {start}: archive has {archived} rows, DB has {db_count}.")
+            return
+        cursor.execute(f"DELETE FROM {table} WHERE `datetime` >= ? AND `datetime` < ?", bounds)
+        conn.commit()
+        logging.info(f"Purged {db_count} archived rows of {table} [{start} ~ {end}) from DB.")
+
+
+class ArchiveReader:
+    """
+    [콜드 데이터 아카이브 리더]
+    파일 이름의 날짜로 파티션을 먼저 걸러내고(Partition Pruning), 필요한 컬럼만 읽어
+    (Column Projection) 시간 범위와 채널 조건을 적용(Predicate Pushdown)한다.
+    결과는 {컬럼: NumPy 배열} 딕셔너리로 반환한다.
+    """
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+
+    def partitions(self, table, start=None, end=None):
+        start, end = to_datetime64(start), to_datetime64(end)
+        selected = []
+        for path in sorted(glob.glob(os.path.join(self.archive_dir, table, '*', f"{table}_*"))):
+            if path.endswith('.tmp') or '.tmp.' in path: continue
+            label = os.path.basename(path)[len(table) + 1:].split('.')[0]
+            try:
+                if len(label) == 7:
+                    p_start = np.datetime64(label, 'M').astype('datetime64[ms]')
+                    p_end = (np.datetime64(label, 'M') + 1).astype('datetime64[ms]')
+                else:
+                    p_start = np.datetime64(label, 'D').astype('datetime64[ms]')
+                    p_end = (np.datetime64(label, 'D') + 1).astype('datetime64[ms]')
+            except ValueError:
+                continue
+            if start is not None and p_end <= start: continue
+            if end is not None and p_start > end: continue
+            selected.append((p_start, p_end, path))
+        return selected
+
+    def coverage(self, table):
+        """아카이브된 구간의 (시작, 끝) datetime64 를 반환한다. 없으면 None."""
+        parts = self.partitions(table)
+        if not parts: return None
+        return parts[0][0], parts[-1][1]
+
+    def read(self, table, start=None, end=None, columns=None, filters=None):
+        """
+        filters 는 {컬럼: 값 | (하한, 상한) | [값, ...]} 형태이며, 모든 조건을 AND 로 결합한다.
+        (하한, 상한) 은 SQL 의 BETWEEN 과 같이 양끝을 포함한다.
+        """
+        start, end = to_datetime64(start), to_datetime64(end)
+        columns = columns or column_names(table)
+        filters = filters or {}
+        dtypes = dict(COLUMN_TYPES[table])
+
+        added = {c: np.array(v, dtype=dtypes[c]) for c, v in ADDED_COLUMNS.get(table, {}).items()}
+        blocks = {c: [] for c in columns}
+        for _, _, path in self.partitions(table, start, end):
+            if path.endswith('.parquet'):
+                part = self._read_parquet(path, columns, start, end, filters, added)
+            else:
+                part = self._read_npz(path, columns, start, end, filters, added)
+            if part is None: continue
+            for c in columns:
+                blocks[c].append(part[c])
+
+        result = {}
+        for c in columns:
+            if blocks[c]:
+                result[c] = np.concatenate(blocks[c])
+            else:
+                result[c] = np.array([], dtype=dtypes.get(c, 'float64'))
+        return result
+
+    def _read_parquet(self, path, columns, start, end, filters, added):
+        """파티션에 없는 추가 컬럼은 기본값으로 채우며, 그 컬럼의 조건이 기본값과 맞지 않으면 None (건너뜀)."""
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet archives.")
+        present = set(pq.read_schema(path).names)
+        absent = {c: v for c, v in added.items() if c not in present}
+        if any(not _matches(absent[col], cond) for col, cond in filters.items() if col in absent): return None
+        predicates = []
+        if start is not None: predicates.append(('datetime', '>=', start.astype(datetime.datetime)))
+        if end is not None: predicates.append(('datetime', '<=', end.astype(datetime.datetime)))
+        for col, cond in filters.items():
+            if col in absent: continue
+            if isinstance(cond, tuple):
+                predicates += [(col, '>=', cond[0]), (col, '<=', cond[1])]
+            elif isinstance(cond, (list, set)):
+                predicates.append((col, 'in', list(cond)))
+            else:
+                predicates.append((col, '=', cond))
+        table = pq.read_table(path, columns=[c for c in columns if c not in absent], filters=predicates or None)
+        out = {}
+        for c in columns:
+            if c in absent:
+                out[c] = np.full(table.num_rows, absent[c]); continue
+            col = table.column(c)
+            if pa.types.is_timestamp(col.type):
+                out[c] = col.to_numpy().astype('datetime64[ms]')
+            else:
+                out[c] = col.to_numpy(zero_copy_only=False)
+        return out
+
+    def _read_npz(self, path, columns, start, end, filters, added):
+        with np.load(path, allow_pickle=False) as npz:
+            ts = npz['datetime']
+            absent = {c: v for c, v in added.items() if c not in npz.files}
+            if any(not _matches(absent[col], cond) for col, cond in filters.items() if col in absent): return None
+            mask = np.ones(len(ts), dtype=bool)
+            if start is not None: mask &= ts >= start
+            if end is not None: mask &= ts <= end
+            for col, cond in filters.items():
+                if col in absent: continue
+                values = npz[col]
+                if isinstance(cond, tuple):
+                    mask &= (values >= cond[0]) & (values <= cond[1])
+                elif isinstance(cond, (list, set)):
+                    mask &= np.isin(values, list(cond))
+                else:
+                    mask &= values == cond
+            n = int(mask.sum())
+            return {c: np.full(n, absent[c]) if c in absent else (ts if c == 'datetime' else npz[c])[mask] for c in columns}
+
+    @staticmethod
+    def count_rows(path):
+        if path.endswith('.parquet'):
+            return pq.ParquetFile(path).metadata.num_rows
+        with np.load(path, allow_pickle=False) as npz:
+            return len(npz['datetime'])
@@ -0,0 +1,173 @@
+# core/correlation.py
+
+import warnings
+import numpy as np
+
+
+def split_series(cols, keys, column):
+    """
+    {컬럼: 배열} 결과를 키 컬럼(예: slot, channel) 값별 (키, 시각 배열, 값 배열) 목록으로 나눈다.
+    키가 여러 개면 키는 튜플, 하나면 스칼라, 없으면 None 이다.
+    """
+    ts = cols['datetime']
+    if len(ts) == 0: return []
+    if not keys: return [(None, ts, cols[column])]
+    order = np.lexsort([ts] + [cols[k] for k in reversed(keys)])
+    sorted_keys = np.stack([cols[k][order] for k in keys], axis=1)
+    change = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+    starts = np.concatenate([[0], np.nonzero(change)[0] + 1])
+    ends = np.append(starts[1:], len(order))
+    groups = []
+    for a, b in zip(starts, ends):
+        key = tuple(sorted_keys[a].tolist()) if len(keys) > 1 else sorted_keys[a, 0].item()
+        groups.append((key, ts[order[a:b]], cols[column][order[a:b]]))
+    return groups
+
+
+def align_streams(streams, step_s):
+    """
+    [공통 시간 격자 정렬]
+    (시각 배열, 값 배열) 스트림들을 step_s 간격의 하나의 격자에 한 번만 맞춘다.
+    같은 칸에 떨어진 값은 평균을 내고, 값이 없는 칸은 NaN 으로 둔다.
+    반환: (격자 시각 datetime64[s], (칸 수 × 스트림 수) float64 행렬)
+    """
+    stamps = [np.asarray(t, dtype='datetime64[s]').astype(np.int64) for t, _ in streams]
+    filled = [s for s in stamps if len(s)]
+    if not filled: return np.array([], dtype='datetime64[s]'), np.empty((0, len(streams)))
+    origin = min(int(s.min()) for s in filled)
+    n = (max(int(s.max()) for s in filled) - origin) // step_s + 1
+
+    matrix = np.full((n, len(streams)), np.nan)
+    for j, (s, (_, y)) in enumerate(zip(stamps, streams)):
+        y = np.asarray(y, dtype=np.float64)
+        ok = np.isfinite(y)
+        if not ok.any(): continue
+        # [핵심] 파이썬 루프 없이 bincount 로 칸별 합/개수를 한 번에 구한다.
+        idx = (s[ok] - origin) // step_s
+        counts = np.bincount(idx, minlength=n)
+        sums = np.bincount(idx, weights=y[ok], minlength=n)
+        has = counts > 0
+        matrix[has, j] = sums[has] / counts[has]
+    grid = (origin + np.arange(n, dtype=np.int64) * step_s).astype('datetime64[s]')
+    return grid, matrix
+
+
+def _centered(A):
+    """열 평균을 뺀 값(빈 칸은 0)과 유효 칸 마스크, 열 평균."""
+    mean = np.nan_to_num(_nan_stats(A))
+    mask = np.isfinite(A)
+    return np.where(mask, A - mean, 0.0), mask.astype(np.float64), mean
+
+
+def _fit(n, sx, sy, sxx, syy, sxy, min_points):
+    # 유효 칸 수와 1·2차 합으로부터 기울기, (중심화 좌표의) 절편, 상관계수를 구한다.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        slope = cov / var_x
+        intercept = (sy - slope * sx) / n
+        r = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+    bad = (n < min_points) | ~np.isfinite(slope) | ~np.isfinite(r)
+    for a in (slope, intercept, r): a[bad] = np.nan
+    return slope, intercept, r
+
+
+def regress(X, Y, min_points=3):
+    """
+    [일괄 선형 회귀]
+    X (칸 × p) 의 각 열에 대해 Y (칸 × k) 의 각 열을 y = slope * x + intercept 로 맞춘다.
+    두 열이 모두 값이 있는 칸만 쓰며(Pairwise), 모든 조합을 행렬 곱 몇 번으로 계산한다.
+    반환: {'slope', 'intercept', 'r', 'n'} 각각 (p × k) 배열. 점이 min_points 미만이면 NaN.
+    """
+    # 큰 오프셋(예: VMon 1500 V 근처의 작은 변동)에서 합의 정밀도를 잃지 않도록 먼저 열 평균을 뺀다.
+    X0, Mx, cx = _centered(np.asarray(X, dtype=np.float64))
+    Y0, My, cy = _centered(np.asarray(Y, dtype=np.float64))
+    n = Mx.T @ My
+    slope, intercept, r = _fit(n, X0.T @ My, Mx.T @ Y0, (X0 * X0).T @ My, Mx.T @ (Y0 * Y0), X0.T @ Y0, min_points)
+    intercept += cy[None, :] - slope * cx[:, None]
+    return {'slope': slope, 'intercept': intercept, 'r': r, 'n': n.astype(np.int64)}
+
+
+def correlation_matrix(M, min_points=3):
+    """모든 스트림 쌍의 상관계수 (스트림 수 × 스트림 수)."""
+    return regress(M, M, min_points)['r']
+
+
+def _nan_stats(A):
+    # 값이 전혀 없는 열의 "Mean of empty slice" 경고는 NaN 결과로 충분하므로 숨긴다.
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(A, axis=0)
+
+
+def lag_scan(X, Y, max_lag, min_points=3):
+    """
+    [FFT 기반 지연(Lag) 상관 스캔]
+    X (칸 × p) 의 각 열과 Y (칸 × k) 의 각 열 사이의 상관계수를 -max_lag ~ +max_lag 칸 지연마다 구한다.
+    양의 지연 l 은 y 가 x 보다 l 칸 늦게 반응한다는 뜻이다 (corr(x[t], y[t + l])).
+    지연마다 겹치는 유효 칸의 개수와 1·2차 합을 FFT 상호상관으로 한꺼번에 구하므로,
+    결측이 있어도 각 지연의 값은 그 겹친 구간의 정확한 피어슨 상관계수이다.
+    반환: (지연 배열, (p × 2*max_lag+1 × k) 상관계수)
+    """
+    X = np.asarray(X, dtype=np.float64); Y = np.asarray(Y, dtype=np.float64)
+    n = len(X)
+    max_lag = int(max(min(max_lag, n - 1), 0))
+    lags = np.arange(-max_lag, max_lag + 1)
+    if n == 0: return lags, np.full((X.shape[1], len(lags), Y.shape[1]), np.nan)
+
+    # [핵심] 선형(비순환) 상관에는 n + max_lag 길이의 0 채움이면 충분하다.
+    # 시간 축을 마지막(연속) 축으로 두고, Y 쪽 변환은 모든 센서가 한 번만 계산해 공유한다.
+    size = 1 << (n + max_lag - 1).bit_length()
+    X0, Mx, _ = _centered(X)
+    Y0, My, _ = _centered(Y)
+    fx = [np.conj(np.fft.rfft(a.T, size)) for a in (Mx, X0, X0 * X0)]
+    fy = [np.fft.rfft(a.T, size) for a in (My, Y0, Y0 * Y0)]
+    idx = lags % size
+    xcorr = lambda a, b: np.fft.irfft(a * b, size)[:, idx].T
+
+    r = np.empty((X.shape[1], len(lags), Y.shape[1]))
+    for i in range(X.shape[1]):
+        f_m, f_x, f_xx = fx[0][i], fx[1][i], fx[2][i]
+        cnt = np.rint(xcorr(f_m, fy[0]))
+        _, _, r[i] = _fit(cnt, xcorr(f_x, fy[0]), xcorr(f_m, fy[1]), xcorr(f_xx, fy[0]),
+                          xcorr(f_m, fy[2]), xcorr(f_x, fy[1]), min_points)
+    return lags, r
+
+
+def best_lag(lags, r):
+    """열마다 |r| 이 가장 큰 지연과 그때의 r. 값이 전혀 없는 열은 (0, NaN)."""
+    score = np.where(np.isfinite(r), np.abs(r), -1.0)
+    idx = np.argmax(score, axis=0)
+    cols = np.arange(r.shape[1])
+    best_r = r[idx, cols]
+    return np.where(np.isfinite(best_r), lags[idx], 0), best_r
+
+
+def correlate(targets, sensors, step_s, max_lag_s=0):
+    """
+    [다채널 상관 분석 엔진]
+    targets (예: HV 채널들) 와 sensors (환경 센서들) 를 공통 격자에 한 번 정렬한 뒤
+    채널×센서 회귀/상관, 전체 상관 행렬, 센서별 지연 스캔을 일괄 계산한다.
+    targets, sensors: [(이름, 시각 배열, 값 배열)]
+    """
+    streams = [(t, y) for _, t, y in sensors] + [(t, y) for _, t, y in targets]
+    grid, M = align_streams(streams, step_s)
+    p = len(sensors)
+    S, T = M[:, :p], M[:, p:]
+    fit = regress(S, T)
+
+    max_lag = int(max_lag_s // step_s) if max_lag_s else 0
+    lag_steps = np.zeros((p, len(targets)), dtype=np.int64)
+    lag_r = np.full((p, len(targets)), np.nan)
+    lags, r = lag_scan(S, T, max_lag)
+    for i in range(p):
+        lag_steps[i], lag_r[i] = best_lag(lags, r[i])
+
+    return {
+        'grid': grid, 'step_s': step_s, 'S': S, 'T': T,
+        'sensor_names': [name for name, _, _ in sensors], 'target_names': [name for name, _, _ in targets],
+        'slope': fit['slope'], 'intercept': fit['intercept'], 'r': fit['r'], 'n': fit['n'],
+        'best_lag_s': lag_steps * step_s, 'best_lag_r': lag_r,
+        'matrix': correlation_matrix(M),
+    }
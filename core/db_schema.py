@@ -0,0 +1,98 @@
+# core/db_schema.py
+
+import numpy as np
+
+# [핵심] 정수형 컬럼의 NULL 은 NumPy 정수 배열에 담을 수 없으므로 이 값으로 대체한다.
+INT_NULL = -1
+
+# 테이블별 (컬럼 이름, NumPy dtype) 명세. 첫 컬럼은 항상 시간 축(datetime)이다.
+# 아카이브 파일은 파티션(일/월)마다 따로 기록되므로, 값이 전부 NULL 인 날에도
+# 스키마가 흔들리지 않도록 추론(Inference) 대신 이 명세를 사용한다.
+COLUMN_TYPES = {
+    'LS_DATA': [
+        ('datetime', 'datetime64[ms]'), ('RTD_1', 'float32'), ('RTD_2', 'float32'),
+        ('DIST_1', 'float32'), ('DIST_2', 'float32')
+    ],
+    'RADON_DATA': [
+        ('datetime', 'datetime64[ms]'), ('mu', 'float32'), ('sigma', 'float32')
+    ],
+    'MAGNETOMETER_DATA': [
+        ('datetime', 'datetime64[ms]'), ('Bx', 'float32'), ('By', 'float32'),
+        ('Bz', 'float32'), ('B_mag', 'float32')
+    ],
+    'TH_O2_DATA': [
+        ('datetime', 'datetime64[ms]'), ('temperature', 'float32'),
+        ('humidity', 'float32'), ('oxygen', 'float32')
+    ],
+    'ARDUINO_DATA': [
+        ('datetime', 'datetime64[ms]'), ('analog_1', 'float32'), ('analog_2', 'float32'),
+        ('analog_3', 'float32'), ('analog_4', 'float32'), ('analog_5', 'float32'),
+        ('digital_status', 'int32'), ('message', 'object')
+    ],
+    'HV_DATA': [
+        ('datetime', 'datetime64[ms]'), ('crate', 'int16'), ('slot', 'int16'), ('channel', 'int16'),
+        ('power', 'bool'), ('vmon', 'float32'), ('imon', 'float32'),
+        ('status', 'int32'), ('board_temp', 'float32')
+    ],
+    'HV_SETPOINT_LOG': [
+        ('datetime', 'datetime64[ms]'), ('crate', 'int16'), ('slot', 'int16'), ('channel', 'int16'),
+        ('v0set', 'float32'), ('i0set', 'float32')
+    ],
+    'UPS_DATA': [
+        ('datetime', 'datetime64[ms]'), ('status', 'object'), ('linev', 'float32'),
+        ('bcharge', 'float32'), ('timeleft', 'float32')
+    ],
+    'PDU_DATA': [
+        ('datetime', 'datetime64[ms]'), ('port_idx', 'int16'), ('state', 'bool'),
+        ('power_w', 'float32'), ('current_ma', 'int32'), ('energy_wh', 'float32')
+    ],
+    'FIRE_DATA': [
+        ('datetime', 'datetime64[ms]'), ('status_code', 'int32'),
+        ('is_fire', 'bool'), ('is_fault', 'bool')
+    ],
+    'VOC_DATA': [
+        ('datetime', 'datetime64[ms]'), ('concentration', 'float32'),
+        ('alarm_status', 'int32'), ('unit', 'object')
+    ],
+}
+
+# 스키마 변경으로 나중에 추가된 컬럼과 그 이전 행의 값. 추가 전에 기록된 아카이브 파티션이나
+# 아직 migrate_schema.py 를 돌리지 않은 DB 에는 이 컬럼이 없으므로 읽을 때 이 값으로 채운다.
+ADDED_COLUMNS = {
+    'HV_DATA': {'crate': 0},
+    'HV_SETPOINT_LOG': {'crate': 0},
+}
+
+
+def column_names(table):
+    return [name for name, _ in COLUMN_TYPES[table]]
+
+
+def column_dtype(table, column):
+    for name, dtype in COLUMN_TYPES.get(table, []):
+        if name == column: return dtype
+    return None
+
+
+def to_column_array(values, dtype):
+    """DB 커서가 돌려준 파이썬 값 리스트를 지정된 dtype 의 NumPy 배열로 변환한다."""
+    kind = np.dtype(dtype).kind
+    if kind in ('i', 'u'):
+        values = [INT_NULL if v is None else v for v in values]
+    return np.array(values, dtype=dtype)
+
+
+def to_float_array(values, dtype=np.float32):
+    """그래프/통계용 실수 배열. 정수 컬럼의 INT_NULL 은 결측(NaN)으로 바꾼다."""
+    values = np.asarray(values)
+    out = values.astype(dtype)
+    if values.dtype.kind in ('i', 'u'): out[values == INT_NULL] = np.nan
+    return out
+
+
+def rows_to_columns(rows, columns, dtypes):
+    """행(Row) 튜플 리스트를 {컬럼: 배열} 형태의 열 지향(Columnar) 딕셔너리로 전치한다."""
+    if not rows:
+        return {col: np.array([], dtype=dt) for col, dt in zip(columns, dtypes)}
+    transposed = list(zip(*rows))
+    return {col: to_column_array(vals, dt) for col, vals, dt in zip(columns, transposed, dtypes)}
@@ -14,7 +14,11 @@ class EventBus(QObject):
     # ==========================================
     # sensor_type: 'daq_avg', 'radon_raw', 'ups_status', 'hv_status' 등
     # data: 실제 센서값 딕셔너리
+    # ('hv_status' 의 data 는 core.hv_frame 의 채널×파라미터 델타 프레임)
     sensor_data_updated = pyqtSignal(str, dict)
+
+    # HV 채널 상태 비트 전이 목록 [{'ts', 'crate', 'slot', 'channel', 'flag', 'set', 'alarm'}, ...] (core.hv_status)
+    hv_status_events = pyqtSignal(list)
     
     # 장비 연결 상태 알림 (HardwareManager 또는 Worker -> UI)
     device_connection_changed = pyqtSignal(str, bool)
@@ -32,13 +36,23 @@ class EventBus(QObject):
     # 라돈 센서 특수 상태 (측정 대기시간 등)
     radon_status_updated = pyqtSignal(str, int)
 
+    # 내부 성능 지표 (source: 'database' 등, metrics: 수치 또는 {라벨: 수치} 딕셔너리)
+    metrics_updated = pyqtSignal(str, dict)
+
     # ==========================================
     # 3. 제어 명령 이벤트 (UI/안전전문가 -> 지식망 -> 하드웨어 워커)
     # ==========================================
-    # CAEN HV 제어 (type: set_power/set_params, slot, channels, value/params)
+    # CAEN HV 제어 (type: set_power/set_params, crate (생략 시 첫 크레이트), slot, channels, value/params,
+    #              priority: 'emergency' 이면 최우선)
+    # type 'apply_profile' 은 name, crate, setpoints {slot: {channel: {param: value}}} 로 셋포인트 프로파일을 일괄 적용
     cmd_hv_control = pyqtSignal(dict)
-    request_hv_setpoints = pyqtSignal(int, int) # slot, channel
+    request_hv_setpoints = pyqtSignal(int, int, int) # crate, slot, channel
     hv_setpoints_ready = pyqtSignal(dict)       # 응답
+    # HV 명령 완료 (type, name, crate, slot, channels, priority, ok, latency_ms: 등록~쓰기 완료, wait_ms: 큐 대기)
+    hv_command_completed = pyqtSignal(dict)
+    # HV 버스트 캡처 (action: 'start' | 'stop', crate, channels [(slot, channel)], duration_s).
+    # 샘플은 sensor_data_updated('hv_burst', ...) 로 chunk 단위로 실린다 (core.hv_burst).
+    cmd_hv_burst = pyqtSignal(dict)
     
     # PDU 제어
     cmd_pdu_control_single = pyqtSignal(int, bool) # port_num, state
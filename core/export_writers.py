@@ -0,0 +1,159 @@
+# core/export_writers.py
+
+import os
+import zipfile
+import numpy as np
+
+from core.archive_store import pq, arrow_table, text_array
+from core.history_query import result_columns, columns_to_frame
+
+EXPORT_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.npz': 'npz'}
+
+
+def export_format(path):
+    """파일 확장자로 내보내기 형식을 정한다. 모르는 확장자면 None."""
+    return EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+class _ExportWriter:
+    """
+    [스트리밍 내보내기 기록기 공통부]
+    청크({컬럼: 배열})를 받는 즉시 임시 파일에 기록하고, close() 에서 최종 경로로 교체한다.
+    abort() 는 임시 파일을 지워 반쯤 쓰인 결과가 남지 않게 한다.
+    """
+    def __init__(self, path, spec):
+        self.path = path
+        self.spec = spec
+        self.columns, self.dtypes = result_columns(spec)
+        self.tmp_path = self._tmp_name(path)
+        self.rows = 0
+
+    @staticmethod
+    def _tmp_name(path):
+        return path + '.tmp'
+
+    def write(self, data):
+        n = len(data['datetime'])
+        if n == 0: return
+        self._write(data)
+        self.rows += n
+
+    def close(self):
+        self._close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        try: self._close()
+        except Exception: pass
+        for path in self._temp_files():
+            try: os.remove(path)
+            except OSError: pass
+
+    def _temp_files(self):
+        return [self.tmp_path]
+
+
+class CsvExportWriter(_ExportWriter):
+    def __init__(self, path, spec):
+        super().__init__(path, spec)
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self.file.write(','.join(self.columns) + '\n')
+
+    def _write(self, data):
+        columns_to_frame(data, self.spec).to_csv(self.file, header=False, index=False)
+
+    def _close(self):
+        if not self.file.closed: self.file.close()
+
+
+class ParquetExportWriter(_ExportWriter):
+    def __init__(self, path, spec, compression='zstd'):
+        if pq is None:
+            raise RuntimeError("pyarrow is required for Parquet export.")
+        super().__init__(path, spec)
+        self.names_dtypes = list(zip(self.columns, self.dtypes))
+        self.writer = pq.ParquetWriter(self.tmp_path, self._table(None).schema, compression=compression)
+
+    def _table(self, data):
+        if data is None:
+            data = {c: np.array([], dtype=dt) for c, dt in self.names_dtypes}
+        return arrow_table(data, self.names_dtypes)
+
+    def _write(self, data):
+        # 청크 하나가 행 그룹(Row Group) 하나가 된다.
+        self.writer.write_table(self._table(data))
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class NpzExportWriter(_ExportWriter):
+    """
+    압축 .npz 는 이어쓰기가 안 되므로 컬럼별 원시 바이트를 임시 파일에 이어 붙였다가,
+    close() 에서 컬럼 하나씩 ZIP 항목으로 흘려 넣는다. 전체 배열을 메모리에 올리지 않는다.
+    문자열 컬럼은 청크마다 폭이 다르므로 (폭, 개수) 를 기록해 두고 마지막에 최대 폭으로 맞춘다.
+    """
+    def __init__(self, path, spec):
+        super().__init__(path, spec)
+        self.parts = {c: open(self._part_name(c), 'wb') for c in self.columns}
+        self.text_chunks = {c: [] for c, dt in zip(self.columns, self.dtypes) if dt == 'object'}
+
+    @staticmethod
+    def _tmp_name(path):
+        return path[:-len('.npz')] + '.tmp.npz' if path.endswith('.npz') else path + '.tmp.npz'
+
+    def _part_name(self, column):
+        return f"{self.tmp_path}.{column}.part"
+
+    def _write(self, data):
+        for c, dt in zip(self.columns, self.dtypes):
+            if c in self.text_chunks:
+                arr = text_array(np.asarray(data[c], dtype=object))
+                self.text_chunks[c].append((max(arr.dtype.itemsize // 4, 1), len(arr)))
+                arr = arr.astype(f"<U{self.text_chunks[c][-1][0]}")
+            else:
+                arr = np.ascontiguousarray(data[c], dtype=dt)
+            self.parts[c].write(arr.tobytes())
+
+    def _close(self):
+        if not self.parts: return
+        for f in self.parts.values(): f.close()
+        with zipfile.ZipFile(self.tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for c, dt in zip(self.columns, self.dtypes):
+                with zf.open(f"{c}.npy", 'w', force_zip64=True) as out, open(self._part_name(c), 'rb') as src:
+                    if c in self.text_chunks:
+                        self._copy_text(out, src, self.text_chunks[c])
+                    else:
+                        dtype = np.dtype(dt)
+                        self._header(out, dtype, self.rows)
+                        while True:
+                            block = src.read(1 << 22)
+                            if not block: break
+                            out.write(block)
+        for c in self.columns: os.remove(self._part_name(c))
+        self.parts = {}
+
+    def _copy_text(self, out, src, chunks):
+        width = max([w for w, _ in chunks] + [1])
+        self._header(out, np.dtype(f"<U{width}"), self.rows)
+        for w, count in chunks:
+            block = np.frombuffer(src.read(w * 4 * count), dtype=f"<U{w}")
+            out.write(block.astype(f"<U{width}").tobytes())
+
+    @staticmethod
+    def _header(out, dtype, n):
+        np.lib.format.write_array_header_2_0(out, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                   'fortran_order': False, 'shape': (n,)})
+
+    def _temp_files(self):
+        return [self.tmp_path] + [self._part_name(c) for c in self.columns]
+
+
+def open_writer(path, spec, fmt=None, compression='zstd'):
+    fmt = fmt or export_format(path)
+    if fmt == 'csv': return CsvExportWriter(path, spec)
+    if fmt == 'parquet': return ParquetExportWriter(path, spec, compression)
+    if fmt == 'npz': return NpzExportWriter(path, spec)
+    raise ValueError(f"Unsupported export format: {path}")
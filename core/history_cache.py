@@ -0,0 +1,145 @@
+# core/history_cache.py
+
+import time
+import datetime
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def to_local_datetime64(epoch_s):
+    """time.time() 값을 DB 와 같은 로컬 시각의 datetime64[s] 로 변환한다."""
+    return np.datetime64(datetime.datetime.fromtimestamp(epoch_s), 's')
+
+
+def _epoch(t):
+    """naive 로컬 시각을 그대로 epoch 초로 센 값 (build_sql 의 TIMESTAMPDIFF(SECOND, '1970-01-01', ...))."""
+    return int(t.astype('datetime64[s]').astype(np.int64))
+
+
+def align_down(t, bucket_s):
+    """로컬 시각 기준 버킷 경계로 내림 (build_sql, bucket_aggregate 와 같은 경계)."""
+    return t - np.timedelta64(_epoch(t) % bucket_s, 's')
+
+
+def align_up(t, bucket_s):
+    r = _epoch(t) % bucket_s
+    return t + np.timedelta64((bucket_s - r) % bucket_s, 's')
+
+
+class HistoryCache:
+    """
+    [Data History 조회 결과 캐시]
+    (테이블, 컬럼, 시계열 키, 필터, 버킷) 별로 이미 받아온 열 블록과 그 시간 구간 목록을 보관한다.
+    새 요청이 캐시된 구간과 겹치면 빠진 하위 구간만 DB 에서 받아 병합한다.
+    아직 DB 에 기록되지 않았을 수 있는 구간(마지막 플러시 이후)은 캐시에 넣지 않으므로
+    최신 구간만 매번 새로 조회되고 과거 구간은 무효화할 필요가 없다. 메모리 한도를 넘으면 LRU 로 버린다.
+    모든 구간은 명세와 같은 반열린 구간 [start, end) 이며, 경계는 초 단위이고 행 시각은 ms 해상도이다.
+    """
+    def __init__(self, max_mb=256):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict()   # key -> {'intervals': [(start, end)], 'data': {col: ndarray}, 'nbytes': int}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 첫 플러시 메트릭이 오기 전에는 프로그램 시작 시각을 기록 완료 경계로 본다.
+        self.watermark = to_local_datetime64(time.time())
+
+    def set_watermark(self, flushed_through_ts):
+        """DatabaseWorker 메트릭의 flushed_through_ts (이 시각 이전에 큐에 들어온 행은 모두 커밋됨)."""
+        if not flushed_through_ts: return
+        with self._lock:
+            self.watermark = max(self.watermark, to_local_datetime64(flushed_through_ts))
+
+    @staticmethod
+    def key(spec):
+        filters = tuple(sorted((k, tuple(v) if isinstance(v, (list, set, tuple)) else v)
+                               for k, v in spec['filters'].items()))
+        return (spec['table'], tuple(spec['columns']), tuple(spec['series']), filters,
+                bool(spec.get('distinct')), spec.get('bucket_s'))
+
+    @staticmethod
+    def _bounds(spec):
+        start = np.datetime64(spec['start'].replace(' ', 'T'), 's')
+        end = np.datetime64(spec['end'].replace(' ', 'T'), 's')
+        bucket = spec.get('bucket_s')
+        if bucket:
+            # 경계에 걸친 버킷이 반쪽만 집계되지 않도록 요청 구간을 버킷 경계까지 넓힌다.
+            start = align_down(start, bucket)
+            end = align_up(end, bucket)
+        return start, end
+
+    def missing(self, spec):
+        """요청 구간 중 캐시에 없는 [시작, 끝) datetime64[s] 구간 목록."""
+        start, end = self._bounds(spec)
+        with self._lock:
+            entry = self._entries.get(self.key(spec))
+            intervals = list(entry['intervals']) if entry else []
+        gaps, cursor = [], start
+        for a, b in intervals:
+            if b <= cursor: continue
+            if a >= end: break
+            if a > cursor: gaps.append((cursor, a))
+            cursor = max(cursor, b)
+        if cursor < end: gaps.append((cursor, end))
+        return gaps
+
+    def store(self, spec, start, end, columns):
+        """[start, end) 구간을 조회한 결과를 넣는다. 마지막 플러시 이후 부분은 잘라내고 넣는다."""
+        bucket = spec.get('bucket_s')
+        with self._lock:
+            limit = self.watermark
+        if bucket: limit = align_down(limit, bucket)
+        end = min(end, limit)
+        if end <= start: return
+
+        ts = columns['datetime']
+        keep = ts < end.astype(ts.dtype)
+        block = {c: np.asarray(v)[keep] for c, v in columns.items()}
+        key = self.key(spec)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                entry = {'intervals': [], 'data': block, 'nbytes': 0}
+            else:
+                self._bytes -= entry['nbytes']
+                merged = {c: np.concatenate([entry['data'][c], block[c]]) for c in block}
+                order = np.argsort(merged['datetime'], kind='stable')
+                entry['data'] = {c: v[order] for c, v in merged.items()}
+            entry['intervals'] = self._merge(entry['intervals'] + [(start, end)])
+            entry['nbytes'] = sum(v.nbytes for v in entry['data'].values())
+            self._entries[key] = entry
+            self._bytes += entry['nbytes']
+            self._evict()
+
+    def get(self, spec):
+        """요청 구간에 해당하는 캐시 행을 {컬럼: 배열} 로 돌려준다. 없으면 None."""
+        start, end = self._bounds(spec)
+        key = self.key(spec)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None: return None
+            self._entries.move_to_end(key)
+            data = entry['data']
+        ts = data['datetime']
+        lo = np.searchsorted(ts, start.astype(ts.dtype), side='left')
+        hi = np.searchsorted(ts, end.astype(ts.dtype), side='left')
+        return {c: v[lo:hi] for c, v in data.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear(); self._bytes = 0
+
+    @staticmethod
+    def _merge(intervals):
+        merged = []
+        for a, b in sorted(intervals):
+            if merged and a <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else:
+                merged.append((a, b))
+        return merged
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old['nbytes']
@@ -0,0 +1,436 @@
+# core/history_query.py
+
+import math
+import datetime
+import numpy as np
+import pandas as pd
+from core.db_schema import INT_NULL, column_dtype, to_column_array
+
+# 테이블별 원본 기록 주기(초). 버킷이 이보다 작으면 집계 없이 원본 행을 그대로 조회한다.
+TABLE_RESOLUTION_S = {
+    'LS_DATA': 60, 'RADON_DATA': 600, 'MAGNETOMETER_DATA': 60, 'TH_O2_DATA': 60,
+    'ARDUINO_DATA': 60, 'HV_DATA': 60, 'UPS_DATA': 60, 'PDU_DATA': 5,
+    'FIRE_DATA': 60, 'VOC_DATA': 60
+}
+
+# 사람이 읽기 좋은 버킷 크기 후보 (초)
+_NICE_BUCKETS_S = [60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400]
+
+
+def make_spec(table, columns, start, end, series=None, filters=None, distinct=False):
+    """
+    조회 명세(Spec) 딕셔너리를 만든다.
+    series 는 시계열을 구분하는 키 컬럼(예: channel, slot, port_idx)이며 집계 시 GROUP BY 에 포함된다.
+    filters 는 {컬럼: 값 | (하한, 상한) | [값, ...]} 형태이다.
+    시간 구간은 반열린 구간 [start, end) 이다. datetime 키가 ms 해상도이므로 하루 전체는
+    'YYYY-MM-DD 00:00:00' ~ 다음 날 '00:00:00' 으로 준다.
+    """
+    return {
+        'table': table, 'columns': list(columns), 'series': list(series or []),
+        'filters': dict(filters or {}), 'start': start, 'end': end,
+        'distinct': distinct, 'bucket_s': None
+    }
+
+
+def _parse_time(value):
+    if isinstance(value, datetime.datetime): return value
+    return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+def compute_bucket_seconds(start, end, pixel_width, table=None, points_per_pixel=1):
+    """
+    요청 구간과 캔버스 가로 픽셀 수로부터 버킷 크기(초)를 계산한다.
+    원본 기록 주기 이하로 충분히 그릴 수 있으면 None(원본 조회)을 반환한다.
+    """
+    span_s = (_parse_time(end) - _parse_time(start)).total_seconds()
+    max_points = max(int(pixel_width * points_per_pixel), 1)
+    bucket = span_s / max_points
+    native = TABLE_RESOLUTION_S.get(table, 60)
+    if bucket <= native: return None
+    for nice in _NICE_BUCKETS_S:
+        if nice >= bucket: return nice
+    return int(math.ceil(bucket / 86400.0)) * 86400
+
+
+def _where_clause(spec):
+    conds, params = [], []
+    for col, cond in spec['filters'].items():
+        if isinstance(cond, tuple):
+            conds.append(f"`{col}` BETWEEN ? AND ?"); params += [cond[0], cond[1]]
+        elif isinstance(cond, (list, set)):
+            values = list(cond)
+            conds.append(f"`{col}` IN ({', '.join(['?'] * len(values))})"); params += values
+        else:
+            conds.append(f"`{col}` = ?"); params.append(cond)
+    conds.append("`datetime` >= ? AND `datetime` < ?")
+    params += [spec['start'], spec['end']]
+    return " AND ".join(conds), params
+
+
+def _epoch_ms(expr):
+    return f"TIMESTAMPDIFF(MICROSECOND, '1970-01-01', {expr}) DIV 1000 AS `datetime`"
+
+
+def build_sql(spec):
+    """
+    명세로부터 (SQL, 파라미터)를 만든다. spec['bucket_s'] 가 지정되면
+    로컬 시각 기준 epoch 초를 bucket 으로 나눈 몫 단위로 서버에서 평균/최소/최대를 집계하여
+    화면에 그릴 수 있는 만큼의 행만 돌려받는다. 버킷 경계는 bucket_aggregate, archive_split,
+    HistoryCache 와 같은 로컬 시각 기준이다 (UNIX_TIMESTAMP 는 UTC 기준이라 쓰지 않는다).
+    시간 컬럼은 드라이버가 셀마다 datetime 객체를 만들지 않도록 로컬 시각 기준 epoch 밀리초 정수로
+    받으며, 이는 그대로 datetime64[ms] 배열이 된다. 원본 행도 (datetime, 시계열 키) 순으로 정렬해 받는다.
+    """
+    where, params = _where_clause(spec)
+    series = spec['series']
+    bucket = spec.get('bucket_s')
+    if not bucket:
+        distinct = "DISTINCT " if spec.get('distinct') else ""
+        col_list = ', '.join([_epoch_ms("`datetime`")] + [f"`{c}`" for c in series + spec['columns']])
+        order = ', '.join(["`datetime`"] + [f"`{c}`" for c in series])
+        return f"SELECT {distinct}{col_list} FROM {spec['table']} WHERE {where} ORDER BY {order}", params
+
+    bucket = int(bucket)
+    key = f"TIMESTAMPDIFF(SECOND, '1970-01-01', `datetime`) DIV {bucket}"
+    select = [f"{key} * {bucket * 1000} AS `datetime`"] + [f"`{c}`" for c in series]
+    for c in spec['columns']:
+        select += [f"AVG(`{c}`) AS `{c}`", f"MIN(`{c}`) AS `{c}_min`", f"MAX(`{c}`) AS `{c}_max`"]
+    group = ', '.join([key] + [f"`{c}`" for c in series])
+    return (f"SELECT {', '.join(select)} FROM {spec['table']} WHERE {where} "
+            f"GROUP BY {group} ORDER BY {group}"), params
+
+
+def bucket_aggregate(df, spec):
+    """
+    아카이브 등에서 읽은 원본 행을 build_sql 의 집계 결과와 같은 모양으로 버킷 집계한다.
+    naive 로컬 시각을 그대로 내림하므로 build_sql 의 로컬 epoch 버킷과 경계가 같다.
+    """
+    bucket = spec.get('bucket_s')
+    if not bucket or df.empty: return df
+    ts = pd.to_datetime(df['datetime'])
+    keys = [ts.dt.floor(f"{int(bucket)}s").rename('datetime')] + [df[c] for c in spec['series']]
+    grouped = df[spec['columns']].groupby(keys)
+    out = grouped.mean()
+    for c in spec['columns']:
+        out[f"{c}_min"] = grouped[c].min()
+        out[f"{c}_max"] = grouped[c].max()
+    return out.reset_index()
+
+
+def split_spec(spec, max_parts=2):
+    """
+    서로 독립적으로(별도 커넥션에서 병렬로) 실행할 수 있는 하위 명세로 나눈다.
+    1) 목록 필터(여러 슬롯/포트 선택)는 값마다 하나의 쿼리로 나눠 각각이 (slot, ...) 키 범위만 읽게 한다.
+    2) 원본 행 조회가 여러 날에 걸치면 날짜 경계로 최대 max_parts 개 구간으로 나눈다.
+    결과는 concat_columns 로 다시 합친다.
+    """
+    if max_parts <= 1: return [spec]
+    for col, cond in spec['filters'].items():
+        if isinstance(cond, (list, set)) and len(cond) > 1:
+            return [dict(spec, filters=dict(spec['filters'], **{col: value})) for value in cond]
+
+    if spec.get('bucket_s'): return [spec]
+    start, end = _parse_time(spec['start']), _parse_time(spec['end'])
+    # 끝은 포함하지 않으므로 자정에 끝나는 구간의 마지막 날은 그 전날이다.
+    n_days = ((end - datetime.timedelta(milliseconds=1)).date() - start.date()).days + 1
+    if n_days < 2: return [spec]
+    n_parts = min(max_parts, n_days)
+    parts, first = [], start.date()
+    for i in range(n_parts):
+        d0 = first + datetime.timedelta(days=(n_days * i) // n_parts)
+        d1 = first + datetime.timedelta(days=(n_days * (i + 1)) // n_parts)
+        p_start = spec['start'] if i == 0 else f"{d0} 00:00:00"
+        p_end = spec['end'] if i == n_parts - 1 else f"{d1} 00:00:00"
+        parts.append(dict(spec, start=p_start, end=p_end))
+    return parts
+
+
+def format_time(t):
+    """datetime64 를 명세에서 쓰는 'YYYY-MM-DD HH:MM:SS' 문자열로 바꾼다."""
+    return str(np.datetime64(t, 's')).replace('T', ' ')
+
+
+def archive_split(spec, coverage):
+    """
+    아카이브 커버리지 (시작, 끝) 와 명세의 시간 구간을 비교하여
+    (아카이브에서 읽을 명세 | None, DB 에서 읽을 명세 | None) 로 나눈다.
+    요청 구간이 아카이브 시작보다 앞서면 빈틈이 생기지 않도록 전부 DB 에서 읽는다.
+    두 명세는 반열린 구간이므로 경계에서 겹치거나 빠지는 행 없이 나뉜다.
+    버킷 집계 명세는 한 버킷이 양쪽에 반씩 집계되지 않도록 cov_end 를 버킷 경계로 내린 시각에서 나눈다.
+    (일/월 파티션 끝은 자정이므로 하루의 약수인 버킷에서는 cov_end 그대로이다.)
+    """
+    if coverage is None: return None, spec
+    start = np.datetime64(_parse_time(spec['start']), 'ms')
+    end = np.datetime64(_parse_time(spec['end']), 'ms')
+    cov_start, cov_end = coverage
+    bucket = spec.get('bucket_s')
+    if bucket:
+        epoch_s = int(cov_end.astype('datetime64[s]').astype(np.int64))
+        cov_end = cov_end - np.timedelta64(epoch_s % int(bucket), 's')
+    if start < cov_start or start >= cov_end: return None, spec
+
+    fmt = format_time
+    archive_spec = dict(spec, end=fmt(min(end, cov_end)))
+    if end <= cov_end: return archive_spec, None
+    return archive_spec, dict(spec, start=fmt(cov_end))
+
+
+class ColumnBuffer:
+    """
+    [미리 할당된 열 버퍼]
+    커서에서 fetchmany 로 받은 행 묶음을 컬럼별 NumPy 배열에 바로 채워 넣는다.
+    용량이 차면 두 배씩 늘리되 max_rows 를 넘지 않는다. 이미 채워진 구간은 다시 쓰지 않으므로
+    view() 가 돌려주는 슬라이스는 이후 추가 기록과 무관하게 안전하다.
+    """
+    def __init__(self, columns, dtypes, capacity=20000, max_rows=None):
+        self.columns = list(columns)
+        self.dtypes = dict(zip(columns, dtypes))
+        self.max_rows = max_rows
+        capacity = min(capacity, max_rows) if max_rows else capacity
+        self.arrays = {c: np.empty(max(capacity, 1), dtype=self.dtypes[c]) for c in self.columns}
+        self._record_dtype = np.dtype([(c, self.dtypes[c]) for c in self.columns])
+        self.n = 0
+
+    @property
+    def full(self):
+        return self.max_rows is not None and self.n >= self.max_rows
+
+    def _reserve(self, extra):
+        need = self.n + extra
+        capacity = len(self.arrays[self.columns[0]])
+        if need <= capacity: return extra
+        new_cap = max(need, capacity * 2)
+        if self.max_rows: new_cap = min(new_cap, self.max_rows)
+        for c in self.columns:
+            grown = np.empty(new_cap, dtype=self.dtypes[c])
+            grown[:self.n] = self.arrays[c][:self.n]
+            self.arrays[c] = grown
+        return min(extra, new_cap - self.n)
+
+    def append_rows(self, rows):
+        """행 튜플 리스트를 추가하고, 용량 한도로 잘려 실제로 들어간 행 수를 반환한다."""
+        if not rows: return 0
+        k = self._reserve(len(rows))
+        if k <= 0: return 0
+        rows = rows[:k]
+        try:
+            # [핵심] 구조체 dtype 으로 한 번에 변환하면 파이썬 수준의 셀 단위 반복 없이 C 루프로 채워진다.
+            block = np.array(rows, dtype=self._record_dtype)
+            for c in self.columns:
+                self.arrays[c][self.n:self.n + k] = block[c]
+        except (TypeError, ValueError):
+            # 정수 컬럼의 NULL 등은 컬럼 단위 변환(INT_NULL 치환)으로 처리한다.
+            for c, values in zip(self.columns, zip(*rows)):
+                self.arrays[c][self.n:self.n + k] = to_column_array(list(values), self.dtypes[c])
+        self.n += k
+        return k
+
+    def append_columns(self, data):
+        """{컬럼: 배열} 묶음(아카이브 읽기 결과 등)을 추가한다."""
+        length = len(data[self.columns[0]]) if self.columns else 0
+        if length == 0: return 0
+        k = self._reserve(length)
+        if k <= 0: return 0
+        for c in self.columns:
+            self.arrays[c][self.n:self.n + k] = np.asarray(data[c])[:k]
+        self.n += k
+        return k
+
+    def view(self):
+        return {c: self.arrays[c][:self.n] for c in self.columns}
+
+    def clear(self):
+        """같은 배열을 다음 청크에 다시 쓴다 (앞서 돌려준 view 를 이미 소비한 스트리밍 내보내기 전용)."""
+        self.n = 0
+
+
+def result_columns(spec):
+    """
+    명세가 돌려줄 컬럼 이름과 버퍼 dtype 목록. 원본 컬럼은 core.db_schema 의 테이블 명세
+    (float32, int16 등)를 그대로 쓰고, 버킷 집계값(평균/최소/최대)은 float32 로 받는다.
+    """
+    table = spec['table']
+    cols, dtypes = ['datetime'], ['datetime64[ms]']
+    for c in spec['series']:
+        cols.append(c); dtypes.append(column_dtype(table, c) or 'int64')
+    for c in spec['columns']:
+        if spec.get('bucket_s'):
+            cols += [c, f"{c}_min", f"{c}_max"]; dtypes += ['float32'] * 3
+        else:
+            cols.append(c); dtypes.append(column_dtype(table, c) or 'float64')
+    return cols, dtypes
+
+
+def columns_to_frame(columns, spec=None):
+    """
+    {컬럼: 배열} 결과를 DataFrame 으로 바꾼다 (CSV 내보내기, 병합 등 판다스가 꼭 필요할 때만 사용).
+    시계열 키가 아닌 정수 컬럼의 INT_NULL 은 결측(NA)으로 되돌린다.
+    """
+    keys = set(spec['series']) if spec else set()
+    data = {}
+    for c, values in columns.items():
+        if c not in keys and values.dtype.kind in ('i', 'u') and (values == INT_NULL).any():
+            data[c] = pd.array(values, dtype='Int64')
+            data[c][values == INT_NULL] = pd.NA
+        else:
+            data[c] = values
+    return pd.DataFrame(data)
+
+
+def _read_archive(reader, spec):
+    cols = ['datetime'] + spec['series'] + spec['columns']
+    # ArchiveReader.read 는 양끝을 포함하므로 반열린 끝을 ms 하나 당긴다 (키 해상도가 ms).
+    end = np.datetime64(_parse_time(spec['end']), 'ms') - np.timedelta64(1, 'ms')
+    data = reader.read(spec['table'], spec['start'], end, columns=cols, filters=spec['filters'])
+    if not spec.get('distinct') and not spec.get('bucket_s'): return data
+    df = pd.DataFrame(data)
+    if spec.get('distinct'): df = df.drop_duplicates()
+    df = bucket_aggregate(df, spec)
+    return {c: df[c].to_numpy() for c in df.columns}
+
+
+def fetch_chunked(conn, spec, archive_reader=None, chunk_rows=20000, max_rows=None,
+                  should_stop=None, on_chunk=None, on_abort=None, take_rows=None):
+    """
+    명세 하나를 청크 단위로 읽어 ColumnBuffer 에 채운다.
+    아카이브로 옮겨진 닫힌 구간은 파일에서 읽고(버킷 집계는 판다스로 동일하게 수행),
+    나머지 최근 구간만 DB 커서에서 fetchmany 로 스트리밍한다.
+    청크마다 on_chunk(buffer) 를 호출하며, should_stop() 이 참이 되거나 max_rows 에 도달하면 중단한다.
+    결과를 다 읽기 전에 중단할 때는 on_abort() 로 서버 측 쿼리를 먼저 끊어, 커서를 닫으며
+    남은 행을 모두 받아 버리는 일이 없게 한다.
+    take_rows(n) 은 여러 명세가 함께 쓰는 행 수 한도에서 n 행을 요청해 실제로 받을 수 있는 행 수를 돌려준다.
+    반환값: (buffer, 'complete' | 'truncated' | 'cancelled')
+    """
+    columns, dtypes = result_columns(spec)
+    buffer = ColumnBuffer(columns, dtypes, capacity=chunk_rows, max_rows=max_rows)
+
+    archive_spec, db_spec = None, spec
+    if archive_reader is not None:
+        archive_spec, db_spec = archive_split(spec, archive_reader.coverage(spec['table']))
+
+    if archive_spec is not None:
+        data = _read_archive(archive_reader, archive_spec)
+        n = len(data['datetime'])
+        allowed = take_rows(n) if take_rows else n
+        buffer.append_columns({c: v[:allowed] for c, v in data.items()})
+        if on_chunk: on_chunk(buffer)
+        if buffer.full or allowed < n: return buffer, 'truncated'
+
+    if db_spec is None: return buffer, 'complete'
+    if should_stop and should_stop(): return buffer, 'cancelled'
+
+    sql, params = build_sql(db_spec)
+    cursor = _stream_cursor(conn)
+    outcome = 'complete'
+    try:
+        cursor.execute(sql, params)
+        while True:
+            if should_stop and should_stop():
+                outcome = 'cancelled'; break
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows: break
+            allowed = take_rows(len(rows)) if take_rows else len(rows)
+            taken = buffer.append_rows(rows[:allowed])
+            if on_chunk: on_chunk(buffer)
+            if taken < len(rows) or buffer.full:
+                outcome = 'truncated'; break
+    finally:
+        if outcome != 'complete' and on_abort: on_abort()
+        try: cursor.close()
+        except Exception: pass
+    return buffer, outcome
+
+
+def _stream_cursor(conn):
+    # [핵심] 버퍼링 커서는 execute() 에서 결과 전체를 클라이언트 메모리에 받아 두므로,
+    # fetchmany 가 실제로 서버에서 청크씩 받아오도록 비버퍼링 커서를 쓴다.
+    try:
+        return conn.cursor(buffered=False)
+    except TypeError:
+        return conn.cursor()
+
+
+def export_chunked(conn, spec, writer, archive_reader=None, chunk_rows=20000,
+                   should_stop=None, on_chunk=None, on_abort=None):
+    """
+    명세 하나를 청크 단위로 읽어 writer 에 바로 기록한다. 메모리에는 한 청크(아카이브는 파티션 하나)만 둔다.
+    청크마다 on_chunk(지금까지 기록한 행 수) 를 호출하며, should_stop() 이 참이 되면 중단한다.
+    반환값: (기록한 행 수, 'complete' | 'cancelled')
+    """
+    archive_spec, db_spec = None, spec
+    if archive_reader is not None:
+        archive_spec, db_spec = archive_split(spec, archive_reader.coverage(spec['table']))
+
+    if archive_spec is not None:
+        start = np.datetime64(_parse_time(archive_spec['start']), 'ms')
+        end = np.datetime64(_parse_time(archive_spec['end']), 'ms')
+        for p_start, p_end, _ in archive_reader.partitions(spec['table'], start, end):
+            if p_start >= end: continue
+            if should_stop and should_stop(): return writer.rows, 'cancelled'
+            part = dict(archive_spec, start=format_time(max(start, p_start)), end=format_time(min(end, p_end)))
+            writer.write(_read_archive(archive_reader, part))
+            if on_chunk: on_chunk(writer.rows)
+
+    if db_spec is None: return writer.rows, 'complete'
+    if should_stop and should_stop(): return writer.rows, 'cancelled'
+
+    buffer = ColumnBuffer(*result_columns(spec), capacity=chunk_rows)
+    sql, params = build_sql(db_spec)
+    cursor = _stream_cursor(conn)
+    outcome = 'complete'
+    try:
+        cursor.execute(sql, params)
+        while True:
+            if should_stop and should_stop():
+                outcome = 'cancelled'; break
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows: break
+            buffer.clear()
+            buffer.append_rows(rows)
+            writer.write(buffer.view())
+            if on_chunk: on_chunk(writer.rows)
+    finally:
+        if outcome != 'complete' and on_abort: on_abort()
+        try: cursor.close()
+        except Exception: pass
+    return writer.rows, outcome
+
+
+def fetch_cached(conn, spec, cache=None, archive_reader=None, chunk_rows=20000, max_rows=None,
+                 should_stop=None, on_chunk=None, on_abort=None, take_rows=None):
+    """
+    캐시를 거쳐 명세 하나를 읽는다. 캐시에 없는 하위 구간만 fetch_chunked 로 받아 캐시에 넣고,
+    캐시된 행과 합쳐 시간순 {컬럼: 배열} 로 돌려준다. 반환값: (columns, outcome)
+    """
+    if cache is None:
+        buffer, outcome = fetch_chunked(conn, spec, archive_reader, chunk_rows, max_rows, should_stop, on_chunk, on_abort, take_rows)
+        return buffer.view(), outcome
+
+    cached = cache.get(spec)
+    if cached is not None and take_rows:
+        # 캐시에서 꺼낸 행도 공유 한도에서 뺀다.
+        n = len(cached['datetime'])
+        allowed = take_rows(n)
+        if allowed < n: return {c: v[:allowed] for c, v in cached.items()}, 'truncated'
+    blocks = [cached] if cached is not None else []
+    held = len(cached['datetime']) if cached is not None else 0
+    for gap_start, gap_end in cache.missing(spec):
+        sub = dict(spec, start=format_time(gap_start), end=format_time(gap_end))
+        limit = (max_rows - held) if max_rows else None
+        if limit is not None and limit <= 0: return concat_columns(blocks, spec), 'truncated'
+        buffer, outcome = fetch_chunked(conn, sub, archive_reader, chunk_rows, limit, should_stop, on_chunk, on_abort, take_rows)
+        block = buffer.view()
+        blocks.append(block)
+        held += buffer.n
+        if outcome != 'complete': return concat_columns(blocks, spec), outcome
+        cache.store(sub, gap_start, gap_end, block)
+    return concat_columns(blocks, spec), 'complete'
+
+
+def concat_columns(blocks, spec):
+    """여러 {컬럼: 배열} 블록을 시간순으로 합친다."""
+    if not blocks:
+        return ColumnBuffer(*result_columns(spec), capacity=1).view()
+    if len(blocks) == 1: return blocks[0]
+    merged = {c: np.concatenate([b[c] for b in blocks]) for c in blocks[0]}
+    order = np.argsort(merged['datetime'], kind='stable')
+    return {c: v[order] for c, v in merged.items()}
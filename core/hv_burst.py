@@ -0,0 +1,81 @@
+# core/hv_burst.py (HV 버스트 캡처: 선택 채널의 고속 IMon/VMon 샘플 링 버퍼와 파일 저장)
+
+import re
+import numpy as np
+
+# 버스트 동안 읽는 파라미터. 한 샘플 = 선택한 모든 채널의 IMon 과 VMon 한 번씩.
+BURST_PARAMS = ('IMon', 'VMon')
+
+
+def parse_channel_spec(text):
+    """
+    "1:0-3 4:7,9" 형식(슬롯:채널 목록, 공백으로 구분)을 [(slot, channel)] 로 바꾼다.
+    채널 목록은 쉼표와 범위(a-b)를 쓸 수 있다. 형식이 틀리면 ValueError.
+    """
+    pairs = []
+    for item in text.split():
+        m = re.fullmatch(r'S?(\d+):([\d,\-]+)', item.strip(), re.IGNORECASE)
+        if not m: raise ValueError(f"'{item}' is not <slot>:<channels> (e.g. 1:0-3)")
+        slot = int(m.group(1))
+        for part in filter(None, m.group(2).split(',')):
+            lo, _, hi = part.partition('-')
+            lo, hi = int(lo), int(hi or lo)
+            if hi < lo: raise ValueError(f"'{part}' is an empty channel range")
+            pairs.extend((slot, ch) for ch in range(lo, hi + 1))
+    return sorted(set(pairs))
+
+
+class BurstBuffer:
+    """
+    [버스트 링 버퍼]
+    버스트 하나의 채널 목록 [(crate, slot, channel)] 과 (샘플 수 × (1 + 채널 수 × 2)) 배열을 갖는다.
+    열 0 은 epoch 초, 채널 j 의 VMon/IMon 은 1 + 2j, 2 + 2j 열이다 (StateStore 의 HV 그래프 배열과 같은 배치).
+    용량이 차면 가장 오래된 샘플부터 덮어쓰므로 긴 버스트도 메모리가 늘지 않는다.
+    """
+    def __init__(self, channels, capacity=20000):
+        self.channels = list(channels)
+        self.capacity = int(capacity)
+        self.data = np.full((self.capacity, 1 + 2 * len(self.channels)), np.nan)
+        self.ptr = 0
+        self.count = 0
+
+    def append(self, ts, imon, vmon):
+        """샘플 블록(ts: (n,), imon/vmon: (n × 채널 수))을 한 번에 넣는다."""
+        ts = np.asarray(ts, dtype=np.float64)
+        n = len(ts)
+        if n == 0: return
+        block = np.empty((n, self.data.shape[1]))
+        block[:, 0] = ts
+        block[:, 1::2] = vmon
+        block[:, 2::2] = imon
+        if n >= self.capacity:
+            block, n = block[-self.capacity:], self.capacity
+        # [핵심] 끝을 넘는 부분은 앞으로 감아 두 번의 슬라이스 복사로 끝낸다.
+        first = min(n, self.capacity - self.ptr)
+        self.data[self.ptr:self.ptr + first] = block[:first]
+        self.data[:n - first] = block[first:]
+        self.ptr = (self.ptr + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def samples(self):
+        """시간순으로 펼친 (샘플 수 × 열) 배열."""
+        if self.count < self.capacity: return self.data[:self.count]
+        return np.concatenate((self.data[self.ptr:], self.data[:self.ptr]), axis=0)
+
+    def column_names(self, label=None):
+        label = label or (lambda crate, slot, ch: f"S{slot}CH{ch}")
+        names = ['time']
+        for crate, slot, ch in self.channels:
+            names += [f"{label(crate, slot, ch)}_VMon", f"{label(crate, slot, ch)}_IMon"]
+        return names
+
+    def save(self, path, label=None):
+        """확장자에 따라 CSV 또는 NPZ 로 저장하고 저장한 샘플 수를 돌려준다."""
+        samples = self.samples()
+        names = self.column_names(label)
+        if path.lower().endswith('.npz'):
+            np.savez_compressed(path, time=samples[:, 0], channels=np.array(self.channels, dtype=np.int16),
+                                vmon=samples[:, 1::2], imon=samples[:, 2::2])
+        else:
+            np.savetxt(path, samples, delimiter=',', header=','.join(names), comments='', fmt='%.6f')
+        return len(samples)
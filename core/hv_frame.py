@@ -0,0 +1,98 @@
+# core/hv_frame.py
+
+import numpy as np
+
+# 프레임 값 행렬의 열 순서
+HV_FIELDS = ('Pw', 'VMon', 'IMon', 'V0Set', 'I0Set', 'Status')
+# 기본 불감대: 화면 표시 해상도(VMon 0.1 V, IMon 0.01 uA)의 절반. 나머지 파라미터는 값이 바뀌면 곧바로 변경이다.
+DEFAULT_DEADBANDS = {'VMon': 0.05, 'IMon': 0.005}
+
+
+def field_index(name):
+    return HV_FIELDS.index(name)
+
+
+class HVFrameEncoder:
+    """
+    [HV 델타 프레임 인코더]
+    채널 하나가 한 행인 (채널 수 × 파라미터 수) 값 행렬을 지식망으로 보낼 프레임으로 만든다.
+    직전에 보낸 값(수신 측이 알고 있는 값)과 비교해 파라미터별 불감대를 넘은 채널을 changed 로 표시하며,
+    delta_only 이면 바뀐 행만 싣는다. keyframe_every 프레임마다(그리고 첫 프레임은) 전체 행을 싣는
+    키프레임을 보내므로 늦게 구독한 쪽도 곧 전체 상태를 갖게 된다.
+
+    프레임: {'seq', 'keyframe', 'fields', 'crate', 'slot', 'channel' (전체 배치), 'index' (실린 행 번호),
+             'values' (실린 행의 값), 'changed' (실린 행별 변경 여부), 'board_temps' {(crate, slot): 온도}}
+    """
+    def __init__(self, slots, channels, deadbands=None, delta_only=False, keyframe_every=60, crates=None):
+        self.crate = np.asarray(crates if crates is not None else np.zeros(len(slots)), dtype=np.int16)
+        self.slot = np.asarray(slots, dtype=np.int16)
+        self.channel = np.asarray(channels, dtype=np.int16)
+        bands = dict(DEFAULT_DEADBANDS, **(deadbands or {}))
+        self.deadband = np.array([bands.get(f, 0.0) for f in HV_FIELDS], dtype=np.float64)
+        self.delta_only = delta_only
+        self.keyframe_every = max(int(keyframe_every), 1)
+        self.reference = np.full((len(self.slot), len(HV_FIELDS)), np.nan)
+        self.seq = 0
+
+    def encode(self, values, board_temps):
+        values = np.asarray(values, dtype=np.float64)
+        ref = self.reference
+        # [핵심] NaN 여부가 바뀐 경우도 변경으로 본다 (값이 처음 들어오거나 읽기가 끊긴 채널).
+        with np.errstate(invalid='ignore'):
+            moved = np.abs(values - ref) > self.deadband
+        moved |= np.isnan(values) != np.isnan(ref)
+        changed = moved.any(axis=1)
+
+        keyframe = self.seq % self.keyframe_every == 0
+        # 기준값은 변경으로 알린 행만 옮긴다. 그래야 불감대보다 느린 드리프트도 누적되어 결국 변경으로 잡힌다.
+        if keyframe: ref[:] = values
+        else: ref[changed] = values[changed]
+        index = np.flatnonzero(changed) if self.delta_only and not keyframe else np.arange(len(values))
+        frame = {
+            'seq': self.seq, 'keyframe': keyframe, 'fields': HV_FIELDS,
+            'crate': self.crate, 'slot': self.slot, 'channel': self.channel,
+            'index': index, 'values': values[index], 'changed': changed[index],
+            'board_temps': dict(board_temps),
+        }
+        self.seq += 1
+        return frame
+
+
+class HVMirror:
+    """
+    수신 측의 전체 HV 상태 사본. 프레임을 적용하면 실린 행만 갱신하고, 이번에 바뀐 행 번호를 돌려준다
+    (키프레임은 실린 모든 행). 키프레임을 한 번도 받지 못한 동안 values 의 나머지 행은 NaN 이다.
+    """
+    def __init__(self):
+        self.crate = self.slot = self.channel = None
+        self.values = None
+        self.board_temps = {}
+        self.has_keyframe = False
+
+    def apply(self, frame):
+        if self.values is None or len(self.values) != len(frame['slot']):
+            self.crate, self.slot, self.channel = frame['crate'], frame['slot'], frame['channel']
+            self.values = np.full((len(self.slot), len(frame['fields'])), np.nan)
+        index = frame['index']
+        self.values[index] = frame['values']
+        self.board_temps.update(frame['board_temps'])
+        if frame['keyframe']:
+            self.has_keyframe = True
+            return index
+        return index[frame['changed']]
+
+    def column(self, name):
+        return self.values[:, field_index(name)]
+
+    def board_rows(self, crate, slot):
+        """한 보드(crate, slot)에 속한 행 번호."""
+        return np.flatnonzero((self.crate == crate) & (self.slot == slot))
+
+
+def row_params(fields, row):
+    """프레임의 한 행을 {파라미터: 값} 로 바꾼다 (위젯 갱신용). 값이 없는(NaN) 파라미터는 뺀다."""
+    params = {}
+    for name, value in zip(fields, row):
+        if np.isnan(value): continue
+        params[name] = int(value) if name in ('Pw', 'Status') else float(value)
+    return params
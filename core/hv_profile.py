@@ -0,0 +1,131 @@
+# core/hv_profile.py (HV 셋포인트 프로파일: 채널별 이득 맞춤 전압 등의 저장/불러오기와 일괄 적용 계획)
+
+import os
+import csv
+import json
+import numpy as np
+
+# 적용 순서. 상한(SVMax)과 전류 한계를 먼저 두고 V0Set 은 마지막에 써서, 램프가 새 한계 안에서 시작되게 한다.
+PROFILE_PARAMS = ('SVMax', 'I0Set', 'Trip', 'RUp', 'RDWn', 'V0Set')
+# 보드 모델별 출력 한계 (V, uA). crate_map 항목의 'vmax'/'imax' 가 있으면 그 값을 쓴다.
+BOARD_LIMITS = {
+    'A7030P': {'vmax': 3000.0, 'imax': 1000.0},
+    'A7435SN': {'vmax': 3500.0, 'imax': 3000.0},
+}
+# 파라미터별로 비교할 보드 한계
+_LIMIT_OF = {'V0Set': 'vmax', 'SVMax': 'vmax', 'I0Set': 'imax'}
+
+
+def load_profile(path, crate_map=None):
+    """
+    프로파일 파일을 {slot: {channel: {param: value}}} 로 읽는다.
+    - JSON: {"name": ..., "setpoints": {"<slot>": {"<channel>": {"V0Set": 1450.0, ...}}}}
+    - CSV : slot,channel,V0Set[,I0Set,...] 헤더를 갖는 행. 빈 칸은 그 파라미터를 바꾸지 않는다.
+    crate_map 을 주면 보드 구성과 한계값까지 검사한다 (validate_profile).
+    """
+    if path.lower().endswith('.csv'):
+        setpoints = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    slot, channel = int(row.pop('slot')), int(row.pop('channel'))
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError(f"{os.path.basename(path)} line {line}: slot/channel is missing or not an integer")
+                params = {k.strip(): v for k, v in row.items() if k and v not in (None, '')}
+                setpoints.setdefault(slot, {})[channel] = params
+    else:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        raw = data.get('setpoints', data)
+        setpoints = {int(slot): {int(ch): dict(params) for ch, params in chans.items()} for slot, chans in raw.items()}
+    return validate_profile(setpoints, crate_map)
+
+
+def board_limits(board):
+    """crate_map 의 보드 항목 하나의 출력 한계 {'vmax': V, 'imax': uA}. 모르는 모델이면 빈 dict."""
+    limits = dict(BOARD_LIMITS.get(board.get('model'), {}))
+    for key in ('vmax', 'imax'):
+        if key in board: limits[key] = float(board[key])
+    return limits
+
+
+def validate_profile(setpoints, crate_map=None):
+    """
+    파라미터 이름과 값을 검사하고 값을 float 로 맞춘다. 잘못된 항목이 있으면 ValueError.
+    crate_map({slot: 보드 설정}) 을 주면 하드웨어에 쓰기 전에 슬롯/채널이 구성에 있는지와
+    V0Set/SVMax, I0Set 이 보드 모델의 한계를 넘지 않는지도 확인한다.
+    """
+    boards = {int(slot): board for slot, board in crate_map.items()} if crate_map is not None else None
+    clean = {}
+    for slot, chans in setpoints.items():
+        if boards is not None and int(slot) not in boards:
+            raise ValueError(f"Slot {slot} is not in crate_map")
+        limits = board_limits(boards[int(slot)]) if boards is not None else {}
+        for ch, params in chans.items():
+            if boards is not None and not 0 <= int(ch) < boards[int(slot)].get('channels', 0):
+                raise ValueError(f"S{slot}C{ch}: slot {slot} has only {boards[int(slot)].get('channels', 0)} channels")
+            for param, value in params.items():
+                if param not in PROFILE_PARAMS:
+                    raise ValueError(f"S{slot}C{ch}: '{param}' cannot be set from a profile (allowed: {', '.join(PROFILE_PARAMS)})")
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"S{slot}C{ch}: {param}={value!r} is not a number")
+                if not np.isfinite(value) or value < 0:
+                    raise ValueError(f"S{slot}C{ch}: {param}={value} is out of range")
+                limit = limits.get(_LIMIT_OF.get(param))
+                if limit is not None and value > limit:
+                    raise ValueError(f"S{slot}C{ch}: {param}={value} exceeds the {boards[int(slot)].get('model')} limit {limit}")
+                clean.setdefault(int(slot), {}).setdefault(int(ch), {})[param] = value
+    return clean
+
+
+def save_profile(path, setpoints, name=None):
+    """프로파일을 확장자에 따라 JSON 또는 CSV 로 저장한다."""
+    if path.lower().endswith('.csv'):
+        params = [p for p in PROFILE_PARAMS if any(p in ps for chans in setpoints.values() for ps in chans.values())]
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['slot', 'channel'] + params)
+            for slot in sorted(setpoints):
+                for ch in sorted(setpoints[slot]):
+                    writer.writerow([slot, ch] + [setpoints[slot][ch].get(p, '') for p in params])
+    else:
+        data = {'name': name or os.path.splitext(os.path.basename(path))[0],
+                'setpoints': {str(s): {str(c): ps for c, ps in sorted(chans.items())} for s, chans in sorted(setpoints.items())}}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+
+def profile_from_mirror(mirror, params=('V0Set', 'I0Set'), crate=0):
+    """현재 HV 상태 사본(HVMirror)에서 한 크레이트의 셋포인트를 프로파일로 만든다. 값이 없는(NaN) 채널은 뺀다."""
+    setpoints = {}
+    if mirror.values is None: return setpoints
+    columns = {p: mirror.column(p) for p in params}
+    for i in np.flatnonzero(mirror.crate == crate).tolist():
+        slot, ch = int(mirror.slot[i]), int(mirror.channel[i])
+        row = {p: round(float(col[i]), 2) for p, col in columns.items() if not np.isnan(col[i])}
+        if row: setpoints.setdefault(slot, {})[ch] = row
+    return setpoints
+
+
+def group_setpoints(setpoints):
+    """
+    [일괄 적용 계획]
+    슬롯마다 (param, value, [channels]) 호출 목록을 만든다. 같은 값을 갖는 채널은 한 번의 다채널
+    set_ch_param 으로 묶고, 파라미터는 PROFILE_PARAMS 순서로 둔다. 값은 0.01 단위로 맞춰 묶는다.
+    """
+    plan = {}
+    for slot in sorted(setpoints):
+        calls = []
+        for param in PROFILE_PARAMS:
+            groups = {}
+            for ch, params in sorted(setpoints[slot].items()):
+                if param in params: groups.setdefault(round(params[param], 2), []).append(ch)
+            calls.extend((param, value, chans) for value, chans in sorted(groups.items()))
+        if calls: plan[slot] = calls
+    return plan
+
+
+def channel_count(setpoints):
+    return sum(len(chans) for chans in setpoints.values())
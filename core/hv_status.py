@@ -0,0 +1,86 @@
+# core/hv_status.py (CAEN 채널 Status 비트 해석: 채널 벡터 단위 플래그 배열과 전이 이벤트)
+
+import numpy as np
+
+# 시스템 계열별 채널 상태(CHSTATUS) 비트 (test_board.py 의 _ChStatus* 정의와 같다)
+_COMMON = {'ON': 0x0001, 'RAMP_UP': 0x0002, 'RAMP_DOWN': 0x0004, 'OVERCURRENT': 0x0008,
+           'OVERVOLTAGE': 0x0010, 'UNDERVOLTAGE': 0x0020}
+_SY4527 = dict(_COMMON, EXT_TRIP=0x0040, MAX_V=0x0080, EXT_DISABLE=0x0100, INT_TRIP=0x0200, CAL_ERROR=0x0400,
+               UNPLUGGED=0x0800, UNC=0x1000, OVV_PROT=0x2000, PWR_FAIL=0x4000, TEMP_FAIL=0x8000)
+_N1470 = dict(_COMMON, MAX_V=0x0040, TRIPPED=0x0080, OVP=0x0100, OVT=0x0200, DISABLED=0x0400, KILL=0x0800,
+              INTERLOCK=0x1000, CAL_ERROR=0x2000)
+_V65XX = dict(_COMMON, I_MAX=0x0040, MAX_V=0x0080, TRIPPED=0x0100, OVP=0x0200, OVT=0x0400, DISABLED=0x0800,
+              INTERLOCK=0x1000, UNCAL=0x2000)
+_DT55XXE = dict(_COMMON, MAX_V=0x0040, TRIPPED=0x0080, MAX_POWER=0x0100, TEMP_WARN=0x0200, DISABLED=0x0400,
+                KILL=0x0800, INTERLOCK=0x1000, CAL_ERROR=0x2000)
+_SMARTHV = dict(_COMMON, TRIPPED=0x0040, OVP=0x0080, TEMP_WARN=0x0100, OVT=0x0200, KILL=0x0400, INTERLOCK=0x0800,
+                DISABLED=0x1000, COMM_FAIL=0x2000, LOCK=0x4000, MAX_V=0x8000, CAL_ERROR=0x10000)
+
+CHANNEL_STATUS_BITS = {
+    'SY4527': _SY4527, 'SY5527': _SY4527, 'SY2527': _SY4527, 'SY1527': _SY4527, 'SIMULATOR': _SY4527,
+    'N1470': _N1470, 'V65XX': _V65XX, 'DT55XXE': _DT55XXE, 'SMARTHV': _SMARTHV,
+}
+# 트립으로 보는 비트. 'TRIP' 은 이 비트들의 합성 플래그이다.
+_TRIP_BITS = ('EXT_TRIP', 'INT_TRIP', 'TRIPPED')
+TRIP_MASKS = {system: sum(bits.get(b, 0) for b in _TRIP_BITS) for system, bits in CHANNEL_STATUS_BITS.items()}
+
+# 운전 중 늘 바뀌는 플래그. 나머지(TRIP, 과전류 등)는 경보로 다룬다. 개별 트립 비트는 합성 TRIP 으로 알린다.
+ROUTINE_FLAGS = ('ON', 'RAMP_UP', 'RAMP_DOWN')
+
+
+class StatusDecoder:
+    """
+    [Status 비트 해석기]
+    채널별 Status 정수 벡터를 (채널 수 × 플래그 수) bool 배열로 바꾼다. 비트마다 AND 한 번이므로
+    채널 수와 무관하게 NumPy 연산 한 번이다. flags 의 마지막 열은 합성 플래그 'TRIP' 이다.
+    """
+    def __init__(self, system_type):
+        bits = CHANNEL_STATUS_BITS.get(system_type, _SY4527)
+        self.flags = tuple(bits) + ('TRIP',)
+        self.masks = np.array(list(bits.values()) + [sum(bits.get(b, 0) for b in _TRIP_BITS)], dtype=np.int64)
+        self.alarm = np.array([f not in ROUTINE_FLAGS and f not in _TRIP_BITS for f in self.flags])
+
+    def decode(self, status):
+        status = np.asarray(status)
+        if status.dtype.kind == 'f': status = np.nan_to_num(status, nan=0.0)
+        return (status.astype(np.int64)[:, None] & self.masks) != 0
+
+    def index(self, flag):
+        return self.flags.index(flag)
+
+    def names(self, row_flags):
+        """한 채널의 bool 플래그 행을 켜진 플래그 이름 목록으로 바꾼다 (표시용)."""
+        return [self.flags[i] for i in np.flatnonzero(row_flags)]
+
+
+class StatusTracker:
+    """
+    채널 배치(slot, channel 배열)의 직전 플래그를 기억하고, 새 Status 벡터와 XOR 해 바뀐 (채널, 플래그)만
+    이벤트로 돌려준다. 이벤트: {'ts', 'crate', 'slot', 'channel', 'flag', 'set' (켜짐/꺼짐), 'alarm'}.
+    값이 없는(NaN) 채널은 건너뛰며, 채널의 첫 값은 기준으로만 쓴다.
+    """
+    def __init__(self, system_type, slots, channels, crate=0):
+        self.decoder = StatusDecoder(system_type)
+        self.crate = int(crate)
+        self.slot = np.asarray(slots)
+        self.channel = np.asarray(channels)
+        self.flags = np.zeros((len(self.slot), len(self.decoder.flags)), dtype=bool)
+        self.seen = np.zeros(len(self.slot), dtype=bool)
+
+    def update(self, status, ts):
+        status = np.asarray(status, dtype=np.float64)
+        valid = ~np.isnan(status)
+        flags = self.decoder.decode(status)
+        # [핵심] 이번에 값이 있고 이전에도 본 채널에서 달라진 비트만 전이로 본다.
+        changed = (flags != self.flags) & (valid & self.seen)[:, None]
+        rows, cols = np.nonzero(changed)
+        self.flags[valid] = flags[valid]
+        self.seen |= valid
+        names, alarm = self.decoder.flags, self.decoder.alarm
+        return [{'ts': ts, 'crate': self.crate, 'slot': int(self.slot[r]), 'channel': int(self.channel[r]), 'flag': names[c],
+                 'set': bool(flags[r, c]), 'alarm': bool(alarm[c])} for r, c in zip(rows.tolist(), cols.tolist())]
+
+    def active_counts(self):
+        """경보 플래그별 현재 켜진 채널 수 (지표용)."""
+        counts = self.flags[self.seen].sum(axis=0)
+        return {f: int(n) for f, n, a in zip(self.decoder.flags, counts, self.decoder.alarm) if a}
@@ -0,0 +1,75 @@
+# core/metrics_server.py
+
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PyQt6.QtCore import QObject, pyqtSlot
+from core.event_bus import global_bus
+
+class MetricsServer(QObject):
+    """
+    [내부 지표 엔드포인트]
+    지식망의 metrics_updated 이벤트를 구독하여 최신 스냅샷을 보관하고,
+    데몬 스레드의 HTTP 서버가 Prometheus 텍스트 형식(/metrics)으로 노출한다.
+    수치 값은 게이지 한 줄로, {라벨: 수치} 딕셔너리는 라벨이 붙은 여러 줄로 변환된다.
+    """
+    def __init__(self, metrics_config):
+        super().__init__()
+        self.config = metrics_config
+        self.prefix = metrics_config.get('prefix', 'rene_pm')
+        self._snapshot = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+        global_bus.metrics_updated.connect(self._on_metrics_updated)
+
+    @pyqtSlot(str, dict)
+    def _on_metrics_updated(self, source, metrics):
+        with self._lock:
+            self._snapshot[source] = dict(metrics)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            snapshot = {k: dict(v) for k, v in self._snapshot.items()}
+        for source, metrics in sorted(snapshot.items()):
+            for key, value in sorted(metrics.items()):
+                name = f"{self.prefix}_{source}_{key}"
+                if isinstance(value, dict):
+                    label = 'table' if source == 'database' else 'key'
+                    for sub_key, sub_val in sorted(value.items(), key=lambda kv: str(kv[0])):
+                        if isinstance(sub_val, (bool, int, float)):
+                            lines.append(f'{name}{{{label}="{sub_key}"}} {float(sub_val)}')
+                elif isinstance(value, (bool, int, float)):
+                    lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        server = self
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('/metrics', ''):
+                    self.send_error(404); return
+                body = server.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, fmt, *args): pass
+
+        bind = self.config.get('bind', '127.0.0.1')
+        port = self.config.get('port', 9108)
+        try:
+            self._httpd = ThreadingHTTPServer((bind, port), _Handler)
+        except OSError as e:
+            logging.error(f"Failed to start metrics endpoint on {bind}:{port}: {e}")
+            return False
+        threading.Thread(target=self._httpd.serve_forever, name="MetricsHTTP", daemon=True).start()
+        logging.info(f"Metrics endpoint listening on http://{bind}:{port}/metrics")
+        return True
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
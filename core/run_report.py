@@ -0,0 +1,224 @@
+# core/run_report.py
+
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+from core.app_config import connect_db, hv_mainframes, hv_board_label
+from core.archive_store import ArchiveReader
+from core.history_query import make_spec, fetch_chunked, compute_bucket_seconds
+from core.correlation import split_series, align_streams, regress
+from core.static_plot import render_png, to_epoch
+from core.db_schema import to_float_array
+from core.hv_status import TRIP_MASKS
+
+# 보고서에 포함할 센서 테이블: 테이블 -> (설정 키, 시계열 키, 컬럼)
+REPORT_TABLES = {
+    'LS_DATA': ('daq', [], ['RTD_1', 'RTD_2', 'DIST_1', 'DIST_2']),
+    'TH_O2_DATA': ('th_o2', [], ['temperature', 'humidity', 'oxygen']),
+    'RADON_DATA': ('radon', [], ['mu']),
+    'MAGNETOMETER_DATA': ('magnetometer', [], ['Bx', 'By', 'Bz', 'B_mag']),
+    'ARDUINO_DATA': ('arduino', [], ['analog_1', 'analog_2', 'analog_3', 'analog_4', 'analog_5']),
+    'UPS_DATA': ('ups', [], ['linev', 'bcharge', 'timeleft']),
+    'PDU_DATA': ('netio_pdu', ['port_idx'], ['power_w', 'current_ma', 'energy_wh']),
+    'VOC_DATA': ('voc_detector', [], ['concentration']),
+}
+
+
+def report_tasks(config, tables=None):
+    """
+    보고서 작업 목록. 센서 테이블은 테이블 하나, HV 는 보드 (crate, slot) 하나가 작업 하나이다.
+    tables 를 주지 않으면 설정에서 활성화된 장치만 포함한다.
+    """
+    tasks = []
+    for table, (key, _, _) in REPORT_TABLES.items():
+        if (table in tables) if tables else config.get(key, {}).get('enabled'):
+            tasks.append({'name': table, 'table': table})
+    hv = config.get('caen_hv', {})
+    if ('HV_DATA' in tables) if tables else hv.get('enabled'):
+        mainframes = hv_mainframes(hv)
+        for mf in mainframes:
+            for slot_str, info in mf.get('crate_map', {}).items():
+                crate, slot = mf['crate'], int(slot_str)
+                board = hv_board_label(hv, crate, slot)
+                # 크레이트가 하나면 crate 조건을 넣지 않는다 (crate 컬럼이 없는 이전 DB 도 그대로 읽는다).
+                filters = {'crate': crate, 'slot': slot} if len(mainframes) > 1 else {'slot': slot}
+                tasks.append({'name': f"HV Slot {board}", 'table': 'HV_DATA', 'crate': crate, 'slot': slot, 'board': board,
+                              'filters': filters, 'system_type': mf.get('system_type', 'SY4527'),
+                              'description': info.get('description', '')})
+    return tasks
+
+
+def run_task(config, task, start, end, out_dir):
+    """
+    [보고서 작업 (작업 프로세스에서 실행)]
+    자체 읽기 커넥션으로 원본 행을 받아 통계/드리프트/트립을 계산하고, 버킷 집계(Rollup)로 PNG 추세 그래프를 그린다.
+    결과는 부모 프로세스로 보낼 수 있는 단순 dict 이다. 실패해도 예외 대신 'error' 를 담아 돌려준다.
+    """
+    conn = None
+    try:
+        conn = connect_db(config['database'], read_only=True)
+        archive_cfg = config.get('archive', {})
+        reader = ArchiveReader(archive_cfg['directory']) if archive_cfg.get('enabled') else None
+        report_cfg = config.get('report', {})
+        ctx = {'conn': conn, 'reader': reader, 'start': start, 'end': end, 'out_dir': out_dir,
+               'chunk_rows': config.get('analysis', {}).get('fetch_chunk_rows', 20000),
+               'plot_points': report_cfg.get('plot_points', 1500)}
+        if task['table'] == 'HV_DATA':
+            mask = TRIP_MASKS.get(task.get('system_type', config.get('caen_hv', {}).get('system_type', 'SY4527')), 0x0240)
+            return _hv_report(ctx, task, mask)
+        return _sensor_report(ctx, task)
+    except Exception as e:
+        logging.error(f"Report task '{task['name']}' failed: {e}")
+        return {'name': task['name'], 'error': str(e)}
+    finally:
+        if conn: conn.close()
+
+
+def _fetch(ctx, spec):
+    buffer, _ = fetch_chunked(ctx['conn'], spec, ctx['reader'], ctx['chunk_rows'])
+    return buffer.view()
+
+
+def _rollup(ctx, spec):
+    """그래프용 버킷 집계 결과. 기간이 짧아 원본 주기로 충분하면 원본 행을 그대로 쓴다."""
+    bucket = compute_bucket_seconds(ctx['start'], ctx['end'], ctx['plot_points'], spec['table'])
+    return _fetch(ctx, dict(spec, bucket_s=bucket)), bucket
+
+
+def _stats(y):
+    y = to_float_array(y, np.float64)
+    finite = y[np.isfinite(y)]
+    if len(finite) == 0: return {'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None, 'first': None, 'last': None}
+    return {'count': int(len(finite)), 'mean': float(finite.mean()), 'std': float(finite.std()),
+            'min': float(finite.min()), 'max': float(finite.max()), 'first': float(finite[0]), 'last': float(finite[-1])}
+
+
+def _series_model(cols, keys, column, label_fn):
+    """HistoryViewer/render_png 의 시계열 모델. 버킷 집계 결과면 최소/최대 띠도 함께 싣는다."""
+    series = []
+    for key, t, y in split_series(cols, keys, column):
+        series.append({'name': label_fn(key), 'x': to_epoch(t), 'y': to_float_array(y), 'lo': None, 'hi': None})
+    if f"{column}_min" in cols:
+        # split_series 와 같은 순서로 최소/최대 구간을 다시 나눈다.
+        for s, (_, _, lo), (_, _, hi) in zip(series, split_series(cols, keys, f"{column}_min"), split_series(cols, keys, f"{column}_max")):
+            s['lo'], s['hi'] = lo, hi
+    return series
+
+
+def _render(ctx, model, filename):
+    path = os.path.join(ctx['out_dir'], filename)
+    try:
+        render_png(model, path)
+        return filename
+    except Exception as e:
+        logging.warning(f"Could not render {filename}: {e}")
+        return None
+
+
+def _sensor_report(ctx, task):
+    table = task['table']
+    _, keys, columns = REPORT_TABLES[table]
+    spec = make_spec(table, columns, ctx['start'], ctx['end'], series=keys)
+    raw = _fetch(ctx, spec)
+    label = (lambda k: f"{keys[0]} {k}") if keys else (lambda k: table)
+
+    stats = []
+    for column in columns:
+        for key, _, y in split_series(raw, keys, column):
+            stats.append(dict({'table': table, 'series': label(key), 'column': column}, **_stats(y)))
+
+    rollup, bucket = _rollup(ctx, spec)
+    plots = [{'title': c, 'y_label': c, 'series': _series_model(rollup, keys, c, label)} for c in columns]
+    model = {'kind': 'timeseries', 'title': f"{table} ({ctx['start']} ~ {ctx['end']})", 'plots': plots}
+    png = _render(ctx, model, f"{table.lower()}.png") if len(rollup['datetime']) else None
+    return {'name': task['name'], 'rows': int(len(raw['datetime'])), 'bucket_s': bucket, 'stats': stats, 'plots': [png] if png else []}
+
+
+def _hv_report(ctx, task, trip_mask):
+    crate, slot = task.get('crate', 0), task['slot']
+    board, filters = task.get('board', f"S{slot}"), task.get('filters', {'slot': slot})
+    spec = make_spec('HV_DATA', ['vmon', 'imon', 'status'], ctx['start'], ctx['end'], series=['channel'], filters=filters)
+    raw = _fetch(ctx, spec)
+
+    # [핵심] 트립 = 채널별 시간순으로 트립 비트가 0 에서 1 로 바뀐 횟수. 파이썬 루프 없이 한 번에 센다.
+    order = np.lexsort((raw['datetime'], raw['channel']))
+    channel, status = raw['channel'][order], raw['status'][order]
+    tripped = (status >= 0) & ((status & trip_mask) != 0)
+    rising = np.zeros(len(order), dtype=bool)
+    rising[1:] = tripped[1:] & ~tripped[:-1] & (channel[1:] == channel[:-1])
+    trip_channels, trip_counts = np.unique(channel[rising], return_counts=True)
+    trips = dict(zip(trip_channels.tolist(), trip_counts.tolist()))
+
+    rows = {}
+    for column in ('vmon', 'imon'):
+        for ch, _, y in split_series(raw, ['channel'], column):
+            st = _stats(y)
+            row = rows.setdefault(ch, {'crate': crate, 'slot': slot, 'board': board, 'channel': ch, 'trips': trips.get(ch, 0)})
+            row.update({f"{column}_{k}": v for k, v in st.items() if k != 'count'})
+            row['samples'] = st['count']
+
+    # 드리프트: 버킷 평균을 공통 격자에 맞춰 채널 전체의 기울기(V/일)를 한 번의 회귀로 구한다.
+    rollup_spec = make_spec('HV_DATA', ['vmon', 'imon'], ctx['start'], ctx['end'], series=['channel'], filters=filters)
+    rollup, bucket = _rollup(ctx, rollup_spec)
+    vmon = split_series(rollup, ['channel'], 'vmon')
+    if vmon:
+        grid, M = align_streams([(t, y) for _, t, y in vmon], bucket or 60)
+        days = (grid - grid[0]).astype('timedelta64[s]').astype(np.float64)[:, None] / 86400.0
+        fit = regress(days, M)
+        has = np.isfinite(M)
+        first = M[has.argmax(axis=0), np.arange(M.shape[1])]
+        last = M[len(M) - 1 - has[::-1].argmax(axis=0), np.arange(M.shape[1])]
+        for j, (ch, _, _) in enumerate(vmon):
+            row = rows.setdefault(ch, {'crate': crate, 'slot': slot, 'board': board, 'channel': ch, 'trips': trips.get(ch, 0)})
+            row['drift_v'] = float(last[j] - first[j]) if has[:, j].any() else None
+            row['slope_v_per_day'] = float(fit['slope'][0, j]) if np.isfinite(fit['slope'][0, j]) else None
+
+    plots = [{'title': "VMon", 'y_label': "Voltage (V)", 'series': _series_model(rollup, ['channel'], 'vmon', lambda ch: f"Ch {ch}")},
+             {'title': "IMon", 'y_label': "Current (uA)", 'series': _series_model(rollup, ['channel'], 'imon', lambda ch: f"Ch {ch}")}]
+    model = {'kind': 'timeseries', 'title': f"HV Slot {board} {task.get('description', '')} ({ctx['start']} ~ {ctx['end']})", 'plots': plots}
+    png_name = f"hv_slot{slot}.png" if 'crate' not in filters else f"hv_crate{crate}_slot{slot}.png"
+    png = _render(ctx, model, png_name) if len(rollup['datetime']) else None
+    return {'name': task['name'], 'rows': int(len(raw['datetime'])), 'bucket_s': bucket, 'crate': crate, 'slot': slot, 'board': board,
+            'trips': int(sum(trips.values())), 'channels': [rows[ch] for ch in sorted(rows)], 'plots': [png] if png else []}
+
+
+def _fmt(v, digits=3):
+    return "-" if v is None else f"{v:.{digits}f}"
+
+
+def write_bundle(results, out_dir, start, end, elapsed_s):
+    """작업 결과를 summary.json, sensor_stats.csv, hv_drift.csv, summary.md 로 묶는다."""
+    stats = [row for r in results for row in r.get('stats', [])]
+    channels = [row for r in results for row in r.get('channels', [])]
+    if stats: pd.DataFrame(stats).to_csv(os.path.join(out_dir, 'sensor_stats.csv'), index=False)
+    if channels: pd.DataFrame(channels).to_csv(os.path.join(out_dir, 'hv_drift.csv'), index=False)
+    with open(os.path.join(out_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump({'start': start, 'end': end, 'elapsed_s': round(elapsed_s, 2), 'results': results}, f, indent=2, ensure_ascii=False)
+
+    lines = ["# RENE-PM Run Summary", "", f"- Period: {start} ~ {end}", f"- Generated in {elapsed_s:.1f} s", ""]
+    errors = [r for r in results if 'error' in r]
+    if errors:
+        lines += ["## Errors", ""] + [f"- {r['name']}: {r['error']}" for r in errors] + [""]
+    if stats:
+        lines += ["## Sensor Statistics", "", "| Table | Series | Column | N | Mean | Std | Min | Max |", "|---|---|---|---|---|---|---|---|"]
+        lines += [f"| {s['table']} | {s['series']} | {s['column']} | {s['count']} | {_fmt(s['mean'])} | {_fmt(s['std'])} | {_fmt(s['min'])} | {_fmt(s['max'])} |"
+                  for s in stats]
+        lines.append("")
+    hv = [r for r in results if 'slot' in r]
+    if hv:
+        lines += ["## HV", "", "| Slot | Channels | Trips | Max abs drift (V) |", "|---|---|---|---|"]
+        for r in hv:
+            drifts = [abs(c['drift_v']) for c in r['channels'] if c.get('drift_v') is not None]
+            lines.append(f"| {r.get('board', r['slot'])} | {len(r['channels'])} | {r['trips']} | {_fmt(max(drifts) if drifts else None, 2)} |")
+        tripped = [c for c in channels if c['trips']]
+        if tripped:
+            lines += ["", "Tripped channels: " + ", ".join(f"{c.get('board', 'S' + str(c['slot']))} Ch{c['channel']} ({c['trips']})" for c in tripped)]
+        lines.append("")
+    plots = [p for r in results for p in r.get('plots', [])]
+    if plots:
+        lines += ["## Trends", ""] + [f"![{p}]({p})" for p in plots]
+    with open(os.path.join(out_dir, 'summary.md'), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
@@ -4,6 +4,9 @@ import time
 import numpy as np
 from PyQt6.QtCore import QObject, pyqtSlot
 from core.event_bus import global_bus
+from core.hv_frame import HVMirror
+from core.app_config import hv_boards
+from core.hv_burst import BurstBuffer
 
 class StateStore(QObject):
     def __init__(self, config):
@@ -17,12 +20,17 @@ class StateStore(QObject):
         self.latest_raw_values = {}
         self.latest_ups_status = {}
         self.latest_board_temps = {}
-        self.latest_hv_values = {}
+        self.hv_mirror = HVMirror()
         self.latest_fire_data = {'status_code': 0, 'is_fire': False, 'is_fault': False, 'msg': 'Wait...'}
         self.latest_voc_data = {'conc': 0.0, 'alarm': 0}
         self.latest_radon_data = {'mu': 0.0, 'sigma': 0.0}
         
-        self.hv_graph_counter = 0  # [핵심] HV 그래프 업데이트 주기용 카운터
+        self.hv_graph_last = 0.0   # [핵심] HV 그래프에 마지막으로 점을 찍은 시각 (1분 간격, 프레임 수와 무관)
+        # 크레이트별 가장 최근 HV 버스트의 고속 샘플 (core.hv_burst.BurstBuffer) 과 진행 상태.
+        # 여러 크레이트에서 동시에 버스트가 돌아도 서로 덮어쓰지 않는다.
+        self.hv_bursts = {}         # crate -> BurstBuffer
+        self.hv_burst_info = {}     # crate -> {'key', 'id', 'crate', 'trigger', 'done', 'rate_hz', 'samples_total'}
+        self.hv_burst_latest = None # 마지막으로 샘플이 들어온 크레이트
 
         self._init_data_arrays()
         global_bus.sensor_data_updated.connect(self._on_sensor_data_updated)
@@ -42,19 +50,19 @@ class StateStore(QObject):
         self.voc_data = np.full((self.m1m_len, 2), np.nan)
         self.flame_data = np.full((self.m1m_len, 2), np.nan)
         
+        # HV 그래프 배열은 보드 (crate, slot) 별로 둔다.
         self.hv_graph_data = {}
         if self.config.get('caen_hv', {}).get("enabled"):
-            for slot_str, board in self.config['caen_hv'].get('crate_map', {}).items():
-                slot = int(slot_str)
+            for crate, _, slot, board in hv_boards(self.config['caen_hv']):
                 channels = board.get('channels', 0)
-                self.hv_graph_data[slot] = np.full((self.m1m_len, 1 + channels * 2), np.nan)
+                self.hv_graph_data[(crate, slot)] = np.full((self.m1m_len, 1 + channels * 2), np.nan)
         
         self.pointers = {
             'daq': 0, 'radon': 0, 'mag': 0, 'th_o2': 0, 'arduino': 0, 
             'ups': 0, 'voc': 0, 'flame': 0, 'hv_graph': {}
         }
-        for slot in self.hv_graph_data.keys():
-            self.pointers['hv_graph'][slot] = 0
+        for board in self.hv_graph_data.keys():
+            self.pointers['hv_graph'][board] = 0
             
         self.max_lens = {
             'daq': self.m1m_len, 'radon': self.m10m_len, 'mag': self.m1m_len, 
@@ -73,9 +81,9 @@ class StateStore(QObject):
         else:
             return np.concatenate((arr[ptr:], arr[:ptr]), axis=0)
 
-    def get_unrolled_hv_data(self, slot):
-        ptr = self.pointers['hv_graph'].get(slot, 0)
-        arr = self.hv_graph_data.get(slot)
+    def get_unrolled_hv_data(self, crate, slot):
+        ptr = self.pointers['hv_graph'].get((crate, slot), 0)
+        arr = self.hv_graph_data.get((crate, slot))
         if arr is None: return None
         if np.isnan(arr[ptr, 0]):
             return arr[:ptr]
@@ -96,6 +104,7 @@ class StateStore(QObject):
         elif sensor_type == 'fire_status': self._update_fire_data(ts, data)
         elif sensor_type == 'voc_status': self._update_voc_data(ts, data)
         elif sensor_type == 'hv_status': self._update_hv_data(ts, data)
+        elif sensor_type == 'hv_burst': self._update_hv_burst(data)
         elif sensor_type == 'raw_data': self.latest_raw_values.update(data)
 
     def _update_daq_data(self, ts, data):
@@ -154,26 +163,41 @@ class StateStore(QObject):
         self.pointers['voc'] = (ptr + 1) % self.max_lens['voc']
         self.plot_dirty_flags["voc_trend_VOC"] = True
 
-    def _update_hv_data(self, ts, data):
-        """[핵심 추가] 최신값 갱신 및 1분마다 그래프 배열(hv_graph_data) 업데이트"""
-        for slot, slot_data in data.get('slots', {}).items():
-            board_temp = slot_data.get('board_temp')
-            self.latest_board_temps[slot] = board_temp
-            for channel, params in slot_data.get('channels', {}).items():
-                self.latest_hv_values[(slot, channel)] = params
-
-        self.hv_graph_counter += 1
-        if self.hv_graph_counter >= 60:
-            current_time = time.time()
-            for (s, c), p in self.latest_hv_values.items():
-                if s in self.hv_graph_data:
-                    ptr = self.pointers['hv_graph'].get(s, 0)
-                    self.hv_graph_data[s][ptr, 0] = current_time
-                    self.hv_graph_data[s][ptr, 1 + c * 2] = p.get('VMon', np.nan)
-                    self.hv_graph_data[s][ptr, 2 + c * 2] = p.get('IMon', np.nan)
+    def _update_hv_data(self, ts, frame):
+        """[핵심 추가] HV 프레임을 최신 상태 사본에 적용하고, 1분마다 그래프 배열(hv_graph_data) 업데이트"""
+        self.hv_mirror.apply(frame)
+        self.latest_board_temps.update(frame['board_temps'])
+
+        current_time = time.time()
+        if current_time - self.hv_graph_last >= 60:
+            self.hv_graph_last = current_time
+            m = self.hv_mirror
+            vmon, imon = m.column('VMon'), m.column('IMon')
+            for board in self.hv_graph_data.keys():
+                rows = m.board_rows(*board)
+                ptr = self.pointers['hv_graph'].get(board, 0)
+                arr = self.hv_graph_data[board]
+                if len(rows):
+                    # 채널 c 의 VMon/IMon 은 1 + 2c, 2 + 2c 열에 있다.
+                    cols = 1 + 2 * m.channel[rows].astype(np.int64)
+                    ok = cols + 1 < arr.shape[1]
+                    arr[ptr, 0] = current_time
+                    arr[ptr, cols[ok]] = vmon[rows[ok]]
+                    arr[ptr, cols[ok] + 1] = imon[rows[ok]]
             
-            for s in self.hv_graph_data.keys():
-                self.pointers['hv_graph'][s] = (self.pointers['hv_graph'].get(s, 0) + 1) % self.max_lens['hv_graph']
-                self.plot_dirty_flags[f"hv_slot_{s}"] = True
-            
-            self.hv_graph_counter = 0
+            for crate, slot in self.hv_graph_data.keys():
+                self.pointers['hv_graph'][(crate, slot)] = (self.pointers['hv_graph'].get((crate, slot), 0) + 1) % self.max_lens['hv_graph']
+                self.plot_dirty_flags[f"hv_slot_{crate}_{slot}"] = True
+
+    def _update_hv_burst(self, chunk):
+        """버스트 chunk 를 그 크레이트의 링 버퍼에 붙인다. 그 크레이트에서 새 버스트(id)가 오면 버퍼를 새로 만든다."""
+        crate = chunk['crate']
+        key = (crate, chunk['id'])
+        if crate not in self.hv_bursts or self.hv_burst_info[crate]['key'] != key:
+            capacity = self.config.get('caen_hv', {}).get('burst', {}).get('capacity', 20000)
+            self.hv_bursts[crate] = BurstBuffer([(crate, s, c) for s, c in chunk['channels']], capacity)
+        self.hv_bursts[crate].append(chunk['ts'], chunk['imon'], chunk['vmon'])
+        self.hv_burst_info[crate] = {'key': key, 'id': chunk['id'], 'crate': crate, 'trigger': chunk['trigger'],
+                                     'done': chunk['done'], 'rate_hz': chunk['rate_hz'], 'samples_total': chunk['samples_total']}
+        self.hv_burst_latest = crate
+        self.plot_dirty_flags['hv_burst'] = True
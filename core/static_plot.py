@@ -0,0 +1,87 @@
+# core/static_plot.py
+
+import time
+import numpy as np
+import pandas as pd
+
+try:
+    from matplotlib.figure import Figure
+except ImportError:
+    Figure = None
+
+
+def _hourly(seconds, offset_fn):
+    """
+    초 배열이 걸친 정시마다 offset_fn(정시 초) 를 한 번씩만 계산해 각 값에 붙인다.
+    서머타임 전환은 정시에 일어나므로 행마다 시간대 변환을 하지 않고도 전환 전후가 맞게 바뀐다.
+    """
+    if seconds.size == 0: return seconds
+    hours = np.floor_divide(seconds, 3600).astype(np.int64)
+    h0 = int(hours.min())
+    offsets = np.array([offset_fn(h * 3600) for h in range(h0, int(hours.max()) + 1)], dtype=np.float64)
+    return seconds + offsets[hours - h0]
+
+
+def to_epoch(values):
+    """DB 의 로컬 시각(naive datetime)을 DateAxisItem 이 쓰는 UNIX 초(float64)로 바꾼다 (서머타임 반영)."""
+    local_s = np.asarray(values, dtype='datetime64[ms]').astype('int64') / 1000.0
+    # 정시의 로컬 벽시계 값을 mktime 으로 해석하면 (isdst=-1) 그 시각의 UTC 차이를 얻는다.
+    return _hourly(local_s, lambda s: time.mktime(time.gmtime(s)[:8] + (-1,)) - s)
+
+
+def from_epoch(x):
+    """to_epoch 의 역변환: UNIX 초를 로컬 시각(naive datetime64)으로 되돌린다."""
+    return pd.to_datetime(_hourly(np.asarray(x, dtype=np.float64), lambda s: time.localtime(s).tm_gmtoff), unit='s')
+
+
+def render_png(model, path):
+    """
+    보고서용 정적 이미지. HistoryViewer 와 같은 모델 형식을 받으며, Qt 없이 동작하므로
+    GUI 의 Export PNG 와 헤드리스 보고서 생성기(report_tool.py)가 함께 쓴다. matplotlib 은 이 경로에서만 사용된다.
+    """
+    if Figure is None:
+        raise RuntimeError("matplotlib is required for PNG export.")
+    if model['kind'] == 'heatmap':
+        values = np.asarray(model['values'], dtype=np.float64)
+        fig = Figure(figsize=(max(8, 0.25 * values.shape[1] + 4), max(6, 0.2 * values.shape[0] + 3)))
+        ax = fig.add_subplot(111)
+        lo, hi = model.get('levels', (np.nanmin(values), np.nanmax(values)))
+        mesh = ax.imshow(values, aspect='auto', cmap='RdBu_r', vmin=lo, vmax=hi, interpolation='nearest')
+        fig.colorbar(mesh, ax=ax, label=model.get('value_label', ''))
+        for setter, labels in ((ax.set_xticks, model['x_labels']), (ax.set_yticks, model['y_labels'])):
+            step = max(len(labels) // 40, 1)
+            setter(np.arange(len(labels))[::step], [str(label) for label in labels][::step])
+        ax.tick_params(axis='x', labelrotation=90)
+        ax.set_xlabel(model.get('x_label', '')); ax.set_ylabel(model.get('y_label', ''))
+    elif model['kind'] == 'scatter':
+        fig = Figure(figsize=(12, 7))
+        ax = fig.add_subplot(111)
+        for g in model['groups']:
+            ax.scatter(g['x'], g['y'], alpha=0.5, s=8, label=g['name'])
+        if model.get('trend') is not None:
+            m, b, r = model['trend']
+            xs = np.concatenate([g['x'] for g in model['groups']])
+            x_line = np.array([np.nanmin(xs), np.nanmax(xs)])
+            ax.plot(x_line, m * x_line + b, color='red', linewidth=2, linestyle='--', label='Overall Trend')
+            ax.text(0.05, 0.95, f'y = {m:.3f}x + {b:.2f}\nr = {r:.3f}', transform=ax.transAxes, fontsize=10,
+                    verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+        ax.set_xlabel(model.get('x_label', '')); ax.set_ylabel(model.get('y_label', ''))
+        ax.grid(True); ax.legend()
+    else:
+        plots = model['plots']
+        fig = Figure(figsize=(15, 4 * len(plots)))
+        axes = fig.subplots(len(plots), 1, sharex=True, squeeze=False)[:, 0]
+        for ax, plot in zip(axes, plots):
+            for s in plot['series']:
+                x = from_epoch(s['x'])
+                line, = ax.plot(x, s['y'], linewidth=1, label=s['name'])
+                if s.get('lo') is not None:
+                    ax.fill_between(x, s['lo'], s['hi'], color=line.get_color(), alpha=0.2, linewidth=0)
+            ax.set_title(plot.get('title') or '')
+            ax.set_ylabel(plot.get('y_label', ''))
+            ax.grid(True)
+            if len(plot['series']) <= 16: ax.legend()
+        fig.autofmt_xdate()
+    fig.suptitle(model.get('title', ''), fontsize=16)
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+    fig.savefig(path, dpi=120)
@@ -5,6 +5,7 @@ import json
 import logging
 from PyQt6.QtCore import QObject, QTimer
 from core.event_bus import global_bus
+from core.app_config import hv_boards
 
 class SafetyExpert(QObject):
     """
@@ -117,11 +118,10 @@ class SafetyExpert(QObject):
         global_bus.safety_status_changed.emit(new_phase, html_msg)
 
     def _trigger_emergency_hv_shutdown(self):
-        crate_map = self.config.get('caen_hv', {}).get('crate_map', {})
-        for slot_str, board_info in crate_map.items():
-            slot = int(slot_str)
+        # 모든 크레이트의 모든 보드를 끈다. 크레이트마다 명령 큐가 따로 있으므로 크레이트끼리 동시에 처리된다.
+        for crate, _, slot, board_info in hv_boards(self.config.get('caen_hv', {})):
             channels = list(range(board_info.get('channels', 0)))
-            command = {'type': 'set_power', 'slot': slot, 'channels': channels, 'value': False}
+            command = {'type': 'set_power', 'crate': crate, 'slot': slot, 'channels': channels, 'value': False, 'priority': 'emergency'}
             global_bus.cmd_hv_control.emit(command)
 
     def _generate_sop_html(self, current_phase):
@@ -2,16 +2,19 @@
 
 import logging
 import time
+import numpy as np
 from PyQt6.QtCore import QObject, QThread, Qt, QMetaObject
 from PyQt6 import sip
 from core.event_bus import global_bus
+from core.hv_frame import HVMirror
+from core.app_config import hv_board_label
 
 from workers.daq_worker import DaqWorker
 from workers.radon_worker import RadonWorker
 from workers.magnetometer_worker import MagnetometerWorker
 from workers.th_o2_worker import ThO2Worker
 from workers.arduino_worker import ArduinoWorker
-from workers.hv_worker import HVWorker
+from workers.hv_scheduler import HVScheduler
 from workers.ups_worker import UPSWorker
 from workers.pdu_worker import PDUWorker
 from workers.fire_worker import FireWorker
@@ -24,9 +27,12 @@ class WorkerManager(QObject):
         self.db_queue = db_queue
         self.threads = {}
         
-        self.hv_db_push_counter = 0
+        self.hv_db_last_push = 0.0   # 마지막으로 HV 행을 DB 에 넣은 시각
+        self.hv_logged_setpoints = None
+        self.hv_mirror = HVMirror()
         
         global_bus.cmd_hv_control.connect(self._forward_hv_cmd)
+        global_bus.cmd_hv_burst.connect(self._forward_hv_burst)
         global_bus.cmd_pdu_control_single.connect(self._forward_pdu_single_cmd)
         global_bus.cmd_pdu_control_all.connect(self._forward_pdu_all_cmd)
         global_bus.cmd_toggle_worker.connect(self.toggle_worker)
@@ -63,7 +69,7 @@ class WorkerManager(QObject):
         if name in self.threads: return
         worker_map = {
             'daq': (DaqWorker, True), 'radon': (RadonWorker, False), 'magnetometer': (MagnetometerWorker, True),
-            'th_o2': (ThO2Worker, False), 'arduino': (ArduinoWorker, False), 'caen_hv': (HVWorker, False), 
+            'th_o2': (ThO2Worker, False), 'arduino': (ArduinoWorker, False), 'caen_hv': (HVScheduler, False), 
             'ups': (UPSWorker, False), 'netio_pdu': (PDUWorker, False), 'fire_detector': (FireWorker, False), 
             'voc_detector': (PidWorker, False)
         }
@@ -84,25 +90,65 @@ class WorkerManager(QObject):
         thread.start()
         self.threads[name] = (thread, worker)
 
-    def _handle_hv_data_ready(self, d):
-        """HV 데이터를 UI와 DB로 라우팅 (1분당 1회 DB Push)"""
+    def _handle_hv_data_ready(self, frame):
+        """HV 프레임을 UI와 DB로 라우팅 (1분당 1회 DB Push, 셋포인트는 변경 시에만 기록)"""
         ts = self._now()
-        global_bus.sensor_data_updated.emit('hv_status', {'ts': ts, 'data': d})
+        global_bus.sensor_data_updated.emit('hv_status', {'ts': ts, 'data': frame})
+        self.hv_mirror.apply(frame)
         
-        self.hv_db_push_counter += 1
-        if self.hv_db_push_counter >= 60:
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-            for slot, slot_data in d.get('slots', {}).items():
-                board_temp = slot_data.get('board_temp', -1.0)
-                for ch, params in slot_data.get('channels', {}).items():
-                    db_tuple = (
-                        timestamp, slot, ch, params.get('Pw', False), 
-                        params.get('VMon', 0.0), params.get('IMon', 0.0), 
-                        params.get('V0Set', 0.0), params.get('I0Set', 0.0), 
-                        params.get('Status', 0), board_temp
-                    )
-                    self.db_queue.put({'type': 'HV', 'data': db_tuple})
-            self.hv_db_push_counter = 0
+        # [핵심] 프레임 수가 아니라 벽시계로 1분을 센다. 이벤트 구독의 급한 프레임이 주기 사이에 끼어도 기록 주기는 그대로다.
+        if ts - self.hv_db_last_push >= 60 and self.hv_mirror.has_keyframe:
+            m = self.hv_mirror
+            # [핵심] 채널 루프 대신 열 단위로 한 번에 변환한다. 읽지 못한 값(NaN)은 0 이 아니라 NULL 로 기록하고,
+            # 모니터 값이 하나도 없는 채널(끊긴 크레이트, 실패한 슬롯)은 행 자체를 쓰지 않는다.
+            pw, vmon, imon, status, v0, i0 = (m.column(f) for f in ('Pw', 'VMon', 'IMon', 'Status', 'V0Set', 'I0Set'))
+            temps = np.array([m.board_temps.get((c, s), -1.0) for c, s in zip(m.crate.tolist(), m.slot.tolist())])
+            read = ~(np.isnan(pw) & np.isnan(vmon) & np.isnan(imon))
+            null = lambda values, cast: [None if v != v else cast(v) for v in values[read].tolist()]
+            hv_rows = list(zip([ts] * int(read.sum()), m.crate[read].tolist(), m.slot[read].tolist(), m.channel[read].tolist(),
+                               null(pw, bool), null(vmon, float), null(imon, float), null(status, int), temps[read].tolist()))
+            # 셋포인트 변경 이력: 두 값을 모두 읽은 채널만 마지막으로 기록한 값과 비교한다. 값이 빠진(NaN) 주기는
+            # 변경으로 보지 않으므로 NaN -> 값 -> NaN 사이에 거짓 0 행이나 되돌림 행이 생기지 않는다.
+            setpoints = np.stack([v0, i0], axis=1)
+            valid = ~np.isnan(setpoints).any(axis=1)
+            if self.hv_logged_setpoints is None or len(self.hv_logged_setpoints) != len(setpoints):
+                self.hv_logged_setpoints = np.full(setpoints.shape, np.nan)
+            logged = self.hv_logged_setpoints
+            moved = valid & (np.isnan(logged).any(axis=1) | np.any(setpoints != logged, axis=1))
+            logged[moved] = setpoints[moved]
+            setpoint_rows = [(ts, int(m.crate[i]), int(m.slot[i]), int(m.channel[i]), float(v0[i]), float(i0[i])) for i in np.flatnonzero(moved)]
+            if hv_rows: self.db_queue.put({'type': 'HV', 'data': hv_rows})
+            if setpoint_rows:
+                self.db_queue.put({'type': 'HV_SETPOINT', 'data': setpoint_rows})
+            self.hv_db_last_push = ts
+
+    def _on_hv_command_completed(self, result):
+        global_bus.hv_command_completed.emit(result)
+        if result.get('priority') == 'emergency':
+            level = "CRITICAL" if not result.get('ok') else "WARNING"
+            outcome = "완료" if result.get('ok') else "실패"
+            global_bus.system_log_message.emit(level, f"[caen_hv] 비상 HV 차단 {outcome}: {self._hv_board(result.get('crate', 0), result.get('slot'))} "
+                                                      f"({result.get('latency_ms', 0.0):.0f} ms, 대기 {result.get('wait_ms', 0.0):.0f} ms)")
+
+    def _on_hv_status_events(self, events):
+        global_bus.hv_status_events.emit(events)
+        # 경보 플래그 전이만 로그로 남긴다. 한 번에 여러 채널이 바뀌면 (플래그, 켜짐/꺼짐) 별로 한 줄로 모은다.
+        grouped = {}
+        for ev in events:
+            if ev['alarm']: grouped.setdefault((ev['flag'], ev['set']), []).append(f"{self._hv_board(ev['crate'], ev['slot'])}CH{ev['channel']}")
+        for (flag, is_set), channels in grouped.items():
+            level = ("CRITICAL" if flag == 'TRIP' else "WARNING") if is_set else "INFO"
+            state = "발생" if is_set else "해제"
+            global_bus.system_log_message.emit(level, f"[caen_hv] {flag} {state}: {', '.join(channels)}")
+
+    def _on_hv_burst_data(self, chunk):
+        global_bus.sensor_data_updated.emit('hv_burst', {'ts': self._now(), 'data': chunk})
+        if chunk['done']:
+            global_bus.system_log_message.emit("INFO", f"[caen_hv] 버스트 #{chunk['id']} ({chunk['trigger']}) 완료: "
+                                                       f"{chunk['samples_total']} 샘플, {chunk['rate_hz']:.1f} Hz")
+
+    def _hv_board(self, crate, slot):
+        return hv_board_label(self.config.get('caen_hv', {}), crate, slot)
 
     def _connect_worker_to_bus(self, name, worker):
         if hasattr(worker, 'error_occurred'):
@@ -113,6 +159,11 @@ class WorkerManager(QObject):
             worker.connection_status.connect(lambda s: global_bus.device_connection_changed.emit('caen_hv', s))
             worker.control_command_status.connect(lambda msg: global_bus.system_log_message.emit("INFO", msg))
             worker.setpoints_ready.connect(global_bus.hv_setpoints_ready.emit)
+            global_bus.request_hv_setpoints.connect(worker.fetch_setpoints)
+            worker.metrics_ready.connect(lambda m: global_bus.metrics_updated.emit('caen_hv', m))
+            worker.command_completed.connect(self._on_hv_command_completed)
+            worker.status_events.connect(self._on_hv_status_events)
+            worker.burst_data.connect(self._on_hv_burst_data)
         elif name == 'daq':
             worker.avg_data_ready.connect(lambda ts, d: global_bus.sensor_data_updated.emit('daq_avg', {'ts': ts, 'data': d}))
             worker.raw_data_ready.connect(lambda d: global_bus.sensor_data_updated.emit('raw_data', {'ts': self._now(), 'data': d}))
@@ -143,7 +194,13 @@ class WorkerManager(QObject):
 
     def _now(self): return time.time()
     def _forward_hv_cmd(self, payload):
-        if 'caen_hv' in self.threads: self.threads['caen_hv'][1].execute_control_command(payload)
+        # 큐에 넣고 바로 돌아온다. 실제 CAEN 호출은 payload['crate'] 크레이트의 명령 스레드에서 실행된다.
+        if 'caen_hv' in self.threads: self.threads['caen_hv'][1].submit_command(payload)
+    def _forward_hv_burst(self, payload):
+        if 'caen_hv' not in self.threads: return
+        worker = self.threads['caen_hv'][1]
+        if payload.get('action') == 'stop': worker.stop_burst(payload.get('crate'))
+        else: worker.start_burst(dict(payload, trigger='manual'))
     def _forward_pdu_single_cmd(self, port_num, state):
         if 'netio_pdu' in self.threads: self.threads['netio_pdu'][1].control_single_port(port_num, state)
     def _forward_pdu_all_cmd(self, state):
@@ -1,41 +1,32 @@
 # main.py (전체 덮어쓰기)
 
 import sys
-import json
 import logging
 import queue
 import mariadb
-import os
 
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QThread, QTimer, QMetaObject, Qt
 
+from core import app_config
 from core.state_store import StateStore
 from core.event_bus import global_bus
+from core.metrics_server import MetricsServer
 from experts.safety_expert import SafetyExpert
 from experts.worker_manager import WorkerManager
 from views.main_window import MainWindow
 from workers.database_worker import DatabaseWorker
+from workers.archive_worker import ArchiveWorker
+from workers.query_governor import QueryGovernor
+from workers.analysis_service import AnalysisService
 
 CONFIG = {}
 
 def load_config(config_file="config_v3.json"):
     global CONFIG
-    script_dir = os.path.dirname(os.path.abspath(__file__)) if '__file__' in locals() else os.getcwd()
-    config_path = os.path.join(script_dir, config_file)
-    if not os.path.exists(config_path):
-        config_path = os.path.join(script_dir, "config_v2.json")
-        if not os.path.exists(config_path):
-            print(f"Error: Config file not found: {config_path}")
-            sys.exit(1)
-            
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            CONFIG = json.load(f)
-        return CONFIG
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from {config_path}: {e}")
-        sys.exit(1)
+    CONFIG = app_config.load_config(config_file)
+    if CONFIG is None: sys.exit(1)
+    return CONFIG
 
 class LogToEventBusHandler(logging.Handler):
     def emit(self, record):
@@ -63,25 +54,40 @@ def init_logging():
     logging.info("RENE-PM v3.0 (Decentralized Event-Driven Architecture) Starting")
     logging.info("="*60)
 
-def create_db_pool(db_config):
+def create_db_pool(db_config, overrides=None):
+    """overrides 로 읽기 전용 풀(리플리카 host/socket, 계정, 크기 등)을 별도로 구성할 수 있다."""
+    cfg = dict(db_config, **(overrides or {}))
     try:
         pool_config = {
-            'user': db_config['user'], 'password': db_config['password'],
-            'pool_name': db_config.get('pool_name', 'rene_pm_v3_pool'), 
-            'pool_size': db_config.get('pool_size', 5)
+            'user': cfg['user'], 'password': cfg['password'],
+            'pool_name': cfg.get('pool_name', 'rene_pm_v3_pool'), 
+            'pool_size': cfg.get('pool_size', 5)
         }
-        if db_config.get('unix_socket'):
-            pool_config['unix_socket'] = db_config['unix_socket']
+        if overrides and ('host' in overrides or 'port' in overrides):
+            cfg.pop('unix_socket', None)
+        if cfg.get('unix_socket'):
+            pool_config['unix_socket'] = cfg['unix_socket']
         else:
-            pool_config['host'] = db_config.get('host', '127.0.0.1')
-            pool_config['port'] = db_config.get('port', 3306)
+            pool_config['host'] = cfg.get('host', '127.0.0.1')
+            pool_config['port'] = cfg.get('port', 3306)
         
         pool = mariadb.ConnectionPool(**pool_config)
-        logging.info("Database connection pool created successfully.")
+        logging.info(f"Database connection pool '{pool_config['pool_name']}' created successfully.")
         return pool
     except mariadb.Error as e:
         logging.error(f"Failed to create DB connection pool: {e}"); return None
 
+def create_read_pool(db_config):
+    """분석 전용 읽기 풀. 쓰기 풀과 분리하여 기록이 분석 쿼리 뒤에서 기다리지 않게 한다."""
+    read_cfg = dict(db_config.get('read_pool', {}))
+    max_concurrent = read_cfg.pop('max_concurrent_queries', 2)
+    for key in ('max_statement_time_s', 'queue_timeout_s', 'database'):
+        read_cfg.pop(key, None)
+    read_cfg.setdefault('pool_name', 'rene_pm_read_pool')
+    # KILL QUERY 용 여유 커넥션 1개를 항상 남겨둔다.
+    read_cfg['pool_size'] = max(read_cfg.get('pool_size', 3), max_concurrent + 1)
+    return create_db_pool(db_config, read_cfg)
+
 if __name__ == '__main__':
     load_config()
     init_logging()
@@ -97,21 +103,42 @@ if __name__ == '__main__':
 
     db_queue = queue.Queue()
     db_pool = create_db_pool(CONFIG.get('database', {}))
+    read_pool = create_read_pool(CONFIG.get('database', {})) if db_pool else None
+    query_governor = QueryGovernor(read_pool, CONFIG.get('database', {}))
+    # 모든 이력 조회(Data History, 내보내기)가 공유하는 상주 스레드 풀
+    analysis_service = AnalysisService(query_governor, CONFIG)
 
     state_store = StateStore(CONFIG)
     safety_expert = SafetyExpert(CONFIG)
     worker_manager = WorkerManager(CONFIG, db_queue)
 
+    metrics_server = None
+    if CONFIG.get('metrics', {}).get('enabled'):
+        metrics_server = MetricsServer(CONFIG['metrics'])
+        metrics_server.start()
+
     db_thread = None
     db_worker = None
     if CONFIG.get('database', {}).get('enabled') and db_pool:
         db_thread = QThread()
         db_worker = DatabaseWorker(db_pool, CONFIG['database'], db_queue)
+        db_worker.metrics_ready.connect(lambda m: global_bus.metrics_updated.emit('database', m))
         db_worker.moveToThread(db_thread)
         db_thread.started.connect(db_worker.run)
         db_thread.start()
 
-    main_window = MainWindow(CONFIG, state_store, db_pool)
+    archive_thread = None
+    archive_worker = None
+    if CONFIG.get('archive', {}).get('enabled') and db_pool:
+        archive_thread = QThread()
+        # 아카이브 내보내기/삭제가 기록용 풀의 커넥션을 오래 잡지 않도록 작은 전용 풀을 쓴다.
+        archive_pool = create_db_pool(dict(CONFIG['database'], pool_name='rene_pm_archive_pool', pool_size=1))
+        archive_worker = ArchiveWorker(archive_pool, CONFIG['database'], CONFIG['archive'])
+        archive_worker.moveToThread(archive_thread)
+        archive_thread.started.connect(archive_worker.run)
+        archive_thread.start()
+
+    main_window = MainWindow(CONFIG, state_store, analysis_service)
     main_window.show()
 
     # [핵심 수정] 타이머를 main_window 객체에 귀속시켜 가비지 컬렉션 방지
@@ -130,10 +157,17 @@ if __name__ == '__main__':
     def on_about_to_quit():
         logging.info("Application shutting down...")
         worker_manager.stop_all()
+        analysis_service.shutdown()
+        if archive_worker and archive_thread:
+            QMetaObject.invokeMethod(archive_worker, "stop", Qt.ConnectionType.QueuedConnection)
+            archive_thread.quit()
+            archive_thread.wait(3000)
         if db_worker and db_thread:
             QMetaObject.invokeMethod(db_worker, "stop", Qt.ConnectionType.QueuedConnection)
             db_thread.quit()
             db_thread.wait(3000)
+        if metrics_server:
+            metrics_server.stop()
 
     app.aboutToQuit.connect(on_about_to_quit)
     sys.exit(app.exec())
\ No newline at end of file
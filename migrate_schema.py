@@ -0,0 +1,111 @@
+# migrate_schema.py (레거시 DB 스키마를 v3 구조로 변환하는 일회성 마이그레이션 도구)
+
+import sys
+import logging
+import argparse
+from core.app_config import load_config, connect_db
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# datetime 이 기본키인 테이블. 기본키 인덱스와 중복되는 보조 인덱스는 제거 대상이다.
+DATETIME_KEY_TABLES = {
+    'LS_DATA': 'idx_ls_datetime', 'RADON_DATA': 'idx_radon_datetime',
+    'MAGNETOMETER_DATA': 'idx_mag_datetime', 'TH_O2_DATA': 'idx_tho2_datetime',
+    'ARDUINO_DATA': 'idx_arduino_datetime', 'UPS_DATA': 'idx_ups_datetime',
+    'FIRE_DATA': 'idx_fire_datetime', 'VOC_DATA': 'idx_voc_datetime'
+}
+
+SETPOINT_LOG_SCHEMA = """CREATE TABLE IF NOT EXISTS HV_SETPOINT_LOG (
+    `datetime` DATETIME(3) NOT NULL, `crate` SMALLINT NOT NULL DEFAULT 0,
+    `slot` SMALLINT NOT NULL, `channel` SMALLINT NOT NULL,
+    `v0set` FLOAT, `i0set` FLOAT,
+    PRIMARY KEY (`crate`, `slot`, `channel`, `datetime`)
+);"""
+
+# 다중 크레이트 키: 기존 행은 모두 crate 0 이 된다. 키 교체와 한 번의 ALTER 로 묶어 테이블 재작성을 1회로 줄인다.
+ADD_CRATE_KEY = ("ADD COLUMN `crate` SMALLINT NOT NULL DEFAULT 0 AFTER `datetime`, "
+                 "DROP PRIMARY KEY, ADD PRIMARY KEY (`crate`, `slot`, `channel`, `datetime`)")
+
+# 채널별로 직전 값과 달라진 셋포인트만 변경 이력으로 옮긴다 (MariaDB 10.2+ 윈도 함수).
+SETPOINT_BACKFILL = """
+INSERT IGNORE INTO HV_SETPOINT_LOG (`datetime`, `slot`, `channel`, `v0set`, `i0set`)
+SELECT `datetime`, `slot`, `channel`, `v0set`, `i0set` FROM (
+    SELECT `datetime`, `slot`, `channel`, `v0set`, `i0set`,
+           LAG(`v0set`) OVER w AS prev_v0set, LAG(`i0set`) OVER w AS prev_i0set
+    FROM HV_DATA
+    WINDOW w AS (PARTITION BY `slot`, `channel` ORDER BY `datetime`)
+) AS t
+WHERE prev_v0set IS NULL OR prev_v0set <> `v0set` OR prev_i0set <> `i0set`
+"""
+
+def _column_info(cursor, schema, table, column):
+    cursor.execute("""
+        SELECT DATA_TYPE, DATETIME_PRECISION FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? AND COLUMN_NAME = ?
+    """, (schema, table, column))
+    return cursor.fetchone()
+
+def plan_migration(cursor, schema):
+    """현재 DB 상태를 검사하여 필요한 마이그레이션 SQL 목록을 만든다 (여러 번 실행해도 안전)."""
+    steps = []
+    for table, index_name in DATETIME_KEY_TABLES.items():
+        info = _column_info(cursor, schema, table, 'datetime')
+        if info is None: continue
+        if info[1] is None or info[1] < 3:
+            steps.append(f"ALTER TABLE {table} MODIFY `datetime` DATETIME(3) NOT NULL")
+        steps.append(f"DROP INDEX IF EXISTS {index_name} ON {table}")
+
+    info = _column_info(cursor, schema, 'HV_DATA', 'datetime')
+    if info is not None:
+        if _column_info(cursor, schema, 'HV_SETPOINT_LOG', 'datetime') is not None \
+                and _column_info(cursor, schema, 'HV_SETPOINT_LOG', 'crate') is None:
+            steps.append(f"ALTER TABLE HV_SETPOINT_LOG {ADD_CRATE_KEY}")
+        steps.append(SETPOINT_LOG_SCHEMA)
+        has_crate = _column_info(cursor, schema, 'HV_DATA', 'crate') is not None
+        if _column_info(cursor, schema, 'HV_DATA', 'v0set') is not None:
+            steps.append(SETPOINT_BACKFILL)
+            # 한 번의 ALTER 로 키 정밀도, 클러스터링 순서, 중복 컬럼 제거를 함께 처리해 테이블 재작성을 1회로 줄인다.
+            steps.append(
+                "ALTER TABLE HV_DATA MODIFY `datetime` DATETIME(3) NOT NULL, "
+                "MODIFY `slot` SMALLINT NOT NULL, MODIFY `channel` SMALLINT NOT NULL, "
+                + ("DROP PRIMARY KEY, ADD PRIMARY KEY (`crate`, `slot`, `channel`, `datetime`), " if has_crate else ADD_CRATE_KEY + ", ")
+                + "DROP COLUMN `v0set`, DROP COLUMN `i0set`"
+            )
+        elif not has_crate:
+            precision = "MODIFY `datetime` DATETIME(3) NOT NULL, " if info[1] is None or info[1] < 3 else ""
+            steps.append(f"ALTER TABLE HV_DATA {precision}{ADD_CRATE_KEY}")
+        elif info[1] is None or info[1] < 3:
+            steps.append("ALTER TABLE HV_DATA MODIFY `datetime` DATETIME(3) NOT NULL")
+        steps.append("CREATE INDEX IF NOT EXISTS idx_hv_datetime ON HV_DATA (datetime)")
+    return steps
+
+def migrate(dry_run=False, config_file="config_v3.json"):
+    config = load_config(config_file)
+    if not config or 'database' not in config:
+        logging.error("'database' 설정이 config 파일에 없습니다."); return False
+
+    conn = None
+    try:
+        conn = connect_db(config['database'])
+        cursor = conn.cursor()
+        steps = plan_migration(cursor, config['database']['database'])
+        for sql in steps:
+            print(sql.strip() + ";")
+            if not dry_run:
+                cursor.execute(sql)
+                conn.commit()
+        logging.info(f"{'Planned' if dry_run else 'Applied'} {len(steps)} migration statements.")
+        return True
+    except Exception as e:
+        logging.error(f"Migration failed: {e}")
+        if conn: conn.rollback()
+        return False
+    finally:
+        if conn: conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RENE-PM DB schema migration (DATETIME(3) keys, HV setpoint change log, HV crate keys)")
+    parser.add_argument('--config', default="config_v3.json")
+    parser.add_argument('--dry-run', action='store_true', help="실행하지 않고 SQL 만 출력")
+    args = parser.parse_args()
+    sys.exit(0 if migrate(args.dry_run, args.config) else 1)
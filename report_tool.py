@@ -0,0 +1,73 @@
+# report_tool.py (일간/주간 운영 요약 보고서 생성 도구, GUI 없이 cron 으로 실행)
+
+import os
+import sys
+import time
+import logging
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core.app_config import load_config, BASE_DIR
+from core.run_report import report_tasks, run_task, write_bundle
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def report_period(args):
+    """(시작, 끝, 폴더 이름). 일간은 하루, 주간은 --date 로 끝나는 7일. 기본 날짜는 어제."""
+    if args.start and args.end:
+        start, end = args.start, args.end
+        return start, end, f"{start[:10]}_{end[:10]}"
+    day = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today() - datetime.timedelta(days=1)
+    days = 7 if args.period == 'weekly' else 1
+    first = day - datetime.timedelta(days=days - 1)
+    start, end = f"{first} 00:00:00", f"{day + datetime.timedelta(days=1)} 00:00:00"
+    return start, end, (f"{day}" if days == 1 else f"week_{first}_{day}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RENE-PM headless run summary report")
+    parser.add_argument('--config', default="config_v3.json")
+    parser.add_argument('--period', choices=['daily', 'weekly'], default='daily')
+    parser.add_argument('--date', help="보고서 마지막 날짜 YYYY-MM-DD (기본: 어제)")
+    parser.add_argument('--start', help="'YYYY-MM-DD HH:MM:SS' (--end 와 함께 주면 기간을 직접 지정)")
+    parser.add_argument('--end', help="'YYYY-MM-DD HH:MM:SS' (이 시각은 포함하지 않는다)")
+    parser.add_argument('--out', help="출력 상위 폴더 (기본: 설정의 report.directory)")
+    parser.add_argument('--tables', nargs='+', help="대상 테이블 (예: LS_DATA HV_DATA, 기본: 활성화된 장치 전체)")
+    parser.add_argument('--workers', type=int, help="작업 프로세스 수 (기본: 설정의 report.workers)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config: sys.exit(1)
+    report_cfg = config.get('report', {})
+    start, end, label = report_period(args)
+    out_root = args.out or report_cfg.get('directory', 'reports')
+    if not os.path.isabs(out_root): out_root = os.path.join(BASE_DIR, out_root)
+    out_dir = os.path.join(out_root, label)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = report_tasks(config, args.tables)
+    if not tasks:
+        print("No report tasks (no enabled devices or matching tables)."); sys.exit(1)
+    workers = max(min(args.workers or report_cfg.get('workers', 4), len(tasks)), 1)
+    logging.info(f"Report {label}: {len(tasks)} tasks on {workers} processes [{start} ~ {end}]")
+
+    # [핵심] 센서/슬롯마다 독립 프로세스에서 자체 DB 커넥션으로 조회·집계·그리기를 수행한다.
+    t0 = time.monotonic()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_task, config, task, start, end, out_dir): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'name': task['name'], 'error': str(e)}
+            status = f"ERROR: {result['error']}" if 'error' in result else f"{result['rows']} rows"
+            print(f"{task['name']:<20} {status}")
+            results.append(result)
+    order = {task['name']: i for i, task in enumerate(tasks)}
+    results.sort(key=lambda r: order[r['name']])
+
+    write_bundle(results, out_dir, start, end, time.monotonic() - t0)
+    print(f"--- Report written to {out_dir}")
+    sys.exit(1 if any('error' in r for r in results) else 0)
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import QGroupBox, QHBoxLayout, QVBoxLayout, QGridLayout, QF
 from PyQt6.QtGui import QFont, QColor
 from PyQt6.QtCore import Qt, pyqtSlot
 from core.event_bus import global_bus
+from core.app_config import hv_board_label
 import time
 
 class DashboardPanel(QGroupBox):
@@ -207,13 +208,12 @@ class DashboardPanel(QGroupBox):
         # [수정 7] HV Board Temps 색상 적용
         elif sensor_type == 'hv_status':
             temp_parts = []
-            for slot, slot_data in sorted(data.get('slots', {}).items()):
-                t = slot_data.get('board_temp', -1.0)
+            for (crate, slot), t in sorted(data.get('board_temps', {}).items()):
                 if t != -1.0:
                     if t >= 65.0: temp_color = "red"
                     elif t > 50.0: temp_color = "orange"
                     else: temp_color = "green"
-                    temp_parts.append(f"S{slot}: <b style='color:{temp_color};'>{t:.1f}°C</b>")
+                    temp_parts.append(f"{hv_board_label(self.config.get('caen_hv', {}), crate, slot)}: <b style='color:{temp_color};'>{t:.1f}°C</b>")
             board_text = " | ".join(temp_parts) if temp_parts else "No Data"
             self._update_label('HV_Board_Temps', board_text)
 
@@ -0,0 +1,162 @@
+# views/components/history_viewer.py
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+
+class HistoryViewer(QWidget):
+    """
+    [대용량 이력 뷰어]
+    pyqtgraph 기반으로 보이는 구간만 그리고(Clip-to-View), 픽셀 수에 맞춰 자동 다운샘플링하며,
+    여러 서브플롯의 X 축(시간)을 연동한다. 사용자가 줌/팬을 멈추면 보이는 구간을 range_requested 로 알려
+    패널이 더 촘촘한 데이터를 다시 받아올 수 있게 한다.
+
+    모델 형식
+      시계열: {'kind': 'timeseries', 'title', 'plots': [{'title', 'y_label', 'series': [{'name', 'x', 'y', 'lo', 'hi'}]}]}
+      산점도: {'kind': 'scatter', 'title', 'x_label', 'y_label', 'groups': [{'name', 'x', 'y'}], 'trend': (m, b, r) | None}
+      히트맵: {'kind': 'heatmap', 'title', 'x_label', 'y_label', 'x_labels', 'y_labels', 'values': (행=y, 열=x), 'levels', 'value_label'}
+    """
+    range_requested = pyqtSignal(float, float)
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.title_label = QLabel("")
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.title_label.setStyleSheet("font-size: 14pt; font-weight: bold;")
+        self.graphics = pg.GraphicsLayoutWidget()
+        self.graphics.setBackground('w')
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.graphics)
+
+        self.plot_items = []
+        self.curves = {}          # (서브플롯 번호, 시리즈 이름) -> (본 곡선, 하한 곡선, 상한 곡선)
+        self._signature = None
+        self._range_timer = QTimer(self)
+        self._range_timer.setSingleShot(True)
+        self._range_timer.setInterval(300)
+        self._range_timer.timeout.connect(self._emit_range)
+
+    def view_width(self):
+        """첫 서브플롯의 데이터 영역 가로 픽셀 수 (버킷 크기 계산용)."""
+        if self.plot_items: return max(int(self.plot_items[0].vb.width()), 1)
+        return max(self.width(), 1)
+
+    def clear(self):
+        self._range_timer.stop()
+        self.graphics.clear()
+        self.plot_items, self.curves, self._signature = [], {}, None
+        self.title_label.setText("")
+
+    def show_model(self, model, keep_view=False):
+        self.title_label.setText(model.get('title', ''))
+        if model['kind'] == 'scatter':
+            self._show_scatter(model)
+        elif model['kind'] == 'heatmap':
+            self._show_heatmap(model)
+        else:
+            self._show_timeseries(model['plots'], keep_view)
+
+    def _show_timeseries(self, plots, keep_view):
+        signature = [(p['title'], tuple(s['name'] for s in p['series'])) for p in plots]
+        if signature != self._signature:
+            self._build_timeseries(plots)
+            self._signature = signature
+        for p_idx, plot in enumerate(plots):
+            for s in plot['series']:
+                curve, lo_curve, hi_curve = self.curves[(p_idx, s['name'])]
+                curve.setData(s['x'], s['y'], connect='finite')
+                if lo_curve is not None and s.get('lo') is not None:
+                    lo_curve.setData(s['x'], s['lo'], connect='finite')
+                    hi_curve.setData(s['x'], s['hi'], connect='finite')
+        if not keep_view:
+            for item in self.plot_items: item.enableAutoRange()
+
+    def _build_timeseries(self, plots):
+        self.clear()
+        for p_idx, plot in enumerate(plots):
+            item = self.graphics.addPlot(row=p_idx, col=0, title=plot.get('title'),
+                                         axisItems={'bottom': pg.DateAxisItem(orientation='bottom')})
+            item.showGrid(x=True, y=True, alpha=0.3)
+            item.setLabel('left', plot.get('y_label', ''))
+            # [핵심] 보이는 구간만 그리고, 화면 픽셀보다 많은 점은 최대/최소 보존(peak) 방식으로 줄인다.
+            item.setClipToView(True)
+            item.setDownsampling(auto=True, mode='peak')
+            if len(plot['series']) <= 16: item.addLegend()
+            if self.plot_items: item.setXLink(self.plot_items[0])
+            self.plot_items.append(item)
+
+            n = max(len(plot['series']), 9)
+            for s_idx, s in enumerate(plot['series']):
+                color = pg.intColor(s_idx, hues=n)
+                curve = item.plot(pen=pg.mkPen(color=color, width=1.5), name=s['name'], skipFiniteCheck=True)
+                lo_curve = hi_curve = None
+                if s.get('lo') is not None:
+                    lo_curve, hi_curve = pg.PlotDataItem(pen=None), pg.PlotDataItem(pen=None)
+                    fill_color = pg.mkColor(color); fill_color.setAlpha(50)
+                    item.addItem(pg.FillBetweenItem(lo_curve, hi_curve, brush=pg.mkBrush(fill_color)))
+                self.curves[(p_idx, s['name'])] = (curve, lo_curve, hi_curve)
+        if self.plot_items:
+            self.plot_items[0].sigXRangeChanged.connect(self._on_x_range_changed)
+
+    def _show_scatter(self, model):
+        self.clear()
+        self.title_label.setText(model.get('title', ''))
+        item = self.graphics.addPlot(row=0, col=0)
+        item.showGrid(x=True, y=True, alpha=0.3)
+        item.setLabel('bottom', model.get('x_label', ''))
+        item.setLabel('left', model.get('y_label', ''))
+        if len(model['groups']) <= 16: item.addLegend()
+        n = max(len(model['groups']), 9)
+        for g_idx, g in enumerate(model['groups']):
+            color = pg.mkColor(pg.intColor(g_idx, hues=n)); color.setAlpha(128)
+            item.addItem(pg.ScatterPlotItem(g['x'], g['y'], size=5, pen=None, brush=pg.mkBrush(color), name=g['name']))
+        trend = model.get('trend')
+        if trend is not None:
+            m, b, r = trend
+            xs = np.concatenate([g['x'] for g in model['groups']])
+            x_line = np.array([np.nanmin(xs), np.nanmax(xs)])
+            item.plot(x_line, m * x_line + b, pen=pg.mkPen('r', width=2, style=Qt.PenStyle.DashLine), name='Overall Trend')
+            text = pg.TextItem(f"y = {m:.3f}x + {b:.2f}\nr = {r:.3f}", color='k', anchor=(0, 0))
+            item.addItem(text)
+            text.setPos(x_line[0], np.nanmax(np.concatenate([g['y'] for g in model['groups']])))
+        self.plot_items = [item]
+        self._signature = None
+
+    def _show_heatmap(self, model):
+        self.clear()
+        self.title_label.setText(model.get('title', ''))
+        item = self.graphics.addPlot(row=0, col=0)
+        item.setLabel('bottom', model.get('x_label', ''))
+        item.setLabel('left', model.get('y_label', ''))
+        values = np.asarray(model['values'], dtype=np.float64)
+        lo, hi = model.get('levels', (np.nanmin(values), np.nanmax(values)))
+        cmap = pg.colormap.get('CET-D1')
+        # ImageItem 은 image[x, y] 순서이므로 (행=y, 열=x) 값을 전치해서 넘긴다.
+        image = pg.ImageItem(values.T)
+        image.setColorMap(cmap)
+        image.setLevels((lo, hi))
+        item.addItem(image)
+        bar = pg.ColorBarItem(values=(lo, hi), colorMap=cmap, label=model.get('value_label', ''))
+        bar.setImageItem(image, insert_in=item)
+        # 라벨이 많으면 (예: 96 채널) 눈금은 일부만 표시한다.
+        for axis, labels in (('bottom', model['x_labels']), ('left', model['y_labels'])):
+            step = max(len(labels) // 24, 1)
+            item.getAxis(axis).setTicks([[(i + 0.5, str(label)) for i, label in enumerate(labels)][::step]])
+        item.invertY(True)
+        item.setAspectLocked(False)
+        self.plot_items = [item]
+        self._signature = None
+
+    def _on_x_range_changed(self, *_):
+        # 자동 범위 맞춤(데이터를 새로 그릴 때)으로 바뀐 범위는 무시한다. 사용자가 줌/팬하면 자동 범위가 꺼진다.
+        if self.plot_items and self.plot_items[0].vb.autoRangeEnabled()[0]: return
+        self._range_timer.start()
+
+    def _emit_range(self):
+        if not self.plot_items or self._signature is None: return
+        x0, x1 = self.plot_items[0].viewRange()[0]
+        self.range_requested.emit(float(x0), float(x1))
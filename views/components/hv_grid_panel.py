@@ -4,9 +4,12 @@ from PyQt6.QtWidgets import QGroupBox, QVBoxLayout, QGridLayout, QFrame, QLabel
 from PyQt6.QtGui import QFont, QColor, QPalette
 from PyQt6.QtCore import Qt, pyqtSlot
 from core.event_bus import global_bus
+from core.hv_frame import HVMirror, row_params
+from core.hv_status import StatusDecoder
+from core.app_config import hv_mainframes, hv_board_label
 
 class ChannelWidget(QFrame):
-    def __init__(self, slot, channel):
+    def __init__(self, label, channel):
         super().__init__()
         self.setFrameShape(QFrame.Shape.StyledPanel)
         self.setLineWidth(1)
@@ -16,7 +19,7 @@ class ChannelWidget(QFrame):
         layout.setContentsMargins(2, 2, 2, 2)
         layout.setSpacing(1)
         
-        self.name_label = QLabel(f"S{slot}CH{channel}")
+        self.name_label = QLabel(f"{label}CH{channel}")
         self.vmon_label = QLabel("--- V")
         self.imon_label = QLabel("--- uA")
         
@@ -34,14 +37,25 @@ class ChannelWidget(QFrame):
         self.setAutoFillBackground(True)
         self.update_status({'Pw': False})
 
-    def update_status(self, params):
+    def update_status(self, params, flags=()):
         power = params.get('Pw', False)
         vmon = params.get('VMon', 0.0)
         imon = params.get('IMon', 0.0)
         v0set = params.get('V0Set', 0.0)
         
         palette = self.palette()
-        if not power:
+        # Status 비트가 편차보다 우선한다: 트립은 전원이 꺼져도 보이도록 남기고, 과전류/과전압은 주황색.
+        if 'TRIP' in flags:
+            color = QColor('#8E0000')
+            text_color = QColor('white')
+            self.vmon_label.setText("TRIP")
+            self.imon_label.setText(f"{imon:.2f} uA")
+        elif power and ({'OVERCURRENT', 'OVERVOLTAGE', 'UNDERVOLTAGE'} & set(flags)):
+            color = QColor('#E67E22')
+            text_color = QColor('black')
+            self.vmon_label.setText(f"{vmon:.1f} V")
+            self.imon_label.setText(' / '.join(f for f in flags if f in ('OVERCURRENT', 'OVERVOLTAGE', 'UNDERVOLTAGE')))
+        elif not power:
             color = QColor('#95A5A6')
             text_color = QColor('white')
             self.vmon_label.setText("Power Off")
@@ -72,6 +86,10 @@ class HVGridPanel(QGroupBox):
         self.config = config
         self.channel_widgets = {}
         self.slot_groupboxes = {}
+        self.mirror = HVMirror()
+        # 크레이트마다 시스템 종류가 다를 수 있으므로 Status 해석기를 크레이트별로 둔다.
+        self.mainframes = hv_mainframes(config.get('caen_hv', {}))
+        self.decoders = {mf['crate']: StatusDecoder(mf.get('system_type')) for mf in self.mainframes}
         self._init_ui()
         self._connect_signals()
 
@@ -80,32 +98,37 @@ class HVGridPanel(QGroupBox):
         main_layout = QVBoxLayout(self)
         
         caen_config = self.config.get('caen_hv', {})
-        crate_map = caen_config.get('crate_map', {})
-        display_channels = caen_config.get('display_channels', {})
+        for mf in self.mainframes:
+            crate = mf['crate']
+            display_channels = mf.get('display_channels', {})
+            for slot_str, board_info in mf.get('crate_map', {}).items():
+                self._add_board(main_layout, crate, slot_str, board_info, display_channels.get(slot_str),
+                                hv_board_label(caen_config, crate, int(slot_str)))
+
+    def _add_board(self, main_layout, crate, slot_str, board_info, display_config, label):
+        """보드 하나의 그룹 상자와 채널 위젯을 만든다."""
+        slot = int(slot_str)
+        title = f"Slot {slot}" if label == f"S{slot}" else label
+        slot_group = QGroupBox(f"{title}: {board_info.get('description', '')}")
+        slot_group.setFont(QFont("Arial", 10))
+        self.slot_groupboxes[(crate, slot)] = (slot_group, f"{title}: {board_info.get('description', '')}")
         
-        for slot_str, board_info in crate_map.items():
-            slot = int(slot_str)
-            slot_group = QGroupBox(f"Slot {slot}: {board_info.get('description', '')}")
-            slot_group.setFont(QFont("Arial", 10))
-            self.slot_groupboxes[slot] = slot_group
-            
-            slot_layout = QGridLayout(slot_group)
-            slot_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
-            main_layout.addWidget(slot_group)
+        slot_layout = QGridLayout(slot_group)
+        slot_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        main_layout.addWidget(slot_group)
+        
+        channels_to_display = []
+        if display_config == "all": 
+            channels_to_display = range(board_info['channels'])
+        elif isinstance(display_config, list): 
+            channels_to_display = display_config
             
-            channels_to_display = []
-            display_config = display_channels.get(slot_str)
-            if display_config == "all": 
-                channels_to_display = range(board_info['channels'])
-            elif isinstance(display_config, list): 
-                channels_to_display = display_config
-                
-            num_cols = 6
-            for i, ch in enumerate(channels_to_display):
-                widget = ChannelWidget(slot, ch)
-                widget.setVisible(False)
-                self.channel_widgets[(slot, ch)] = widget
-                slot_layout.addWidget(widget, i // num_cols, i % num_cols)
+        num_cols = 6
+        for i, ch in enumerate(channels_to_display):
+            widget = ChannelWidget(label, ch)
+            widget.setVisible(False)
+            self.channel_widgets[(crate, slot, ch)] = widget
+            slot_layout.addWidget(widget, i // num_cols, i % num_cols)
 
     def _connect_signals(self):
         global_bus.sensor_data_updated.connect(self._on_hv_data_updated)
@@ -113,20 +136,29 @@ class HVGridPanel(QGroupBox):
     @pyqtSlot(str, dict)
     def _on_hv_data_updated(self, sensor_type, payload):
         if sensor_type != 'hv_status': return
-        data = payload.get('data', {})
+        frame = payload.get('data', {})
+        # [핵심] 키프레임이 아니면 불감대를 넘어 바뀐 채널의 위젯만 다시 그린다.
+        rows = self.mirror.apply(frame)
         
-        for slot, slot_data in data.get('slots', {}).items():
-            board_temp = slot_data.get('board_temp')
-            if board_temp is not None and board_temp != -1.0 and slot in self.slot_groupboxes:
-                original_desc = self.config.get('caen_hv', {}).get('crate_map', {}).get(str(slot), {}).get('description', '')
-                self.slot_groupboxes[slot].setTitle(f"Slot {slot}: {original_desc}  [{board_temp:.1f} °C]")
-                
-            for channel, params in slot_data.get('channels', {}).items():
-                key = (slot, channel)
+        for board, board_temp in frame.get('board_temps', {}).items():
+            if board_temp is not None and board_temp != -1.0 and board in self.slot_groupboxes:
+                group, title = self.slot_groupboxes[board]
+                group.setTitle(f"{title}  [{board_temp:.1f} °C]")
+        
+        # 바뀐 행의 Status 를 크레이트별로 한 번에 플래그 배열로 푼다.
+        crates = frame['crate'][rows]
+        for crate, decoder in self.decoders.items():
+            crate_rows = rows[crates == crate]
+            flags = decoder.decode(self.mirror.column('Status')[crate_rows])
+            for i, row_flags in zip(crate_rows, flags):
+                key = (crate, int(frame['slot'][i]), int(frame['channel'][i]))
                 if key in self.channel_widgets:
                     widget = self.channel_widgets[key]
-                    power_status = params.get('Pw', False)
-                    if widget.isVisible() != power_status: 
-                        widget.setVisible(power_status)
-                    if power_status: 
-                        widget.update_status(params)
\ No newline at end of file
+                    params = row_params(frame['fields'], self.mirror.values[i])
+                    names = decoder.names(row_flags)
+                    # 트립한 채널은 전원이 꺼졌어도 계속 보여 준다.
+                    visible = bool(params.get('Pw', False)) or 'TRIP' in names
+                    if widget.isVisible() != visible: 
+                        widget.setVisible(visible)
+                    if visible: 
+                        widget.update_status(params, names)
@@ -14,17 +14,19 @@ from views.panels.notes_panel import NotesPanel
 from views.panels.analysis_panel import AnalysisPanel
 from views.panels.guide_panel import GuidePanel
 from views.panels.hv_graph_panel import HVGraphPanel
+from views.panels.hv_burst_panel import HVBurstPanel
 from views.panels.settings_panel import SettingsPanel
 
 from views.components.dashboard_panel import DashboardPanel
 from views.components.hv_grid_panel import HVGridPanel
+from core.app_config import hv_boards, hv_board_label
 
 class MainWindow(QMainWindow):
-    def __init__(self, config, state_store, db_pool):
+    def __init__(self, config, state_store, analysis_service):
         super().__init__()
         self.config = config
         self.state_store = state_store
-        self.db_pool = db_pool
+        self.analysis_service = analysis_service
         self._init_ui()
 
     def _init_ui(self):
@@ -54,19 +56,21 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(self.safety_panel, "🛡️ Safety")
         
         if self.config.get('caen_hv', {}).get("enabled"):
-            crate_map = self.config['caen_hv'].get('crate_map', {})
-            self.hv_panel = HVPanel(list(crate_map.keys()))
+            self.hv_panel = HVPanel(self.config['caen_hv'], self.state_store)
             self.tab_widget.addTab(self.hv_panel, "🎛️ HV Control")
             
         self.env_panel = EnvPanel(self.state_store)
         self.tab_widget.addTab(self.env_panel, "🌡️ Env Graphs")
         
-        self.analysis_panel = AnalysisPanel(self.config, self.db_pool)
+        self.analysis_panel = AnalysisPanel(self.config, self.analysis_service)
         self.tab_widget.addTab(self.analysis_panel, "🔍 Data History")
         
         if self.config.get('caen_hv', {}).get("enabled"):
-            for slot_str, board in self.config['caen_hv'].get('crate_map', {}).items():
-                self.tab_widget.addTab(HVGraphPanel(int(slot_str), board.get('channels', 0), self.state_store), f"📈 HV S{slot_str}")
+            for crate, _, slot, board in hv_boards(self.config['caen_hv']):
+                label = hv_board_label(self.config['caen_hv'], crate, slot)
+                self.tab_widget.addTab(HVGraphPanel(crate, slot, board.get('channels', 0), self.state_store, label), f"📈 HV {label}")
+            self.hv_burst_panel = HVBurstPanel(self.config['caen_hv'], self.state_store)
+            self.tab_widget.addTab(self.hv_burst_panel, "⚡ HV Burst")
         
         self.guide_panel = GuidePanel(self.config)
         self.tab_widget.addTab(self.guide_panel, "🗺️ Guide")
@@ -1,5 +1,6 @@
 # views/panels/analysis_panel.py
 
+import os
 import time
 import pandas as pd
 import numpy as np
@@ -7,17 +8,54 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFrame,
                              QComboBox, QSpinBox, QCheckBox, QLabel, QPushButton, 
                              QDateEdit, QMessageBox, QFileDialog)
 from PyQt6.QtCore import Qt, QDate
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from workers.analysis_worker import AnalysisWorker
+from views.components.history_viewer import HistoryViewer
+from core.static_plot import render_png, to_epoch
 from core.event_bus import global_bus
+from core.history_query import make_spec, compute_bucket_seconds, TABLE_RESOLUTION_S
+from core.db_schema import to_float_array
+from core.correlation import split_series, correlate, regress
+from core.export_writers import EXPORT_FORMATS, export_format
+from core.app_config import hv_mainframes, hv_boards, hv_board_label
 
 class AnalysisPanel(QWidget):
-    def __init__(self, config, db_pool):
+    SPLIT_PLOT_TYPES = {"TH/O2 Sensor", "UPS Status"}
+    # 상관 분석에서 고를 수 있는 환경 센서 스트림: 이름 -> (테이블, 컬럼)
+    CORRELATION_SENSORS = {
+        "LS RTD 1": ('LS_DATA', 'RTD_1'), "LS RTD 2": ('LS_DATA', 'RTD_2'),
+        "TH/O2 Temp": ('TH_O2_DATA', 'temperature'), "Humidity": ('TH_O2_DATA', 'humidity'),
+        "O2": ('TH_O2_DATA', 'oxygen'), "Radon": ('RADON_DATA', 'mu'), "B Field": ('MAGNETOMETER_DATA', 'B_mag')
+    }
+    CORRELATION_VIEWS = ["Scatter", "Heatmap (r)", "Heatmap (slope)", "Heatmap (lag)", "Matrix (all streams)"]
+
+    def __init__(self, config, analysis_service):
         super().__init__()
         self.config = config
-        self.db_pool = db_pool
+        self.analysis_service = analysis_service
+        # HV 보드 목록 (crate, slot). 크레이트가 여럿일 때만 조회 조건에 crate 를 넣는다.
+        caen_config = config.get('caen_hv', {})
+        self.hv_boards = [(crate, slot) for crate, _, slot, _ in hv_boards(caen_config)] if caen_config.get("enabled") else []
+        self.multi_crate = len(hv_mainframes(caen_config)) > 1
+        self.temp_boards = []
         self.last_analysis_df = None
+        self.last_raw_specs = []
+        self.last_bucket_s = None
+        self.last_model = None
+        self.last_correlation = None
+        self.job_mode = None         # 진행 중인 조회를 요청한 분석 모드
+        self.query_range = None      # 사용자가 고른 전체 조회 구간 (시작, 끝) 문자열
+        self.loaded_range = None     # 현재 화면 데이터가 덮는 구간
+        self.zoomed = False
+        self.current_job = None      # 화면용 조회 작업 번호
+        self.export_job = None       # CSV 원본 재조회 작업 번호
+        self._job_handlers = {}      # job_id -> 완료 시 호출할 함수
+        # [핵심] 서비스 시그널은 한 번만 연결하고, 작업 번호로 자신이 기다리는 결과만 받는다.
+        # 대체(Supersede)된 이전 작업의 늦은 결과는 여기서 버려진다.
+        analysis_service.job_finished.connect(self._on_job_finished)
+        analysis_service.job_partial.connect(self._on_job_partial)
+        analysis_service.job_progress.connect(self._on_job_progress)
+        analysis_service.job_truncated.connect(self._on_job_truncated)
+        analysis_service.job_failed.connect(self._on_job_failed)
+        analysis_service.job_done.connect(self._on_job_done)
         self._init_ui()
 
     def _init_ui(self):
@@ -36,13 +74,13 @@ class AnalysisPanel(QWidget):
         
         self.analysis_combo = QComboBox()
         self.analysis_map = {
-            "LS Temperature (C)": "SELECT `datetime`, `RTD_1`, `RTD_2` FROM LS_DATA", 
-            "LS Level (mm)": "SELECT `datetime`, `DIST_1`, `DIST_2` FROM LS_DATA",
-            "Magnetometer (mG)": "SELECT `datetime`, `Bx`, `By`, `Bz`, `B_mag` FROM MAGNETOMETER_DATA", 
-            "Radon (Bq/m3)": "SELECT `datetime`, `mu` FROM RADON_DATA",
-            "TH/O2 Sensor": "SELECT `datetime`, `temperature`, `humidity`, `oxygen` FROM TH_O2_DATA", 
-            "Arduino Sensor": "SELECT `datetime`, `analog_1`, `analog_2`, `analog_3`, `analog_4`, `analog_5` FROM ARDUINO_DATA",
-            "UPS Status": "SELECT `datetime`, `linev`, `bcharge`, `timeleft` FROM UPS_DATA", 
+            "LS Temperature (C)": ('LS_DATA', ['RTD_1', 'RTD_2']), 
+            "LS Level (mm)": ('LS_DATA', ['DIST_1', 'DIST_2']),
+            "Magnetometer (mG)": ('MAGNETOMETER_DATA', ['Bx', 'By', 'Bz', 'B_mag']), 
+            "Radon (Bq/m3)": ('RADON_DATA', ['mu']),
+            "TH/O2 Sensor": ('TH_O2_DATA', ['temperature', 'humidity', 'oxygen']), 
+            "Arduino Sensor": ('ARDUINO_DATA', ['analog_1', 'analog_2', 'analog_3', 'analog_4', 'analog_5']),
+            "UPS Status": ('UPS_DATA', ['linev', 'bcharge', 'timeleft']), 
             "HV Voltage (VMon)": "HV_QUERY", 
             "HV Current (IMon)": "HV_QUERY", 
             "HV Board Temperature (C)": "HV_TEMP_QUERY",
@@ -56,8 +94,7 @@ class AnalysisPanel(QWidget):
         hv_spec_layout = QHBoxLayout(self.hv_specific_controls)
         hv_spec_layout.setContentsMargins(0,0,0,0)
         self.hv_slot_combo = QComboBox()
-        if self.config.get('caen_hv', {}).get("enabled") and self.config.get('caen_hv', {}).get('crate_map'):
-            self.hv_slot_combo.addItems(self.config['caen_hv']['crate_map'].keys())
+        for crate, slot in self.hv_boards: self.hv_slot_combo.addItem(self._board_label(crate, slot), (crate, slot))
         self.hv_ch_start = QSpinBox()
         self.hv_ch_start.setRange(0, 99)
         self.hv_ch_end = QSpinBox()
@@ -76,11 +113,10 @@ class AnalysisPanel(QWidget):
         board_temp_layout.setContentsMargins(0,0,0,0)
         board_temp_layout.addWidget(QLabel("Slots:"))
         self.slot_checkboxes = {}
-        if self.config.get('caen_hv', {}).get("enabled") and self.config.get('caen_hv', {}).get('crate_map'):
-            for slot_str in self.config['caen_hv']['crate_map'].keys():
-                checkbox = QCheckBox(f"Slot {slot_str}")
-                self.slot_checkboxes[int(slot_str)] = checkbox
-                board_temp_layout.addWidget(checkbox)
+        for crate, slot in self.hv_boards:
+            checkbox = QCheckBox(f"Slot {self._board_label(crate, slot)}")
+            self.slot_checkboxes[(crate, slot)] = checkbox
+            board_temp_layout.addWidget(checkbox)
         self.board_temp_controls.hide()
 
         self.pdu_specific_controls = QWidget()
@@ -111,11 +147,19 @@ class AnalysisPanel(QWidget):
         corr_layout = QHBoxLayout(self.correlation_widget)
         corr_layout.setContentsMargins(0,0,0,0)
         self.corr_slot_combo = QComboBox()
-        if self.config.get('caen_hv', {}).get("enabled") and self.config.get('caen_hv', {}).get('crate_map'): 
-            self.corr_slot_combo.addItems(self.config['caen_hv']['crate_map'].keys())
+        if self.hv_boards:
+            for crate, slot in self.hv_boards: self.corr_slot_combo.addItem(self._board_label(crate, slot), (crate, slot))
+            self.corr_slot_combo.addItem("All", None)
         self.corr_param_combo = QComboBox()
         self.corr_param_combo.addItems(["VMon", "IMon"])
-        self.corr_target_label = QLabel("Target: Slot 1 VMon vs LS Temp")
+        self.corr_target_label = QLabel("")
+        self.corr_sensor_checkboxes = {}
+        for name in self.CORRELATION_SENSORS:
+            checkbox = QCheckBox(name)
+            checkbox.setChecked(name in ("LS RTD 1", "LS RTD 2", "TH/O2 Temp"))
+            self.corr_sensor_checkboxes[name] = checkbox
+        self.corr_view_combo = QComboBox()
+        self.corr_view_combo.addItems(self.CORRELATION_VIEWS)
         self.corr_ch_start = QSpinBox()
         self.corr_ch_start.setRange(0, 99)
         self.corr_ch_end = QSpinBox()
@@ -132,19 +176,26 @@ class AnalysisPanel(QWidget):
         corr_layout.addWidget(QLabel("Ch End:")); corr_layout.addWidget(self.corr_ch_end)
         corr_layout.addWidget(self.corr_single_channel_checkbox)
         corr_layout.addWidget(QLabel("Param:")); corr_layout.addWidget(self.corr_param_combo)
+        corr_layout.addWidget(QLabel("Sensors:"))
+        for checkbox in self.corr_sensor_checkboxes.values(): corr_layout.addWidget(checkbox)
         corr_layout.addWidget(self.corr_target_label)
+        corr_layout.addWidget(QLabel("View:")); corr_layout.addWidget(self.corr_view_combo)
         corr_layout.addWidget(QLabel("Start:")); corr_layout.addWidget(self.corr_start_date_edit)
         corr_layout.addWidget(QLabel("End:")); corr_layout.addWidget(self.corr_end_date_edit)
 
         self.correlation_widget.hide()
         
         self.plot_button = QPushButton("Plot Data")
-        self.export_button = QPushButton("Export to CSV")
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.export_button = QPushButton("Export Data")
+        self.png_button = QPushButton("Export PNG")
         
         control_layout.addWidget(QLabel("Mode:")); control_layout.addWidget(self.analysis_mode_combo)
         control_layout.addWidget(self.timeseries_widget); control_layout.addWidget(self.correlation_widget)
         control_layout.addStretch(1)
-        control_layout.addWidget(self.plot_button); control_layout.addWidget(self.export_button)
+        control_layout.addWidget(self.plot_button); control_layout.addWidget(self.cancel_button)
+        control_layout.addWidget(self.export_button); control_layout.addWidget(self.png_button)
         
         self.analysis_mode_combo.currentTextChanged.connect(self._on_analysis_mode_changed)
         self.analysis_combo.currentTextChanged.connect(self._on_analysis_type_changed)
@@ -152,15 +203,24 @@ class AnalysisPanel(QWidget):
         self.hv_ch_start.valueChanged.connect(lambda val: self.hv_ch_end.setValue(val) if self.analysis_single_channel_checkbox.isChecked() else None)
         
         self.corr_slot_combo.currentTextChanged.connect(self._update_correlation_display)
+        self.corr_param_combo.currentTextChanged.connect(lambda _: self._update_correlation_display(self.corr_slot_combo.currentText()))
+        for checkbox in self.corr_sensor_checkboxes.values():
+            checkbox.stateChanged.connect(lambda _: self._update_correlation_display(self.corr_slot_combo.currentText()))
+        # 보기 전환은 이미 계산된 결과로 다시 그리기만 한다 (재조회 없음).
+        self.corr_view_combo.currentTextChanged.connect(lambda _: self._show_correlation())
+        self._update_correlation_display(self.corr_slot_combo.currentText())
         self.corr_single_channel_checkbox.stateChanged.connect(self._toggle_single_correlation)
         self.corr_ch_start.valueChanged.connect(lambda val: self.corr_ch_end.setValue(val) if self.corr_single_channel_checkbox.isChecked() else None)
         
         self.plot_button.clicked.connect(self._run_analysis)
+        self.cancel_button.clicked.connect(self._cancel_analysis)
         self.export_button.clicked.connect(self._export_analysis_data)
+        self.png_button.clicked.connect(self._export_png)
         
-        self.analysis_canvas = FigureCanvas(Figure(figsize=(15, 6)))
+        self.history_viewer = HistoryViewer()
+        self.history_viewer.range_requested.connect(self._on_view_range_changed)
         layout.addWidget(control_panel)
-        layout.addWidget(self.analysis_canvas)
+        layout.addWidget(self.history_viewer)
 
     def _on_analysis_mode_changed(self, mode):
         if mode == "Time Series": 
@@ -190,177 +250,420 @@ class AnalysisPanel(QWidget):
 
     def _update_correlation_display(self, slot_str):
         if not slot_str: return
-        try: slot = int(slot_str)
-        except ValueError: return
-        target_temp = "LS Temp" if slot == 1 else "TH/O2 Temp"
+        target = "All Slots" if slot_str == "All" else f"Slot {slot_str}"
+        n_sensors = sum(checkbox.isChecked() for checkbox in self.corr_sensor_checkboxes.values())
         param = self.corr_param_combo.currentText()
-        self.corr_target_label.setText(f"Target: Slot {slot} {param} vs {target_temp}")
+        self.corr_target_label.setText(f"Target: {target} {param} vs {n_sensors} sensor(s)")
 
     def _run_analysis(self):
-        if not self.db_pool: 
+        if not self.analysis_service.available: 
             QMessageBox.critical(self, "Error", "DB pool not available.")
             return
         self.plot_button.setEnabled(False)
         self.plot_button.setText("Loading...")
+        self.cancel_button.setEnabled(True)
         
         mode = self.analysis_mode_combo.currentText()
-        queries, params = [], []
+        specs = self._build_specs(mode)
+        if not specs:
+            self._on_analysis_finished()
+            return
+
+        # [핵심] 시계열은 그래프 가로 픽셀 수만큼의 버킷으로 서버에서 집계해 받는다.
+        # 내보내기(정확한 값)는 같은 명세의 원본 행을 파일로 바로 스트리밍한다.
+        self.last_raw_specs = [dict(spec) for spec in specs]
+        self.last_bucket_s = None
+        self.last_correlation = None
+        self.zoomed = False
+        post = None
+        if mode == "Time Series":
+            spec = specs[0]
+            self.query_range = self.loaded_range = (spec['start'], spec['end'])
+            self.last_bucket_s = compute_bucket_seconds(spec['start'], spec['end'], self.history_viewer.view_width(), spec['table'])
+            for spec in specs: spec['bucket_s'] = self.last_bucket_s
+        elif mode == "Correlation":
+            # [핵심] 상관 분석은 공통 격자 간격의 평균값을 서버에서 집계해 받는다.
+            # 격자는 선택된 테이블 중 가장 느린 기록 주기보다 촘촘할 수 없다.
+            points = self.config.get('analysis', {}).get('correlation_points', 5000)
+            step = compute_bucket_seconds(specs[0]['start'], specs[0]['end'], points) or 0
+            step = max([step] + [TABLE_RESOLUTION_S.get(spec['table'], 60) for spec in specs])
+            for spec in specs: spec['bucket_s'] = step if step > TABLE_RESOLUTION_S.get(spec['table'], 60) else None
+            post = self._correlation_task(self.last_raw_specs, step)
 
+        # 결과를 해석할 모드는 요청 시점의 값으로 고정한다 (조회 중에 모드를 바꿔도 섞이지 않게).
+        self.job_mode = mode
+        self._start_worker(specs, lambda results: self._plot_analysis_data(results, mode), post=post)
+
+    def _build_specs(self, mode):
+        """현재 컨트롤 상태로 원본(버킷 없음) 조회 명세 목록을 만든다. 선택이 비어 있으면 None."""
+        specs = []
         if mode == "Time Series":
             query = self.analysis_map.get(self.analysis_combo.currentText())
             start_date = self.analysis_start_date.date().toString("yyyy-MM-dd 00:00:00")
-            end_date = self.analysis_end_date.date().toString("yyyy-MM-dd 23:59:59")
+            end_date = self.analysis_end_date.date().addDays(1).toString("yyyy-MM-dd 00:00:00")
             
             if query == "HV_QUERY":
-                try:
-                    slot = int(self.hv_slot_combo.currentText())
-                    final_query = "SELECT `datetime`, `channel`, `vmon`, `imon` FROM HV_DATA WHERE `slot` = ? AND `channel` BETWEEN ? AND ? AND `datetime` BETWEEN ? AND ?"
-                    queries.append(final_query)
-                    params.append([slot, self.hv_ch_start.value(), self.hv_ch_end.value(), start_date, end_date])
-                except ValueError: pass
+                board = self.hv_slot_combo.currentData()
+                if board:
+                    if not self._crates_recorded([board[0]]): return None
+                    filters = dict(self._board_filter(*board), channel=(self.hv_ch_start.value(), self.hv_ch_end.value()))
+                    specs.append(make_spec('HV_DATA', ['vmon', 'imon'], start_date, end_date, series=['channel'], filters=filters))
             elif query == "HV_TEMP_QUERY":
-                selected_slots = [slot for slot, checkbox in self.slot_checkboxes.items() if checkbox.isChecked()]
-                if not selected_slots:
+                self.temp_boards = [board for board, checkbox in self.slot_checkboxes.items() if checkbox.isChecked()]
+                if not self.temp_boards:
                     QMessageBox.warning(self, "Warning", "Please select at least one slot to plot.")
-                    self._on_analysis_finished()
-                    return
-                placeholders = ', '.join(['?'] * len(selected_slots))
-                final_query = f"SELECT DISTINCT `datetime`, `slot`, `board_temp` FROM HV_DATA WHERE `slot` IN ({placeholders}) AND `datetime` BETWEEN ? AND ?"
-                queries.append(final_query)
-                params.append(selected_slots + [start_date, end_date])
+                    return None
+                if not self._crates_recorded([crate for crate, _ in self.temp_boards]): return None
+                filters = {'slot': sorted({slot for _, slot in self.temp_boards})}
+                if self._crate_keyed(): filters['crate'] = sorted({crate for crate, _ in self.temp_boards})
+                specs.append(make_spec('HV_DATA', ['board_temp'], start_date, end_date,
+                                       series=['crate', 'slot'] if self._crate_keyed() else ['slot'], filters=filters, distinct=True))
             elif query == "PDU_QUERY":
                 selected_ports = [port for port, checkbox in self.pdu_port_checkboxes.items() if checkbox.isChecked()]
                 if not selected_ports:
                     QMessageBox.warning(self, "Warning", "Please select at least one PDU port to plot.")
-                    self._on_analysis_finished()
-                    return
-                placeholders = ', '.join(['?'] * len(selected_ports))
-                final_query = f"SELECT `datetime`, `port_idx`, `power_w`, `current_ma`, `energy_wh` FROM PDU_DATA WHERE `port_idx` IN ({placeholders}) AND `datetime` BETWEEN ? AND ?"
-                queries.append(final_query)
-                params.append(selected_ports + [start_date, end_date])
+                    return None
+                specs.append(make_spec('PDU_DATA', ['power_w', 'current_ma', 'energy_wh'], start_date, end_date,
+                                       series=['port_idx'], filters={'port_idx': selected_ports}))
             elif query: 
-                queries.append(f"{query} WHERE `datetime` BETWEEN ? AND ?")
-                params.append([start_date, end_date])
+                table, columns = query
+                specs.append(make_spec(table, columns, start_date, end_date))
 
         elif mode == "Correlation":
-            try: slot = int(self.corr_slot_combo.currentText())
-            except ValueError: 
-                self._on_analysis_finished()
-                return
-            ch_start = self.corr_ch_start.value()
-            ch_end = self.corr_ch_end.value()
-            start_date = self.corr_start_date_edit.date().toString("yyyy-MM-dd 00:00:00")
-            end_date = self.corr_end_date_edit.date().toString("yyyy-MM-dd 23:59:59")
-            
-            queries.append("SELECT `datetime`, `channel`, `vmon`, `imon` FROM HV_DATA WHERE `slot` = ? AND `channel` BETWEEN ? AND ? AND `datetime` BETWEEN ? AND ?")
-            params.append([slot, ch_start, ch_end, start_date, end_date])
-            
-            if slot == 1:
-                queries.append("SELECT `datetime`, (`RTD_1` + `RTD_2`) / 2 as temp FROM LS_DATA WHERE `datetime` BETWEEN ? AND ? AND `RTD_1` IS NOT NULL AND `RTD_2` IS NOT NULL")
+            channels = (self.corr_ch_start.value(), self.corr_ch_end.value())
+            if not self.corr_slot_combo.count(): return None
+            board = self.corr_slot_combo.currentData()
+            if board is None:
+                series, filters = (['crate', 'slot', 'channel'] if self._crate_keyed() else ['slot', 'channel']), {'channel': channels}
             else:
-                queries.append("SELECT `datetime`, `temperature` as temp FROM TH_O2_DATA WHERE `datetime` BETWEEN ? AND ? AND `temperature` IS NOT NULL")
-            params.append([start_date, end_date])
+                if not self._crates_recorded([board[0]]): return None
+                series, filters = ['channel'], dict(self._board_filter(*board), channel=channels)
+            sensors = [name for name, checkbox in self.corr_sensor_checkboxes.items() if checkbox.isChecked()]
+            if not sensors:
+                QMessageBox.warning(self, "Warning", "Please select at least one sensor to correlate with.")
+                return None
+            start_date = self.corr_start_date_edit.date().toString("yyyy-MM-dd 00:00:00")
+            end_date = self.corr_end_date_edit.date().addDays(1).toString("yyyy-MM-dd 00:00:00")
             
-        if queries:
-            self.analysis_thread = AnalysisWorker(self.db_pool, self.config.get('database', {}), queries, params)
-            self.analysis_thread.analysis_complete.connect(self._plot_analysis_data)
-            self.analysis_thread.error_occurred.connect(lambda e: global_bus.system_log_message.emit("ERROR", e))
-            self.analysis_thread.finished.connect(self._on_analysis_finished)
-            self.analysis_thread.start()
-        else:
+            param = self.corr_param_combo.currentText().lower()
+            specs.append(make_spec('HV_DATA', [param], start_date, end_date, series=series, filters=filters))
+            # 같은 테이블의 센서는 한 번의 조회로 묶는다.
+            by_table = {}
+            for name in sensors:
+                table, column = self.CORRELATION_SENSORS[name]
+                by_table.setdefault(table, []).append(column)
+            for table, columns in by_table.items():
+                specs.append(make_spec(table, columns, start_date, end_date))
+        return specs
+
+    def _start_worker(self, specs, on_complete, post=None):
+        # 이전 조회가 아직 실행 중이면 서비스가 DB 측에서 중단시키고 새 조회로 대체한다.
+        self.plot_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        # 처리기를 먼저 등록해 두어야 바로 끝나는 작업의 결과도 받는다.
+        self.current_job = self.analysis_service.reserve_id()
+        self._job_handlers[self.current_job] = on_complete
+        try:
+            self.analysis_service.submit('analysis_panel', specs, job_id=self.current_job, post=post)
+        except Exception as e:
+            self._job_handlers.pop(self.current_job, None)
+            self.current_job = None
             self._on_analysis_finished()
+            QMessageBox.critical(self, "Error", f"Data analysis failed: {e}")
+
+    def _on_job_finished(self, job_id, owner, results):
+        if job_id not in (self.current_job, self.export_job): return
+        handler = self._job_handlers.pop(job_id, None)
+        if handler: handler(results)
+
+    def _on_job_partial(self, job_id, idx, cols):
+        if job_id == self.current_job: self._on_partial_result(idx, cols)
+
+    def _on_job_progress(self, job_id, n):
+        if job_id == self.current_job: self.plot_button.setText(f"Loading... {n:,} rows")
+        elif job_id == self.export_job: self.export_button.setText(f"Cancel Export ({n:,} rows)")
+
+    def _on_job_truncated(self, job_id, max_rows):
+        if job_id in (self.current_job, self.export_job): self._on_result_truncated(max_rows)
+
+    def _on_job_failed(self, job_id, message):
+        if job_id in (self.current_job, self.export_job): global_bus.system_log_message.emit("ERROR", message)
+
+    def _on_job_done(self, job_id, status):
+        self._job_handlers.pop(job_id, None)
+        if job_id == self.current_job:
+            self.current_job = None
+            self._on_analysis_finished()
+        elif job_id == self.export_job:
+            self.export_job = None
+            self.export_button.setText("Export Data")
+            self.export_button.setEnabled(True)
+            if status == 'cancelled': global_bus.system_log_message.emit("WARNING", "Data export cancelled. Partial file removed.")
+
+    def _board_label(self, crate, slot):
+        """보드 표시 이름. 크레이트가 하나면 기존처럼 슬롯 번호만 쓴다."""
+        return hv_board_label(self.config.get('caen_hv', {}), crate, slot) if self.multi_crate else str(slot)
+
+    def _crate_keyed(self):
+        """HV 조회에 crate 조건/계열을 넣을지. 다중 크레이트 구성이어도 migrate_schema.py 전의 DB 에는 crate 컬럼이 없다 (AnalysisService 가 기동 시 확인)."""
+        return self.multi_crate and self.analysis_service.hv_crate_column
+
+    def _crates_recorded(self, crates):
+        """crate 컬럼이 없는 DB 에는 크레이트 0 만 기록되므로, 다른 크레이트를 고르면 경고하고 False."""
+        if self._crate_keyed() or not self.multi_crate or all(crate == 0 for crate in crates): return True
+        QMessageBox.warning(self, "Warning", "The HV database has no 'crate' column, so only crate 0 is recorded.\n"
+                                             "Run 'python migrate_schema.py' to store and query multiple crates.")
+        return False
+
+    def _board_filter(self, crate, slot):
+        return {'crate': crate, 'slot': slot} if self._crate_keyed() else {'slot': slot}
+
+    def _series(self, cols, key, col, label_fn):
+        """
+        키(채널/슬롯/포트)별 시리즈 모델을 {컬럼: 배열} 결과에서 바로 만든다 (DataFrame 을 거치지 않음).
+        버킷 집계 결과라면 최소/최대 구간을 함께 담는다.
+        """
+        ts = cols['datetime']
+        if key is None:
+            order = np.argsort(ts, kind='stable')
+            groups = [(None, order)]
+        else:
+            keys = cols[key]
+            order = np.lexsort((ts, keys))
+            uniq, starts = np.unique(keys[order], return_index=True)
+            groups = zip(uniq, np.split(order, starts[1:]))
+        x_all = to_epoch(ts)
+        y_all = to_float_array(cols[col])   # 정수 컬럼의 NULL(INT_NULL) 은 NaN 으로 그린다.
+        series = []
+        for key_val, idx in groups:
+            s = {'name': label_fn(key_val), 'x': x_all[idx], 'y': y_all[idx], 'lo': None, 'hi': None}
+            if f"{col}_min" in cols:
+                s['lo'] = cols[f"{col}_min"][idx]
+                s['hi'] = cols[f"{col}_max"][idx]
+            series.append(s)
+        return series
+
+    def _on_view_range_changed(self, x0, x1):
+        """줌/팬이 멈추면 보이는 구간에 맞는 버킷으로 다시 받아온다 (캐시에 있으면 DB 를 거치지 않는다)."""
+        if self.analysis_mode_combo.currentText() != "Time Series" or not self.last_raw_specs or self.query_range is None: return
+        if self.current_job is not None: return
+        fmt = lambda x: time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(x))
+        start = max(fmt(x0), self.query_range[0])
+        end = min(fmt(x1), self.query_range[1])
+        if start >= end: return
+        table = self.last_raw_specs[0]['table']
+        bucket = compute_bucket_seconds(start, end, self.history_viewer.view_width(), table)
+        loaded_start, loaded_end = self.loaded_range
+        if bucket == self.last_bucket_s and loaded_start <= start and end <= loaded_end: return
 
-    def _plot_analysis_data(self, dfs):
-        if not dfs or any(df.empty for df in dfs):
-            QMessageBox.warning(self, "Warning", "No data found for the selected period.")
+        # 보이는 구간 양옆으로 절반씩 더 받아 두어 작은 팬 이동마다 다시 조회하지 않게 한다.
+        pad = (x1 - x0) / 2
+        start = max(fmt(x0 - pad), self.query_range[0])
+        end = min(fmt(x1 + pad), self.query_range[1])
+        self.last_bucket_s = bucket
+        self.loaded_range = (start, end)
+        self.zoomed = True
+        specs = [dict(spec, start=start, end=end, bucket_s=bucket) for spec in self.last_raw_specs]
+        self._start_worker(specs, lambda dfs: self._plot_analysis_data(dfs, "Time Series", keep_view=True))
+
+    def _on_partial_result(self, idx, cols):
+        # 시계열(명세 1개)만 도착하는 대로 다시 그린다. 상관 분석은 두 결과가 모두 있어야 의미가 있다.
+        if idx != 0 or len(cols['datetime']) == 0 or len(self.last_raw_specs) != 1: return
+        if self.job_mode != "Time Series": return
+        self._plot_analysis_data([cols], "Time Series", partial=True, keep_view=self.zoomed)
+
+    def _on_result_truncated(self, max_rows):
+        global_bus.system_log_message.emit("WARNING", f"History query stopped at {max_rows:,} rows. Narrow the date range or channel selection.")
+
+    def _cancel_analysis(self):
+        self.cancel_button.setEnabled(False)
+        self.analysis_service.cancel('analysis_panel')
+
+    def _plot_analysis_data(self, results, mode, partial=False, keep_view=False):
+        if mode == "Correlation":
+            self._show_correlation_result(results[0])
+            return
+        if not results or any(len(cols['datetime']) == 0 for cols in results):
+            if not keep_view: QMessageBox.warning(self, "Warning", "No data found for the selected period.")
             return
         
-        self.last_analysis_df = dfs[0]
-        self.analysis_canvas.figure.clear()
-        mode = self.analysis_mode_combo.currentText()
-        fig = self.analysis_canvas.figure
+        self.last_analysis_df = None
         
         if mode == "Time Series":
             analysis_type = self.analysis_combo.currentText()
-            fig.suptitle(f"Time Series Analysis of {analysis_type}", fontsize=16)
-            df = dfs[0]
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            ax = fig.add_subplot(111)
+            title = f"Time Series Analysis of {analysis_type}{' (loading...)' if partial else ''}"
+            df = results[0]
+            plots = []
             
-            if "HV Voltage (VMon)" in analysis_type:
-                df_pivot = df.pivot(index='datetime', columns='channel', values='vmon')
-                df_pivot.plot(ax=ax, marker='.', linestyle='-', markersize=2)
-                ax.set_ylabel("Voltage (VMon)")
-            elif "HV Current (IMon)" in analysis_type:
-                df_pivot = df.pivot(index='datetime', columns='channel', values='imon')
-                df_pivot.plot(ax=ax, marker='.', linestyle='-', markersize=2)
-                ax.set_ylabel("Current (IMon, uA)")
+            if "HV Voltage (VMon)" in analysis_type or "HV Current (IMon)" in analysis_type:
+                # VMon/IMon 은 같은 행에서 오므로 두 서브플롯을 시간 축으로 연동해 함께 보여준다.
+                v_plot = {'title': "VMon", 'y_label': "Voltage (V)", 'series': self._series(df, 'channel', 'vmon', lambda ch: f"Ch {ch}")}
+                i_plot = {'title': "IMon", 'y_label': "Current (uA)", 'series': self._series(df, 'channel', 'imon', lambda ch: f"Ch {ch}")}
+                plots = [v_plot, i_plot] if "VMon" in analysis_type else [i_plot, v_plot]
             elif "HV Board Temperature" in analysis_type:
-                df.set_index('datetime', inplace=True)
-                for slot in df['slot'].unique(): 
-                    slot_df = df[df['slot'] == slot]
-                    ax.plot(slot_df.index, slot_df['board_temp'], marker='.', linestyle='-', markersize=2, label=f'Slot {slot}')
-                ax.set_ylabel("Temperature (C)")
+                if 'crate' in df:
+                    # 크레이트 × 슬롯 조합으로 조회했으므로 고른 보드만 남기고 보드 번호 하나로 묶는다.
+                    code = df['crate'].astype(np.int64) * 1000 + df['slot']
+                    keep = np.isin(code, [c * 1000 + s for c, s in self.temp_boards])
+                    df = dict({k: v[keep] for k, v in df.items()}, board=code[keep])
+                    series = self._series(df, 'board', 'board_temp', lambda b: f"Slot {self._board_label(b // 1000, b % 1000)}")
+                else:
+                    series = self._series(df, 'slot', 'board_temp', lambda slot: f"Slot {slot}")
+                plots = [{'title': None, 'y_label': "Temperature (C)", 'series': series}]
             elif "PDU" in analysis_type:
                 if "Power (W)" in analysis_type: value_col = 'power_w'; y_label = "Power (W)"
                 elif "Current (mA)" in analysis_type: value_col = 'current_ma'; y_label = "Current (mA)"
                 elif "Energy (Wh)" in analysis_type: value_col = 'energy_wh'; y_label = "Energy (Wh)"
                 else: return 
-                ax.set_ylabel(y_label)
-                df_pivot = df.pivot_table(index='datetime', columns='port_idx', values=value_col, aggfunc='mean')
                 port_map = self.config.get('netio_pdu', {}).get('port_map', {})
-                rename_dict = {k: port_map.get(str(k), f"Port {k}") for k in df_pivot.columns}
-                df_pivot.rename(columns=rename_dict, inplace=True)
-                self.last_analysis_df = df_pivot.reset_index()
-                df_pivot.plot(ax=ax, marker='.', linestyle='-', markersize=2)
+                plots = [{'title': None, 'y_label': y_label, 'series': self._series(df, 'port_idx', value_col, lambda k: port_map.get(str(k), f"Port {k}"))}]
             else:
-                df.set_index('datetime', inplace=True)
                 y_label = analysis_type[analysis_type.find("(")+1:analysis_type.find(")")] if "(" in analysis_type else ""
-                ax.set_ylabel(y_label)
-                for col in df.columns:
-                    if col != 'status': 
-                        ax.plot(df.index, df[col], marker='o', linestyle='-', markersize=2, label=col)
-            ax.legend()
-            ax.grid(True)
-            
-        elif mode == "Correlation":
-            df_hv = dfs[0]
-            df_temp = dfs[1]
-            df_hv['datetime'] = pd.to_datetime(df_hv['datetime'])
-            df_temp['datetime'] = pd.to_datetime(df_temp['datetime'])
-            merged_df = pd.merge_asof(df_hv.sort_values('datetime'), df_temp.sort_values('datetime'), on='datetime', direction='nearest', tolerance=pd.Timedelta('10min'))
-            merged_df.dropna(inplace=True)
-            self.last_analysis_df = merged_df
-            
-            param = self.corr_param_combo.currentText().lower()
-            slot = self.corr_slot_combo.currentText()
-            temp_name = "LS Temp" if int(slot) == 1 else "TH/O2 Temp"
-            
-            fig.suptitle(f"Correlation of Slot {slot} {param.upper()} vs {temp_name}", fontsize=16)
-            ax = fig.add_subplot(111)
-            for channel in merged_df['channel'].unique(): 
-                channel_df = merged_df[merged_df['channel'] == channel]
-                ax.scatter(channel_df['temp'], channel_df[param], alpha=0.5, label=f'Ch {channel}')
-            ax.set_xlabel(f"{temp_name} (C)")
-            ax.set_ylabel(f"{param.upper()} ({'V' if 'v' in param else 'uA'})")
-            ax.grid(True)
-            ax.legend(title='Channel')
-            
-            if len(merged_df) > 1:
-                m, b = np.polyfit(merged_df['temp'], merged_df[param], 1)
-                ax.plot(merged_df['temp'], m * merged_df['temp'] + b, color='red', linewidth=2, linestyle='--', label='Overall Trend')
-                corr = merged_df['temp'].corr(merged_df[param])
-                ax.text(0.05, 0.95, f'Overall Trend:\ny = {m:.3f}x + {b:.2f}\nr = {corr:.3f}', transform=ax.transAxes, fontsize=10, verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-                
-        fig.autofmt_xdate()
-        fig.tight_layout(rect=[0, 0.03, 1, 0.95])
-        self.analysis_canvas.draw()
+                value_cols = [c for c in df if c not in ('datetime', 'status') and not c.endswith(('_min', '_max'))]
+                if analysis_type in self.SPLIT_PLOT_TYPES:
+                    # 단위가 서로 다른 컬럼은 서브플롯을 나누고 시간 축만 연동한다.
+                    plots = [{'title': c, 'y_label': c, 'series': self._series(df, None, c, lambda _, c=c: c)} for c in value_cols]
+                else:
+                    series = [s for c in value_cols for s in self._series(df, None, c, lambda _, c=c: c)]
+                    plots = [{'title': None, 'y_label': y_label, 'series': series}]
+            self.last_model = {'kind': 'timeseries', 'title': title.replace(' (loading...)', ''), 'plots': plots}
+            self.history_viewer.show_model(dict(self.last_model, title=title), keep_view=keep_view)
+
+    def _correlation_task(self, raw_specs, step_s):
+        """
+        상관 분석 계산(격자 정렬, 일괄 회귀/상관, FFT 지연 스캔, 요약 표)을 AnalysisService 풀에서 실행할 함수를 만든다.
+        위젯 상태는 여기서 미리 읽어 두고, 반환한 함수는 조회 결과만 받아 [결과 | {'warning': 메시지}] 를 돌려준다.
+        """
+        hv_spec = raw_specs[0]
+        param, keys = hv_spec['columns'][0], hv_spec['series']
+        caen_config = self.config.get('caen_hv', {})
+        if len(keys) == 3: label = lambda k: f"{hv_board_label(caen_config, k[0], k[1])} Ch{k[2]}"
+        else: label = (lambda k: f"S{k[0]} Ch{k[1]}") if len(keys) == 2 else (lambda k: f"Ch {k}")
+        sensor_columns = [[(name, column) for name, (table, column) in self.CORRELATION_SENSORS.items()
+                           if table == spec['table'] and column in spec['columns']] for spec in raw_specs[1:]]
+        max_lag_s = self.config.get('analysis', {}).get('correlation_max_lag_s', 21600)
+        target = "All Slots" if len(keys) >= 2 else f"Slot {hv_spec['filters']['slot']}"
+
+        def compute(results):
+            if not results or len(results[0]['datetime']) == 0: return [{'warning': "No data found for the selected period."}]
+            targets = [(label(k), t, y) for k, t, y in split_series(results[0], keys, param)]
+            sensors = [(name, t, y) for cols, columns in zip(results[1:], sensor_columns)
+                       for name, column in columns for _, t, y in split_series(cols, [], column)]
+            if not sensors: return [{'warning': "No sensor data found for the selected period."}]
+            result = correlate(targets, sensors, step_s, max_lag_s)
+            result.update(param=param, max_lag_s=max_lag_s, target=target)
+            p, k = len(sensors), len(targets)
+            result['table'] = pd.DataFrame({
+                'target': np.tile(result['target_names'], p), 'sensor': np.repeat(result['sensor_names'], k),
+                'slope': result['slope'].ravel(), 'intercept': result['intercept'].ravel(), 'r': result['r'].ravel(),
+                'n': result['n'].ravel(), 'best_lag_s': result['best_lag_s'].ravel(), 'r_at_best_lag': result['best_lag_r'].ravel()
+            })
+            return [result]
+        return compute
+
+    def _show_correlation_result(self, result):
+        """풀에서 계산된 상관 분석 결과를 받아 요약 표를 보관하고 현재 보기로 그린다."""
+        self.last_analysis_df = None
+        if 'warning' in result:
+            QMessageBox.warning(self, "Warning", result['warning'])
+            return
+        self.last_correlation = result
+        self.last_analysis_df = result['table']
+        self._show_correlation()
+
+    def _show_correlation(self):
+        res = self.last_correlation
+        if res is None or self.analysis_mode_combo.currentText() != "Correlation": return
+        view = self.corr_view_combo.currentText()
+        param = res['param'].upper()
+        unit = 'V' if param == 'VMON' else 'uA'
+        title = f"Correlation of {res['target']} {param} ({len(res['target_names'])} ch, {res['step_s']} s grid)"
+
+        if view == "Scatter":
+            # 첫 번째 센서 기준 채널별 산점도 + 전체를 한 번에 맞춘 추세선
+            x = res['S'][:, 0]
+            groups = []
+            for j, name in enumerate(res['target_names']):
+                ok = np.isfinite(x) & np.isfinite(res['T'][:, j])
+                groups.append({'name': name, 'x': x[ok], 'y': res['T'][ok, j]})
+            xs = np.concatenate([g['x'] for g in groups]); ys = np.concatenate([g['y'] for g in groups])
+            fit = regress(xs[:, None], ys[:, None])
+            trend = (fit['slope'][0, 0], fit['intercept'][0, 0], fit['r'][0, 0]) if np.isfinite(fit['r'][0, 0]) else None
+            self.last_model = {
+                'kind': 'scatter', 'title': f"{title} vs {res['sensor_names'][0]}",
+                'x_label': res['sensor_names'][0], 'y_label': f"{param} ({unit})", 'groups': groups, 'trend': trend
+            }
+        else:
+            x_labels, y_labels = res['target_names'], res['sensor_names']
+            if view == "Heatmap (r)":
+                values, levels, value_label = res['r'], (-1.0, 1.0), "r"
+            elif view == "Heatmap (slope)":
+                values = res['slope']
+                bound = float(np.nanmax(np.abs(values))) if np.isfinite(values).any() else 1.0
+                levels, value_label = (-bound, bound), f"slope ({unit} / sensor unit)"
+            elif view == "Heatmap (lag)":
+                bound = max(res['max_lag_s'] / 60.0, 1.0)
+                values = np.where(np.isfinite(res['best_lag_r']), res['best_lag_s'] / 60.0, np.nan)
+                levels, value_label = (-bound, bound), "best lag (min, + = channel follows sensor)"
+            else:
+                x_labels = y_labels = res['sensor_names'] + res['target_names']
+                values, levels, value_label = res['matrix'], (-1.0, 1.0), "r"
+            self.last_model = {
+                'kind': 'heatmap', 'title': f"{title} - {view}", 'x_label': "Channel" if view.startswith("Heatmap") else "",
+                'y_label': "Sensor" if view.startswith("Heatmap") else "", 'x_labels': x_labels, 'y_labels': y_labels,
+                'values': values, 'levels': levels, 'value_label': value_label
+            }
+        self.history_viewer.show_model(self.last_model)
+
+    def _export_png(self):
+        if self.last_model is None: return
+        path, _ = QFileDialog.getSaveFileName(self, "Save PNG File", f"analysis_{time.strftime('%Y%m%d_%H%M%S')}.png", "PNG Files (*.png)")
+        if not path: return
+        try:
+            render_png(self.last_model, path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"PNG export failed: {e}")
 
     def _export_analysis_data(self):
-        if self.last_analysis_df is None or self.last_analysis_df.empty: return
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV File", f"export_{time.strftime('%Y%m%d_%H%M%S')}.csv", "CSV Files (*.csv)")
-        if path: self.last_analysis_df.to_csv(path, index=False)
+        # 내보내기가 진행 중이면 같은 버튼이 취소 버튼 역할을 한다.
+        if self.export_job is not None:
+            self.export_button.setEnabled(False)
+            self.analysis_service.cancel('analysis_export')
+            return
+        mode = self.analysis_mode_combo.currentText()
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        if mode == "Correlation" and self.last_analysis_df is not None:
+            # 상관 분석은 계산된 채널×센서 요약 표를 저장한다.
+            path, _ = QFileDialog.getSaveFileName(self, "Save CSV File", f"correlation_{stamp}.csv", "CSV Files (*.csv)")
+            if path: self.last_analysis_df.to_csv(path, index=False)
+            return
+        if not self.analysis_service.available:
+            QMessageBox.critical(self, "Error", "DB pool not available.")
+            return
+        # [핵심] 그래프를 먼저 그릴 필요 없이, 현재 선택한 조건의 원본 행을 DB 커서에서 청크씩 받아 파일에 바로 쓴다.
+        specs = self._build_specs(mode)
+        if not specs: return
+        path, selected = QFileDialog.getSaveFileName(self, "Export Data", f"export_{stamp}.csv",
+                                                     "CSV Files (*.csv);;Parquet Files (*.parquet);;Compressed NumPy (*.npz)")
+        if not path: return
+        if export_format(path) is None:
+            path += next((ext for ext in EXPORT_FORMATS if ext[1:] in selected.lower()), '.csv')
+        stem, ext = os.path.splitext(path)
+        # 명세가 여럿(상관 분석의 HV + 센서 테이블)이면 테이블별 파일로 나눈다.
+        paths = [path] if len(specs) == 1 else [f"{stem}_{spec['table']}{ext}" for spec in specs]
+        self.export_job = self.analysis_service.reserve_id()
+        self._job_handlers[self.export_job] = lambda written: global_bus.system_log_message.emit(
+            "INFO", "Exported " + ", ".join(f"{w['rows']:,} rows to {w['path']}" for w in written))
+        self.export_button.setText("Cancel Export")
+        try:
+            self.analysis_service.submit_export('analysis_export', specs, paths, job_id=self.export_job)
+        except Exception as e:
+            self._job_handlers.pop(self.export_job, None)
+            self.export_job = None
+            self.export_button.setText("Export Data")
+            QMessageBox.critical(self, "Error", f"Export failed: {e}")
 
     def _on_analysis_finished(self):
         self.plot_button.setEnabled(True)
-        self.plot_button.setText("Plot Data")
\ No newline at end of file
+        self.plot_button.setText("Plot Data")
+        self.cancel_button.setEnabled(False)
\ No newline at end of file
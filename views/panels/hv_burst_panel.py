@@ -0,0 +1,149 @@
+# views/panels/hv_burst_panel.py
+
+import pyqtgraph as pg
+from datetime import datetime
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QFormLayout, QComboBox,
+                             QLineEdit, QDoubleSpinBox, QPushButton, QLabel, QMessageBox, QFileDialog)
+from PyQt6.QtCore import pyqtSlot
+from core.event_bus import global_bus
+from core.hv_burst import parse_channel_spec
+from core.app_config import hv_mainframes, hv_board_label
+
+
+class HVBurstPanel(QWidget):
+    """
+    [HV 버스트 캡처 패널]
+    선택 채널("1:0-3 4:7" 형식)의 IMon/VMon 을 정해진 시간 동안 고속으로 읽게 하고(cmd_hv_burst),
+    StateStore 의 버스트 링 버퍼를 버스트 시작 기준 초 단위로 그린다. 자동 트리거 버스트도 같은 화면에 나온다.
+    버퍼는 크레이트마다 따로 있으며, 선택한 크레이트의 버스트를 보여 준다.
+    """
+    def __init__(self, caen_config, state_store):
+        super().__init__()
+        self.caen_config = caen_config
+        self.state_store = state_store
+        self.mainframes = hv_mainframes(caen_config)
+        self.burst_cfg = caen_config.get('burst', {})
+        self.curves = []
+        self.curve_key = None      # 곡선을 만든 버스트 (crate, id)
+        self._init_ui()
+        global_bus.ui_update_requested.connect(self._on_update)
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        control_group = QGroupBox("Burst Capture")
+        control_layout = QFormLayout(control_group)
+        self.combo_crate = QComboBox()
+        for mf in self.mainframes: self.combo_crate.addItem(mf['name'], mf['crate'])
+        self.combo_crate.currentIndexChanged.connect(self._on_crate_changed)
+        self.edit_channels = QLineEdit()
+        self.edit_channels.setPlaceholderText("slot:channels, e.g. 0:0-3 2:5,7")
+        self.spin_duration = QDoubleSpinBox()
+        self.spin_duration.setRange(1, 3600)
+        self.spin_duration.setSuffix(" s")
+        self.spin_duration.setValue(self.burst_cfg.get('duration_s', 10))
+
+        btn_start = QPushButton("Start Burst")
+        btn_start.setStyleSheet("background-color: #27AE60; color: white;")
+        btn_start.clicked.connect(self._start_burst)
+        btn_stop = QPushButton("Stop")
+        btn_stop.setStyleSheet("background-color: #C0392B; color: white;")
+        btn_stop.clicked.connect(lambda: global_bus.cmd_hv_burst.emit({'action': 'stop', 'crate': self.combo_crate.currentData()}))
+        self.btn_export = QPushButton("Export...")
+        self.btn_export.setEnabled(False)
+        self.btn_export.clicked.connect(self._export)
+        buttons = QHBoxLayout()
+        buttons.addWidget(btn_start); buttons.addWidget(btn_stop); buttons.addWidget(self.btn_export)
+
+        auto = self.burst_cfg.get('auto', {})
+        auto_text = f"IMon > {auto.get('imon_threshold_ua')} uA" if auto.get('enabled') else "off"
+        self.lbl_status = QLabel(f"No burst captured yet (auto trigger: {auto_text})")
+
+        if len(self.mainframes) > 1: control_layout.addRow("Crate:", self.combo_crate)
+        control_layout.addRow("Channels:", self.edit_channels)
+        control_layout.addRow("Duration:", self.spin_duration)
+        control_layout.addRow(buttons)
+        control_layout.addRow(self.lbl_status)
+        layout.addWidget(control_group)
+
+        plots = QHBoxLayout()
+        self.v_plot = pg.PlotWidget(title="Burst - Voltage (VMon)")
+        self.i_plot = pg.PlotWidget(title="Burst - Current (IMon)")
+        for p, y_label in [(self.v_plot, "Voltage (V)"), (self.i_plot, "Current (uA)")]:
+            p.setBackground('w')
+            p.addLegend()
+            p.showGrid(x=True, y=True, alpha=0.3)
+            p.getAxis('bottom').setLabel("Time since burst start (s)")
+            p.getAxis('left').setLabel(y_label)
+            plots.addWidget(p)
+        layout.addLayout(plots, 1)
+
+    def _start_burst(self):
+        try:
+            channels = parse_channel_spec(self.edit_channels.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Burst", f"Invalid channel list: {e}")
+            return
+        if not channels:
+            QMessageBox.warning(self, "Burst", "Select at least one channel.")
+            return
+        global_bus.cmd_hv_burst.emit({'action': 'start', 'crate': self.combo_crate.currentData(),
+                                      'channels': channels, 'duration_s': self.spin_duration.value()})
+
+    def _build_curves(self, burst):
+        # 버스트마다 채널 구성이 다르므로 새 버스트가 오면 곡선을 다시 만든다.
+        self.v_plot.clear(); self.i_plot.clear()
+        self.curves = []
+        colors = pg.colormap.get('viridis').getLookupTable(nPts=max(len(burst.channels), 2))
+        for j, (crate, slot, ch) in enumerate(burst.channels):
+            name = f"{hv_board_label(self.caen_config, crate, slot)} CH{ch}"
+            pen = pg.mkPen(color=colors[j], width=2)
+            self.curves.append((self.v_plot.plot(pen=pen, name=name), self.i_plot.plot(pen=pen, name=name)))
+
+    def _current(self):
+        """선택한 크레이트의 (버퍼, 상태). 아직 버스트가 없으면 (None, None)."""
+        crate = self.combo_crate.currentData()
+        return self.state_store.hv_bursts.get(crate), self.state_store.hv_burst_info.get(crate)
+
+    def _on_crate_changed(self):
+        self.curve_key = None
+        self.v_plot.clear(); self.i_plot.clear()
+        self.curves = []
+        self.btn_export.setEnabled(False)
+        self.state_store.plot_dirty_flags['hv_burst'] = True
+        self._on_update()
+
+    @pyqtSlot()
+    def _on_update(self):
+        flags = self.state_store.plot_dirty_flags
+        if not flags.get('hv_burst'): return
+        flags['hv_burst'] = False
+        burst, info = self._current()
+        if burst is None: return
+        if info['key'] != self.curve_key:
+            self._build_curves(burst)
+            self.curve_key = info['key']
+        samples = burst.samples()
+        if len(samples):
+            t = samples[:, 0] - samples[0, 0]
+            for j, (v_curve, i_curve) in enumerate(self.curves):
+                v_curve.setData(x=t, y=samples[:, 1 + 2 * j], connect='finite')
+                i_curve.setData(x=t, y=samples[:, 2 + 2 * j], connect='finite')
+        state = "done" if info['done'] else "running"
+        self.lbl_status.setText(f"Burst #{info['id']} ({info['trigger']}, {state}): {info['samples_total']} samples, "
+                                f"{info['rate_hz']:.1f} Hz, {len(burst.channels)} channels")
+        self.btn_export.setEnabled(True)
+
+    def _export(self):
+        burst, info = self._current()
+        if burst is None or not burst.count: return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Burst", f"hv_burst_{info['id']}_{datetime.now():%Y%m%d_%H%M%S}.csv",
+                                              "CSV Files (*.csv);;NumPy Files (*.npz)")
+        if not path: return
+        label = lambda crate, slot, ch: f"{hv_board_label(self.caen_config, crate, slot).replace('/', '_')}CH{ch}"
+        try:
+            n = burst.save(path, label)
+        except Exception as e:
+            QMessageBox.warning(self, "Export Error", f"Could not save burst:\n{e}")
+            return
+        QMessageBox.information(self, "Export", f"Saved {n} samples to {path}")
@@ -7,9 +7,12 @@ from PyQt6.QtCore import pyqtSlot
 from core.event_bus import global_bus
 
 class HVGraphPanel(QWidget):
-    def __init__(self, slot, num_channels, state_store):
+    def __init__(self, crate, slot, num_channels, state_store, label=None):
         super().__init__()
+        self.crate = crate
         self.slot = slot
+        self.label = label or f"Slot {slot}"
+        self.dirty_key = f"hv_slot_{crate}_{slot}"
         self.num_channels = num_channels
         self.state_store = state_store
         self.curves = []
@@ -18,8 +21,8 @@ class HVGraphPanel(QWidget):
 
     def _init_ui(self):
         layout = QHBoxLayout(self)
-        v_plot = pg.PlotWidget(title=f"Slot {self.slot} - Voltage (VMon)")
-        i_plot = pg.PlotWidget(title=f"Slot {self.slot} - Current (IMon)")
+        v_plot = pg.PlotWidget(title=f"{self.label} - Voltage (VMon)")
+        i_plot = pg.PlotWidget(title=f"{self.label} - Current (IMon)")
         
         for p, y_label in [(v_plot, "Voltage (V)"), (i_plot, "Current (uA)")]:
             p.setBackground('w')
@@ -43,8 +46,8 @@ class HVGraphPanel(QWidget):
     @pyqtSlot()
     def _on_update(self):
         flags = self.state_store.plot_dirty_flags
-        if flags.get(f"hv_slot_{self.slot}"):
-            unrolled = self.state_store.get_unrolled_hv_data(self.slot)
+        if flags.get(self.dirty_key):
+            unrolled = self.state_store.get_unrolled_hv_data(self.crate, self.slot)
             if unrolled is not None and len(unrolled) > 0:
                 v_idx = ~np.isnan(unrolled[:, 0])
                 c_data = unrolled[v_idx]
@@ -53,4 +56,4 @@ class HVGraphPanel(QWidget):
                         if ch < len(self.curves):
                             self.curves[ch]['v'].setData(x=c_data[:, 0], y=c_data[:, 1 + ch * 2], connect='finite')
                             self.curves[ch]['i'].setData(x=c_data[:, 0], y=c_data[:, 2 + ch * 2], connect='finite')
-            flags[f"hv_slot_{self.slot}"] = False
+            flags[self.dirty_key] = False
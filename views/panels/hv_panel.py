@@ -1,16 +1,22 @@
 # views/panels/hv_panel.py
 
+import os
+from datetime import datetime
 from PyQt6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QGroupBox, 
                              QFormLayout, QComboBox, QSpinBox, QDoubleSpinBox, 
-                             QPushButton, QCheckBox, QTextEdit, QLabel, QMessageBox)
+                             QPushButton, QCheckBox, QTextEdit, QLabel, QMessageBox, QFileDialog)
 from PyQt6.QtCore import Qt, pyqtSlot
 from core.event_bus import global_bus
-from datetime import datetime
+from core.hv_profile import load_profile, save_profile, profile_from_mirror, group_setpoints, channel_count
+from core.app_config import hv_boards, hv_board_label
 
 class HVPanel(QWidget):
-    def __init__(self, crate_map_keys):
+    def __init__(self, caen_config, state_store=None):
         super().__init__()
-        self.crate_map_keys = crate_map_keys
+        self.caen_config = caen_config
+        self.boards = [(crate, slot) for crate, _, slot, _ in hv_boards(caen_config)]
+        self.state_store = state_store
+        self.profile = None        # (이름, crate, {slot: {channel: {param: value}}})
         self._init_ui()
         self._connect_signals()
 
@@ -20,8 +26,9 @@ class HVPanel(QWidget):
         control_group = QGroupBox("HV Channel Control")
         control_layout = QFormLayout(control_group)
         
+        # 보드 선택: 항목 데이터가 (crate, slot) 이다.
         self.combo_slot = QComboBox()
-        self.combo_slot.addItems(self.crate_map_keys)
+        for crate, slot in self.boards: self.combo_slot.addItem(hv_board_label(self.caen_config, crate, slot), (crate, slot))
         
         ch_layout = QHBoxLayout()
         self.spin_ch_start = QSpinBox()
@@ -55,12 +62,31 @@ class HVPanel(QWidget):
         btn_off.setStyleSheet("background-color: #C0392B; color: white;")
         btn_off.clicked.connect(lambda: self._emit_power_cmd(False))
         
-        control_layout.addRow("Slot:", self.combo_slot)
+        control_layout.addRow("Board:", self.combo_slot)
         control_layout.addRow("Channels:", ch_layout)
         control_layout.addRow("Set Voltage (V0Set):", self.spin_v0)
         control_layout.addRow("Set Current (I0Set):", self.spin_i0)
         control_layout.addRow(btn_apply)
         control_layout.addRow(btn_on, btn_off)
+
+        # 셋포인트 프로파일: 채널별 전압(이득 맞춤 등)을 파일에서 읽어 한 번에 적용
+        profile_group = QGroupBox("Setpoint Profile")
+        profile_layout = QVBoxLayout(profile_group)
+        self.lbl_profile = QLabel("No profile loaded")
+        btn_load = QPushButton("Load Profile...")
+        btn_load.clicked.connect(self._load_profile)
+        self.btn_apply_profile = QPushButton("Apply Profile")
+        self.btn_apply_profile.setStyleSheet("background-color: #8E44AD; color: white;")
+        self.btn_apply_profile.setEnabled(False)
+        self.btn_apply_profile.clicked.connect(self._apply_profile)
+        btn_save = QPushButton("Save Current Setpoints...")
+        btn_save.setEnabled(self.state_store is not None)
+        btn_save.clicked.connect(self._save_current_profile)
+        profile_btns = QHBoxLayout()
+        profile_btns.addWidget(btn_load); profile_btns.addWidget(self.btn_apply_profile); profile_btns.addWidget(btn_save)
+        profile_layout.addWidget(self.lbl_profile)
+        profile_layout.addLayout(profile_btns)
+        control_layout.addRow(profile_group)
         
         log_group = QGroupBox("Control Status")
         log_layout = QVBoxLayout(log_group)
@@ -77,6 +103,19 @@ class HVPanel(QWidget):
 
     def _connect_signals(self):
         global_bus.hv_setpoints_ready.connect(self._on_setpoints_ready)
+        global_bus.hv_command_completed.connect(self._on_command_completed)
+
+    def _log(self, message, color="black"):
+        ts = datetime.now().strftime("%H:%M:%S")
+        self.log_text.append(f"<span style='color:{color};'>[{ts}] {message}</span>")
+
+    @pyqtSlot(dict)
+    def _on_command_completed(self, result):
+        board = hv_board_label(self.caen_config, result.get('crate', 0), result.get('slot'))
+        target = result.get('name') or f"{board}, Ch {result.get('channels')}"
+        status = "OK" if result.get('ok') else "FAILED"
+        self._log(f"{result.get('type')} [{target}] {status} ({result.get('latency_ms', 0.0):.0f} ms)",
+                  "green" if result.get('ok') else "red")
 
     def _on_single_check_changed(self, state):
         is_single = (state == Qt.CheckState.Checked.value)
@@ -87,12 +126,9 @@ class HVPanel(QWidget):
     def _on_ch_start_changed(self, val):
         if self.chk_single.isChecked():
             self.spin_ch_end.setValue(val)
-        # 슬롯/채널 변경 시 현재 셋포인트를 지식망에 요청
-        try:
-            slot = int(self.combo_slot.currentText())
-            global_bus.request_hv_setpoints.emit(slot, val)
-        except ValueError:
-            pass
+        # 보드/채널 변경 시 현재 셋포인트를 지식망에 요청
+        board = self.combo_slot.currentData()
+        if board: global_bus.request_hv_setpoints.emit(board[0], board[1], val)
 
     @pyqtSlot(dict)
     def _on_setpoints_ready(self, data):
@@ -100,46 +136,92 @@ class HVPanel(QWidget):
         self.spin_i0.setValue(data.get('I0Set', 0))
 
     def _emit_params_cmd(self):
-        try:
-            slot = int(self.combo_slot.currentText())
-            ch_start = self.spin_ch_start.value()
-            ch_end = self.spin_ch_end.value()
-        except ValueError: return
+        board = self.combo_slot.currentData()
+        if not board: return
+        crate, slot = board
+        label = self.combo_slot.currentText()
+        ch_start = self.spin_ch_start.value()
+        ch_end = self.spin_ch_end.value()
         
         v0 = self.spin_v0.value()
         i0 = self.spin_i0.value()
         
         reply = QMessageBox.question(
             self, 'Confirm Action', 
-            f"Apply V0Set={v0}V, I0Set={i0}uA to Slot {slot}, Channels {ch_start}-{ch_end}?", 
+            f"Apply V0Set={v0}V, I0Set={i0}uA to {label}, Channels {ch_start}-{ch_end}?", 
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
             QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
             channels = list(range(ch_start, ch_end + 1))
             cmd = {
-                'type': 'set_params', 'slot': slot, 
+                'type': 'set_params', 'crate': crate, 'slot': slot, 
                 'channels': channels, 'params': {'V0Set': v0, 'I0Set': i0}
             }
             global_bus.cmd_hv_control.emit(cmd)
 
     def _emit_power_cmd(self, state):
-        try:
-            slot = int(self.combo_slot.currentText())
-            ch_start = self.spin_ch_start.value()
-            ch_end = self.spin_ch_end.value()
-        except ValueError: return
+        board = self.combo_slot.currentData()
+        if not board: return
+        crate, slot = board
+        label = self.combo_slot.currentText()
+        ch_start = self.spin_ch_start.value()
+        ch_end = self.spin_ch_end.value()
         
         reply = QMessageBox.question(
             self, 'Confirm Action', 
-            f"Turn Power {'ON' if state else 'OFF'} for Slot {slot}, Channels {ch_start}-{ch_end}?", 
+            f"Turn Power {'ON' if state else 'OFF'} for {label}, Channels {ch_start}-{ch_end}?", 
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
             QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
             channels = list(range(ch_start, ch_end + 1))
             cmd = {
-                'type': 'set_power', 'slot': slot, 
+                'type': 'set_power', 'crate': crate, 'slot': slot, 
                 'channels': channels, 'value': state
             }
-            global_bus.cmd_hv_control.emit(cmd)
\ No newline at end of file
+            global_bus.cmd_hv_control.emit(cmd)
+
+    def _load_profile(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load HV Setpoint Profile", "", "Profiles (*.json *.csv)")
+        if not path: return
+        # 프로파일은 크레이트 하나의 셋포인트이며, 선택된 보드의 크레이트에 적용한다.
+        # 그 크레이트의 crate_map 으로 슬롯/채널과 보드 한계값을 불러오는 시점에 검사한다.
+        crate = self.combo_slot.currentData()[0] if self.boards else 0
+        crate_map = {slot: board for c, _, slot, board in hv_boards(self.caen_config) if c == crate}
+        try:
+            setpoints = load_profile(path, crate_map)
+        except Exception as e:
+            QMessageBox.warning(self, "Profile Error", f"Could not load profile:\n{e}")
+            return
+        name = os.path.splitext(os.path.basename(path))[0]
+        self.profile = (name, crate, setpoints)
+        n_calls = sum(len(calls) for calls in group_setpoints(setpoints).values())
+        self.lbl_profile.setText(f"'{name}': {channel_count(setpoints)} channels in {len(setpoints)} slots ({n_calls} grouped calls)")
+        self.btn_apply_profile.setEnabled(True)
+        self._log(f"Loaded profile '{name}' from {path}")
+
+    def _apply_profile(self):
+        if not self.profile: return
+        name, crate, setpoints = self.profile
+        boards = ', '.join(hv_board_label(self.caen_config, crate, slot) for slot in sorted(setpoints))
+        reply = QMessageBox.question(
+            self, 'Confirm Action',
+            f"Apply profile '{name}' to {channel_count(setpoints)} channels in {boards}?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            global_bus.cmd_hv_control.emit({'type': 'apply_profile', 'name': name, 'crate': crate, 'setpoints': setpoints})
+
+    def _save_current_profile(self):
+        crate = self.combo_slot.currentData()[0] if self.boards else 0
+        setpoints = profile_from_mirror(self.state_store.hv_mirror, crate=crate)
+        if not setpoints:
+            QMessageBox.information(self, "Profile", "No HV setpoints have been read yet.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save HV Setpoint Profile", f"hv_profile_{datetime.now():%Y%m%d}.json",
+                                              "JSON Files (*.json);;CSV Files (*.csv)")
+        if not path: return
+        save_profile(path, setpoints)
+        self._log(f"Saved current setpoints of {channel_count(setpoints)} channels to {path}")
@@ -0,0 +1,260 @@
+# workers/analysis_service.py
+
+import time
+import logging
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from PyQt6.QtCore import QObject, pyqtSignal
+from core.event_bus import global_bus
+from core.archive_store import ArchiveReader
+from core.history_cache import HistoryCache
+from core.history_query import fetch_cached, export_chunked, split_spec, concat_columns
+from core.export_writers import open_writer
+from workers.query_governor import QueryCancelled
+
+
+class _Job:
+    """하나의 조회 요청. 여러 하위 조각(part)으로 나뉘어 공유 풀에서 실행된다."""
+    def __init__(self, job_id, owner, specs, token, options):
+        self.id = job_id
+        self.owner = owner
+        self.specs = specs
+        self.token = token
+        self.partial = options.get('partial', True)
+        self.post = options.get('post')   # 결과를 받은 뒤 풀 스레드에서 이어서 할 계산 (results -> list)
+        self.lock = threading.Lock()
+        self.parts = {idx: [] for idx in range(len(specs))}
+        self.rows = {}
+        self.budget = 0            # 모든 조각이 함께 쓰는 남은 행 수 (lock 아래에서 줄인다)
+        self.remaining = 0
+        self.truncated = False
+        self.error = None
+        self.last_emit = {}
+        self.exported = None
+
+
+class AnalysisService(QObject):
+    """
+    [분석 작업 서비스]
+    프로그램 수명 동안 유지되는 하나의 스레드 풀에서 모든 패널(및 보고서 작업)의 이력 조회를 실행한다.
+    요청마다 작업 번호(job id)를 돌려주고, 같은 owner 의 새 요청이 들어오면 이전 작업은 취소(Supersede)되어
+    오래된 결과가 화면을 덮어쓰는 일이 없다. 결과 시그널에는 작업 번호가 실려 있어 수신 측은
+    자신이 기다리는 작업의 결과만 받아들이면 된다.
+    """
+    job_finished = pyqtSignal(int, str, list)       # (job_id, owner, 명세별 {컬럼: 배열} | 내보내기는 [{'path', 'rows'}])
+    job_partial = pyqtSignal(int, int, object)      # (job_id, 명세 번호, 지금까지 받은 {컬럼: 배열})
+    job_progress = pyqtSignal(int, int)             # (job_id, 누적 행 수)
+    job_truncated = pyqtSignal(int, int)            # (job_id, 행 수 한도)
+    job_failed = pyqtSignal(int, str)               # (job_id, 오류 메시지)
+    job_done = pyqtSignal(int, str)                 # (job_id, 'finished' | 'failed' | 'cancelled') — 항상 마지막에 1회
+
+    def __init__(self, query_governor, config):
+        super().__init__()
+        self.query_governor = query_governor
+        cfg = config.get('analysis', {})
+        self.chunk_rows = cfg.get('fetch_chunk_rows', 20000)
+        self.max_rows = cfg.get('max_rows', 2000000)
+        self.partial_interval_s = cfg.get('partial_emit_interval_s', 0.5)
+        self.export_statement_time_s = cfg.get('export_statement_time_s', 0)
+        self.compression = config.get('archive', {}).get('compression', 'zstd')
+        # [핵심] 풀 크기는 고정. 커넥션 동시 사용은 다시 QueryGovernor 의 한도로 제한된다.
+        self.max_parallel = max(query_governor.max_concurrent, 1)
+        self.pool = ThreadPoolExecutor(max_workers=cfg.get('max_workers', self.max_parallel + 2),
+                                       thread_name_prefix='analysis')
+
+        archive_cfg = config.get('archive', {})
+        self.archive_reader = ArchiveReader(archive_cfg['directory']) if archive_cfg.get('enabled') else None
+        cache_mb = cfg.get('cache_mb', 256)
+        self.cache = HistoryCache(cache_mb) if cache_mb > 0 else None
+        if self.cache:
+            # 마지막으로 커밋이 확인된 시각까지만 캐시에 담는다.
+            global_bus.metrics_updated.connect(self._on_metrics_updated)
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs = {}        # job_id -> _Job
+        self._current = {}     # owner -> job_id
+        self._closed = False
+        # [핵심] 스키마 차이(migrate_schema.py 전 DB)는 GUI 스레드가 아니라 풀에서 기동 시 한 번만 확인한다.
+        # 확인이 끝나기 전이나 확인하지 못했으면 HV_DATA 에 crate 컬럼이 없는 것으로 본다.
+        self.hv_crate_column = False
+        if self.query_governor.available: self.pool.submit(self._resolve_schema)
+
+    def _resolve_schema(self):
+        self.hv_crate_column = self.query_governor.has_column('HV_DATA', 'crate')
+
+    @property
+    def available(self):
+        return self.query_governor.available and not self._closed
+
+    def _on_metrics_updated(self, source, metrics):
+        if source == 'database': self.cache.set_watermark(metrics.get('flushed_through_ts'))
+
+    def reserve_id(self):
+        """
+        작업 번호를 미리 받는다. 수신 측이 결과 처리기를 등록한 뒤 submit(..., job_id=) 로 넘기면
+        곧바로 끝나는 작업의 결과도 놓치지 않는다.
+        """
+        return next(self._ids)
+
+    def _register(self, owner, specs, partial, job_id=None, post=None):
+        if self._closed: raise RuntimeError("Analysis service is shut down.")
+        job = _Job(job_id or next(self._ids), owner, specs, self.query_governor.new_token(owner), {'partial': partial, 'post': post})
+        with self._lock:
+            previous = self._current.get(owner)
+            self._current[owner] = job.id
+            self._jobs[job.id] = job
+        if previous is not None: self._cancel_job(previous)
+        return job
+
+    def submit(self, owner, specs, partial=True, job_id=None, post=None):
+        """
+        조회 작업을 등록하고 작업 번호를 돌려준다. 같은 owner 의 이전 작업은 취소된다.
+        post(results) 가 있으면 조회가 끝난 뒤 GUI 스레드가 아닌 풀 스레드에서 실행하고, 그 반환값(list)을 결과로 보낸다.
+        """
+        job = self._register(owner, specs, partial, job_id, post)
+        tasks = [(idx, part) for idx, spec in enumerate(specs) for part in split_spec(spec, self.max_parallel)]
+        job.remaining = len(tasks)
+        n_parts = {idx: sum(1 for i, _ in tasks if i == idx) for idx in range(len(specs))}
+        # [핵심] 행 수 한도는 조각별로 나누지 않고 작업 전체가 함께 쓴다. 빽빽한 날 하나가 한도를 다 써도 된다.
+        job.budget = self.max_rows
+
+        if not tasks:
+            self._finish(job); return job.id
+        for task_no, (idx, part) in enumerate(tasks):
+            future = self.pool.submit(self._run_part, job, task_no, idx, part, n_parts[idx] == 1)
+            future.add_done_callback(lambda f, idx=idx, task_no=task_no: self._part_done(job, task_no, idx, f))
+        return job.id
+
+    def submit_export(self, owner, specs, paths, job_id=None):
+        """
+        명세별로 DB 커서에서 청크씩 읽어 paths 의 파일(CSV/Parquet/npz)로 바로 기록하는 작업을 등록한다.
+        행 수 한도 없이 메모리는 청크 하나 분량만 쓰며, 진행 상황은 job_progress, 결과는 job_finished 로 알린다.
+        """
+        job = self._register(owner, specs, False, job_id)
+        job.remaining = 1
+        future = self.pool.submit(self._run_export, job, paths)
+        future.add_done_callback(lambda f: self._part_done(job, 0, None, f))
+        return job.id
+
+    def cancel(self, owner):
+        with self._lock:
+            job_id = self._current.get(owner)
+        if job_id is not None: self._cancel_job(job_id)
+
+    def _cancel_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None: self.query_governor.cancel_token(job.token)
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs: self.query_governor.cancel_token(job.token)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run_part(self, job, task_no, idx, spec, emit_partial):
+        if job.token.is_set(): return None, 'cancelled'
+
+        def on_chunk(buffer):
+            with job.lock:
+                job.rows[task_no] = buffer.n
+                total = sum(job.rows.values())
+            self.job_progress.emit(job.id, total)
+            now = time.monotonic()
+            if job.partial and emit_partial and now - job.last_emit.get(idx, 0.0) >= self.partial_interval_s:
+                job.last_emit[idx] = now
+                self.job_partial.emit(job.id, idx, buffer.view())
+
+        def take_rows(n):
+            with job.lock:
+                allowed = min(n, job.budget)
+                job.budget -= allowed
+            return allowed
+
+        with self.query_governor.connection(job.owner, job.token) as conn:
+            return fetch_cached(conn, spec, self.cache, self.archive_reader, self.chunk_rows,
+                                should_stop=job.token.is_set, on_chunk=on_chunk,
+                                on_abort=lambda: self.query_governor.abort(conn), take_rows=take_rows)
+
+    def _run_export(self, job, paths):
+        written, done = [], 0
+        for spec, path in zip(job.specs, paths):
+            writer = open_writer(path, spec, compression=self.compression)
+            try:
+                with self.query_governor.connection(job.owner, job.token, self.export_statement_time_s) as conn:
+                    rows, outcome = export_chunked(conn, spec, writer, self.archive_reader, self.chunk_rows,
+                                                   should_stop=job.token.is_set,
+                                                   on_chunk=lambda n, done=done: self.job_progress.emit(job.id, done + n),
+                                                   on_abort=lambda: self.query_governor.abort(conn))
+                if outcome == 'cancelled': raise QueryCancelled(f"Export for '{job.owner}' cancelled.")
+                writer.close()
+            except BaseException:
+                writer.abort()
+                raise
+            logging.info(f"Exported {rows} rows of {spec['table']} to {path}")
+            written.append({'path': path, 'rows': rows})
+            done += rows
+        return written, 'export'
+
+    def _part_done(self, job, task_no, idx, future):
+        try:
+            columns, outcome = future.result()
+        except (QueryCancelled, CancelledError):
+            # shutdown(cancel_futures=True) 로 시작도 못 한 조각도 취소로 센다.
+            columns, outcome = None, 'cancelled'
+        except Exception as e:
+            columns, outcome = None, 'failed'
+            with job.lock:
+                if job.error is None and not job.token.is_set(): job.error = e
+            # 한 조각이 실패하면 나머지 조각도 다음 청크 경계에서 멈추게 한다.
+            job.token.set()
+
+        with job.lock:
+            if outcome == 'export':
+                job.exported = columns
+            elif outcome in ('complete', 'truncated'):
+                job.parts[idx].append((task_no, columns))
+                job.truncated = job.truncated or outcome == 'truncated'
+            job.remaining -= 1
+            last = job.remaining == 0
+        if last: self._finish(job)
+
+    def _finish(self, job):
+        self.query_governor.release_token(job.owner, job.token)
+        with self._lock:
+            self._jobs.pop(job.id, None)
+            if self._current.get(job.owner) == job.id: del self._current[job.owner]
+
+        if job.error is not None:
+            logging.error(f"Analysis job {job.id} ({job.owner}) failed: {job.error}")
+            self.job_failed.emit(job.id, f"Data analysis error: {job.error}")
+            self.job_done.emit(job.id, 'failed')
+            return
+        if job.token.is_set():
+            logging.info(f"Analysis job {job.id} ({job.owner}) cancelled.")
+            self.job_done.emit(job.id, 'cancelled')
+            return
+
+        if job.exported is not None:
+            self.job_finished.emit(job.id, job.owner, job.exported)
+            self.job_done.emit(job.id, 'finished')
+            return
+
+        results = [concat_columns([c for _, c in sorted(job.parts[idx], key=lambda p: p[0])], spec)
+                   for idx, spec in enumerate(job.specs)]
+        if job.truncated:
+            logging.warning(f"Analysis job {job.id} ({job.owner}) truncated at {self.max_rows} rows in memory.")
+            self.job_truncated.emit(job.id, self.max_rows)
+        if job.post is not None:
+            try:
+                results = job.post(results)
+            except Exception as e:
+                logging.error(f"Analysis job {job.id} ({job.owner}) post-processing failed: {e}")
+                self.job_failed.emit(job.id, f"Data analysis error: {e}")
+                self.job_done.emit(job.id, 'failed')
+                return
+        self.job_finished.emit(job.id, job.owner, results)
+        self.job_done.emit(job.id, 'finished')
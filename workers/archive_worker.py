@@ -0,0 +1,56 @@
+# workers/archive_worker.py
+
+import logging
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
+from core.archive_store import ArchiveExporter
+
+class ArchiveWorker(QObject):
+    """
+    [콜드 데이터 아카이브 전문가]
+    주기적으로 마감된 일/월 파티션을 열 지향 압축 파일로 내보내고,
+    설정(purge_after_export)에 따라 검증이 끝난 오래된 행을 MariaDB 에서 덜어낸다.
+    """
+    status_update = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, db_pool, db_config, archive_config):
+        super().__init__()
+        self.db_pool = db_pool
+        self.db_config = db_config
+        self.archive_config = archive_config
+        self._is_running = True
+        self.exporter = ArchiveExporter(archive_config, self._get_connection)
+        self.export_timer = QTimer(self)
+        self.export_timer.timeout.connect(self.run_export)
+
+    def _get_connection(self):
+        conn = self.db_pool.get_connection()
+        conn.database = self.db_config['database']
+        return conn
+
+    @pyqtSlot()
+    def run(self):
+        if not self.db_pool: return
+        interval_h = self.archive_config.get('interval_h', 24)
+        self.export_timer.start(int(interval_h * 3600 * 1000))
+        logging.info(f"Archive worker started ({self.exporter.format}, every {interval_h} h).")
+        # 기동 직후 첫 내보내기는 DB 워커의 테이블 준비가 끝난 뒤에 수행한다.
+        QTimer.singleShot(60 * 1000, self.run_export)
+
+    @pyqtSlot()
+    def run_export(self):
+        if not self._is_running: return
+        try:
+            summary = self.exporter.export_closed_partitions()
+            if summary:
+                total = sum(n for _, _, n in summary)
+                self.status_update.emit(f"Archived {len(summary)} partitions ({total} rows).")
+        except Exception as e:
+            logging.error(f"Archive export error: {e}")
+            self.error_occurred.emit(f"Archive export error: {e}")
+
+    @pyqtSlot()
+    def stop(self):
+        self._is_running = False
+        self.export_timer.stop()
+        logging.info("Archive worker stopped.")
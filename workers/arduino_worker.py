@@ -70,14 +70,13 @@ class ArduinoWorker(QObject):
             self.samples = {key: [] for key in self.samples.keys()}
 
     def _enqueue_db_data(self, ts, data):
-        dt = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
         mapping = self.config.get('data_mapping', {})
         db_data = {col: None for col in self.db_cols}
         for key, val in data.items():
             if key in mapping and val is not None:
                 db_data[mapping[key]] = round(val, 2)
         
-        db_tuple = (dt, db_data.get('analog_1'), db_data.get('analog_2'), db_data.get('analog_3'), 
+        db_tuple = (ts, db_data.get('analog_1'), db_data.get('analog_2'), db_data.get('analog_3'), 
                     db_data.get('analog_4'), db_data.get('analog_5'), 
                     db_data.get('digital_status'), db_data.get('message'))
         self.data_queue.put({'type': 'ARDUINO', 'data': db_tuple})
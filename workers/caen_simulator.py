@@ -0,0 +1,229 @@
+# workers/caen_simulator.py (CAEN HV 메인프레임 시뮬레이터, 실험실 밖 개발/벤치마크용)
+
+import time
+import random
+import logging
+import threading
+from enum import Enum
+from types import SimpleNamespace
+import numpy as np
+
+# 보드 모델별 채널 수와 한계값 (V, uA)
+BOARD_MODELS = {
+    'A7030P': {'channels': 48, 'vmax': 3000.0, 'imax': 1000.0},
+    'A7435SN': {'channels': 24, 'vmax': 3500.0, 'imax': 3000.0},
+}
+
+# SY4527 채널 상태(CHSTATUS) 비트 (test_board.py 의 _ChStatusSY4527 과 같다)
+ON, RAMP_UP, RAMP_DOWN, OVERCURRENT, MAX_V, INT_TRIP = 0x0001, 0x0002, 0x0004, 0x0008, 0x0080, 0x0200
+
+SETTABLE = {'Pw', 'V0Set', 'I0Set', 'RUp', 'RDWn', 'Trip', 'SVMax'}
+READABLE = SETTABLE | {'VMon', 'IMon', 'Status'}
+
+
+class EventType(Enum):
+    PARAMETER = 0
+    KEEPALIVE = 3
+
+
+class _Board:
+    """보드 하나의 채널 상태. 모든 채널을 NumPy 배열로 한꺼번에 갱신한다."""
+    def __init__(self, model, channels, rng):
+        spec = BOARD_MODELS.get(model, {'channels': channels, 'vmax': 3000.0, 'imax': 1000.0})
+        n = channels or spec['channels']
+        self.model, self.n = model, n
+        self.vmax, self.imax = spec['vmax'], spec['imax']
+        self.pw = np.zeros(n, dtype=np.int64)
+        self.v0set = np.zeros(n); self.i0set = np.full(n, min(200.0, spec['imax']))
+        self.rup = np.full(n, 50.0); self.rdwn = np.full(n, 50.0)
+        self.trip_s = np.full(n, 1.0); self.svmax = np.full(n, spec['vmax'])
+        self.vmon = np.zeros(n)
+        self.load_mohm = rng.uniform(12.0, 18.0, n)   # PMT 분배기 저항 (MOhm)
+        self.spike_ua = np.zeros(n)                   # 주입된 과전류
+        self.over_s = np.zeros(n)                     # 과전류가 이어진 시간
+        self.tripped = np.zeros(n, dtype=bool)
+        self.temp = 30.0 + rng.uniform(-2.0, 2.0)
+
+    def advance(self, dt, rng, trip_prob):
+        target = np.where(self.pw == 1, np.minimum(self.v0set, self.svmax), 0.0)
+        step = np.where(target > self.vmon, self.rup, self.rdwn) * dt
+        self.vmon += np.clip(target - self.vmon, -step, step)
+        # 무작위 트립 주입: 켜진 채널에 I0Set 을 넘는 전류 스파이크를 건다.
+        if trip_prob > 0:
+            hit = (self.pw == 1) & (rng.random(self.n) < trip_prob * dt)
+            self.spike_ua[hit] = self.i0set[hit] * 1.5
+        imon = self.imon_true()
+        over = (self.pw == 1) & (imon > self.i0set)
+        self.over_s = np.where(over, self.over_s + dt, 0.0)
+        trip = over & (self.over_s >= self.trip_s)
+        if trip.any():
+            # 트립 = 출력 차단(Kill). 전원을 다시 켤 때까지 INT_TRIP 비트가 남는다.
+            self.pw[trip] = 0; self.vmon[trip] = 0.0; self.tripped[trip] = True
+            self.spike_ua[trip] = 0.0; self.over_s[trip] = 0.0
+        self.temp += (30.0 + 6.0 * (self.pw == 1).mean() - self.temp) * min(dt / 60.0, 1.0)
+
+    def imon_true(self):
+        return self.vmon / self.load_mohm + self.spike_ua * (self.pw == 1)
+
+    def read(self, param, channels, rng):
+        ch = np.asarray(channels, dtype=np.int64)
+        if param == 'VMon': return self.vmon[ch] + rng.normal(0.0, 0.02, len(ch)) * (self.vmon[ch] > 0)
+        if param == 'IMon': return np.maximum(self.imon_true()[ch] + rng.normal(0.0, 0.003, len(ch)) * (self.vmon[ch] > 0), 0.0)
+        if param == 'Status': return self.status()[ch]
+        return {'Pw': self.pw, 'V0Set': self.v0set, 'I0Set': self.i0set, 'RUp': self.rup,
+                'RDWn': self.rdwn, 'Trip': self.trip_s, 'SVMax': self.svmax}[param][ch]
+
+    def status(self):
+        target = np.where(self.pw == 1, np.minimum(self.v0set, self.svmax), 0.0)
+        s = np.zeros(self.n, dtype=np.int64)
+        s |= np.where(self.pw == 1, ON, 0)
+        s |= np.where((self.pw == 1) & (self.vmon < target - 0.5), RAMP_UP, 0)
+        s |= np.where(self.vmon > target + 0.5, RAMP_DOWN, 0)
+        s |= np.where(self.over_s > 0, OVERCURRENT, 0)
+        s |= np.where(self.v0set >= self.svmax, MAX_V, 0)
+        s |= np.where(self.tripped, INT_TRIP, 0)
+        return s
+
+    def write(self, param, channels, value):
+        ch = np.asarray(channels, dtype=np.int64)
+        if param == 'Pw':
+            on = int(bool(value))
+            self.pw[ch] = on
+            if on: self.tripped[ch] = False
+        elif param == 'V0Set': self.v0set[ch] = min(float(value), self.vmax)
+        elif param == 'I0Set': self.i0set[ch] = min(float(value), self.imax)
+        elif param == 'RUp': self.rup[ch] = float(value)
+        elif param == 'RDWn': self.rdwn[ch] = float(value)
+        elif param == 'Trip': self.trip_s[ch] = float(value)
+        elif param == 'SVMax': self.svmax[ch] = min(float(value), self.vmax)
+
+
+class SimulatedMainframe:
+    """
+    [시뮬레이션 메인프레임]
+    crate_map 의 보드 구성(모델, 채널 수)으로 채널 상태를 만들고, 호출 시점까지 경과한 시간만큼
+    램프/트립을 진행시킨다. 호출마다 지연(latency + jitter)을 주고, 동시에 처리하는 호출 수를
+    concurrency 로 제한해 실제 장비의 응답 특성을 흉내 낸다. 여러 핸들이 같은 상태를 공유한다.
+    """
+    def __init__(self, crate_map, sim_config=None):
+        cfg = sim_config or {}
+        self.rng = np.random.default_rng(cfg.get('seed'))
+        # 지연 지터/통신 오류 주입은 잠금 밖에서 뽑으므로 별도의 시드 고정 난수기를 쓴다 (모듈 random 은 공유 상태).
+        self.call_rng = random.Random(cfg.get('seed'))
+        self.latency_s = cfg.get('latency_ms', 15) / 1000.0
+        self.jitter_s = cfg.get('jitter_ms', 5) / 1000.0
+        self.error_rate = cfg.get('error_rate', 0.0)
+        self.trip_prob = cfg.get('trip_rate_per_hour', 0.0) / 3600.0
+        self.boards = {int(slot): _Board(info.get('model'), info.get('channels'), self.rng) for slot, info in crate_map.items()}
+        self.lock = threading.Lock()
+        self.gate = threading.BoundedSemaphore(max(cfg.get('concurrency', 4), 1))
+        self.last = time.monotonic()
+        self.subscriptions = {}   # handle id -> {(slot, ch, param): 마지막으로 보낸 값}
+        self.online = True        # False 이면 모든 호출/연결이 실패한다 (연결 끊김·재연결 시험용)
+
+    def call(self, fn):
+        with self.gate:
+            time.sleep(max(self.latency_s + self.call_rng.uniform(-self.jitter_s, self.jitter_s), 0.0))
+            if not self.online: raise RuntimeError("Simulated CAEN mainframe is offline")
+            if self.error_rate and self.call_rng.random() < self.error_rate:
+                raise RuntimeError("Simulated CAEN communication error")
+            with self.lock:
+                now = time.monotonic()
+                dt, self.last = now - self.last, now
+                for board in self.boards.values(): board.advance(dt, self.rng, self.trip_prob)
+                return fn()
+
+    def board(self, slot):
+        if slot not in self.boards: raise RuntimeError(f"Simulated CAEN: no board in slot {slot}")
+        return self.boards[slot]
+
+
+_mainframes = {}
+_mainframes_lock = threading.Lock()
+
+
+def open_device(config):
+    """
+    HVWorker 가 caenhvwrapper.Device.open 대신 부르는 진입점. 같은 ip_address 의 핸들은
+    하나의 시뮬레이션 메인프레임을 공유하므로 여러 핸들 병렬 폴링도 그대로 시험할 수 있다.
+    """
+    key = config.get('ip_address', 'simulator')
+    with _mainframes_lock:
+        if key not in _mainframes:
+            _mainframes[key] = SimulatedMainframe(config.get('crate_map', {}), config.get('simulator', {}))
+            logging.info(f"Started simulated CAEN mainframe '{key}' with {sum(b.n for b in _mainframes[key].boards.values())} channels.")
+    return Device.open(config.get('system_type'), config.get('link_type'), key,
+                       config.get('username', ''), config.get('password', ''))
+
+
+class Device:
+    """caenhvwrapper.Device 와 같은 메서드를 갖는 시뮬레이션 핸들."""
+    def __init__(self, mainframe):
+        self.mainframe = mainframe
+        self.closed = False
+
+    @classmethod
+    def open(cls, system_type, link_type, arg, username='', password=''):
+        # caenhvwrapper.Device.open 과 같은 인자. arg(ip_address) 로 open_device 가 띄운 메인프레임에 붙는다.
+        mainframe = _mainframes.get(arg)
+        if mainframe is None: raise RuntimeError(f"Simulated CAEN: no mainframe at '{arg}'")
+        if not mainframe.online: raise RuntimeError(f"Simulated CAEN mainframe '{arg}' is offline")
+        return cls(mainframe)
+
+    def _check(self):
+        if self.closed: raise RuntimeError("Simulated CAEN handle is closed")
+
+    def get_ch_param(self, slot, channel_list, param):
+        self._check()
+        if param not in READABLE: raise RuntimeError(f"Simulated CAEN: unknown channel parameter '{param}'")
+        mf = self.mainframe
+        values = mf.call(lambda: mf.board(slot).read(param, channel_list, mf.rng))
+        return [int(v) for v in values] if param in ('Pw', 'Status') else [float(v) for v in values]
+
+    def set_ch_param(self, slot, channel_list, param, value):
+        self._check()
+        if param not in SETTABLE: raise RuntimeError(f"Simulated CAEN: parameter '{param}' is read-only")
+        mf = self.mainframe
+        mf.call(lambda: mf.board(slot).write(param, channel_list, value))
+
+    def get_bd_param(self, slot_list, param):
+        self._check()
+        if param != 'Temp': raise RuntimeError(f"Simulated CAEN: unknown board parameter '{param}'")
+        mf = self.mainframe
+        return mf.call(lambda: [float(mf.board(s).temp) for s in slot_list])
+
+    def subscribe_channel_params(self, slot, channel, param_list):
+        self._check()
+        mf = self.mainframe
+        mf.board(slot)
+        with mf.lock:
+            subs = mf.subscriptions.setdefault(id(self), {})
+            for param in param_list: subs[(slot, channel, param)] = None
+
+    def unsubscribe_channel_params(self, slot, channel, param_list):
+        with self.mainframe.lock:
+            subs = self.mainframe.subscriptions.get(id(self), {})
+            for param in param_list: subs.pop((slot, channel, param), None)
+
+    def get_event_data(self):
+        """구독한 값 중 마지막으로 보낸 뒤 바뀐 것만 이벤트로 돌려준다 (VMon/IMon 은 표시 해상도 기준)."""
+        self._check()
+        mf = self.mainframe
+
+        def collect():
+            events = []
+            subs = mf.subscriptions.get(id(self), {})
+            for (slot, ch, param), sent in subs.items():
+                value = mf.board(slot).read(param, [ch], mf.rng)[0]
+                value = round(float(value), 1 if param == 'VMon' else 2) if param in ('VMon', 'IMon') else int(value)
+                if value != sent:
+                    subs[(slot, ch, param)] = value
+                    events.append(SimpleNamespace(type=EventType.PARAMETER, item_id=param, board_index=slot,
+                                                  channel_index=ch, system_handle=id(self), value=value))
+            return events
+        return mf.call(collect), None
+
+    def close(self):
+        self.closed = True
+        with self.mainframe.lock:
+            self.mainframe.subscriptions.pop(id(self), None)
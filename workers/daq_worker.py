@@ -155,7 +155,7 @@ class DaqWorker(QObject):
         self.avg_data_ready.emit(time.time(), avg_rtd_volt)
 
     def _enqueue_db_data(self, ts, rtd_vals, dist_vals):
-        data = (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)),
+        data = (ts,
                 round(rtd_vals[0], 2) if rtd_vals else None,
                 round(rtd_vals[1], 2) if len(rtd_vals) > 1 else None,
                 round(dist_vals[0], 1) if dist_vals else None,
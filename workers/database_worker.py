@@ -13,60 +13,79 @@ class DatabaseWorker(QObject):
     """
     status_update = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
+    metrics_ready = pyqtSignal(dict)
     
+    # [핵심] 워커는 epoch 초(float)만 큐에 넣고, 날짜 변환은 DB 서버의 FROM_UNIXTIME 이 담당한다.
+    # 수집 경로(Hot Path)에서 레코드마다 strftime 문자열을 만들 필요가 없다.
     SQL_INSERT = {
-        'DAQ': "INSERT IGNORE INTO LS_DATA (`datetime`, `RTD_1`, `RTD_2`, `DIST_1`, `DIST_2`) VALUES (?, ?, ?, ?, ?)",
-        'RADON': "INSERT IGNORE INTO RADON_DATA (`datetime`, `mu`, `sigma`) VALUES (?, ?, ?)",
-        'MAG': "INSERT IGNORE INTO MAGNETOMETER_DATA (`datetime`, `Bx`, `By`, `Bz`, `B_mag`) VALUES (?, ?, ?, ?, ?)",
-        'TH_O2': "INSERT IGNORE INTO TH_O2_DATA (`datetime`, `temperature`, `humidity`, `oxygen`) VALUES (?, ?, ?, ?)",
-        'ARDUINO': "INSERT IGNORE INTO ARDUINO_DATA (`datetime`, `analog_1`, `analog_2`, `analog_3`, `analog_4`, `analog_5`, `digital_status`, `message`) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        'DAQ': "INSERT IGNORE INTO LS_DATA (`datetime`, `RTD_1`, `RTD_2`, `DIST_1`, `DIST_2`) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?)",
+        'RADON': "INSERT IGNORE INTO RADON_DATA (`datetime`, `mu`, `sigma`) VALUES (FROM_UNIXTIME(?), ?, ?)",
+        'MAG': "INSERT IGNORE INTO MAGNETOMETER_DATA (`datetime`, `Bx`, `By`, `Bz`, `B_mag`) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?)",
+        'TH_O2': "INSERT IGNORE INTO TH_O2_DATA (`datetime`, `temperature`, `humidity`, `oxygen`) VALUES (FROM_UNIXTIME(?), ?, ?, ?)",
+        'ARDUINO': "INSERT IGNORE INTO ARDUINO_DATA (`datetime`, `analog_1`, `analog_2`, `analog_3`, `analog_4`, `analog_5`, `digital_status`, `message`) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?, ?, ?, ?)",
         'HV': """
-            INSERT IGNORE INTO HV_DATA (datetime, slot, channel, power, vmon, imon, v0set, i0set, status, board_temp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT IGNORE INTO HV_DATA (datetime, crate, slot, channel, power, vmon, imon, status, board_temp)
+            VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?, ?, ?, ?, ?)
         """,
-        'UPS': "INSERT IGNORE INTO UPS_DATA (`datetime`, `status`, `linev`, `bcharge`, `timeleft`) VALUES (?, ?, ?, ?, ?)",
-        'PDU': "INSERT INTO PDU_DATA (datetime, port_idx, state, power_w, current_ma, energy_wh) VALUES (?, ?, ?, ?, ?, ?)",
-        'FIRE': "INSERT IGNORE INTO FIRE_DATA (`datetime`, `status_code`, `is_fire`, `is_fault`) VALUES (?, ?, ?, ?)",
-        'VOC': "INSERT IGNORE INTO VOC_DATA (`datetime`, `concentration`, `alarm_status`, `unit`) VALUES (?, ?, ?, ?)"
+        'HV_SETPOINT': "INSERT IGNORE INTO HV_SETPOINT_LOG (`datetime`, `crate`, `slot`, `channel`, `v0set`, `i0set`) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?, ?)",
+        'UPS': "INSERT IGNORE INTO UPS_DATA (`datetime`, `status`, `linev`, `bcharge`, `timeleft`) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?)",
+        'PDU': "INSERT INTO PDU_DATA (datetime, port_idx, state, power_w, current_ma, energy_wh) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?, ?)",
+        'FIRE': "INSERT IGNORE INTO FIRE_DATA (`datetime`, `status_code`, `is_fire`, `is_fault`) VALUES (FROM_UNIXTIME(?), ?, ?, ?)",
+        'VOC': "INSERT IGNORE INTO VOC_DATA (`datetime`, `concentration`, `alarm_status`, `unit`) VALUES (FROM_UNIXTIME(?), ?, ?, ?)"
+    }
+    # crate 컬럼이 없는(다중 크레이트 이전) HV 테이블용 INSERT. 행의 crate 값(두 번째 필드)을 빼고 기록한다.
+    LEGACY_HV_INSERT = {
+        'HV': """
+            INSERT IGNORE INTO HV_DATA (datetime, slot, channel, power, vmon, imon, status, board_temp)
+            VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?, ?, ?, ?)
+        """,
+        'HV_SETPOINT': "INSERT IGNORE INTO HV_SETPOINT_LOG (`datetime`, `slot`, `channel`, `v0set`, `i0set`) VALUES (FROM_UNIXTIME(?), ?, ?, ?, ?)",
     }
     
+    # 값/제약 오류. 재시도해도 같은 결과이므로 문제 행만 골라 버린다. 그 밖의 오류(연결 끊김 등)는 배치를 재시도한다.
+    DATA_ERRORS = (mariadb.DataError, mariadb.IntegrityError)
+
+    # 신규 설치용 스키마 (v3): ms 해상도 DATETIME(3) 키, 셋포인트 변경 이력 분리,
+    # HV_DATA 는 (crate, slot, channel, datetime) 클러스터링으로 채널별 범위 조회가 순차 접근이 된다.
+    # 기존 DB 는 migrate_schema.py 로 이 구조에 맞춰 변환한다.
     TABLE_SCHEMAS = [
         """CREATE TABLE IF NOT EXISTS LS_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `RTD_1` FLOAT NULL, `RTD_2` FLOAT NULL,
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `RTD_1` FLOAT NULL, `RTD_2` FLOAT NULL,
             `DIST_1` FLOAT NULL, `DIST_2` FLOAT NULL
         );""", 
-        "CREATE INDEX IF NOT EXISTS idx_ls_datetime ON LS_DATA (datetime);",
         """CREATE TABLE IF NOT EXISTS RADON_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `mu` FLOAT NULL, `sigma` FLOAT NULL
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `mu` FLOAT NULL, `sigma` FLOAT NULL
         );""", 
-        "CREATE INDEX IF NOT EXISTS idx_radon_datetime ON RADON_DATA (datetime);",
         """CREATE TABLE IF NOT EXISTS MAGNETOMETER_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `Bx` FLOAT NULL, `By` FLOAT NULL,
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `Bx` FLOAT NULL, `By` FLOAT NULL,
             `Bz` FLOAT NULL, `B_mag` FLOAT NULL
         );""", 
-        "CREATE INDEX IF NOT EXISTS idx_mag_datetime ON MAGNETOMETER_DATA (datetime);",
         """CREATE TABLE IF NOT EXISTS TH_O2_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `temperature` FLOAT NULL,
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `temperature` FLOAT NULL,
             `humidity` FLOAT NULL, `oxygen` FLOAT NULL
         );""", 
-        "CREATE INDEX IF NOT EXISTS idx_tho2_datetime ON TH_O2_DATA (datetime);",
         """CREATE TABLE IF NOT EXISTS ARDUINO_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `analog_1` FLOAT NULL, `analog_2` FLOAT NULL,
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `analog_1` FLOAT NULL, `analog_2` FLOAT NULL,
             `analog_3` FLOAT NULL, `analog_4` FLOAT NULL, `analog_5` FLOAT NULL,
             `digital_status` INT NULL, `message` VARCHAR(255) NULL
         );""", 
-        "CREATE INDEX IF NOT EXISTS idx_arduino_datetime ON ARDUINO_DATA (datetime);",
         """CREATE TABLE IF NOT EXISTS HV_DATA (
-            `datetime` DATETIME, `slot` INT, `channel` INT, `power` BOOLEAN, `vmon` FLOAT, `imon` FLOAT,
-            `v0set` FLOAT, `i0set` FLOAT, `status` INT, `board_temp` FLOAT, 
-            PRIMARY KEY (`datetime`, `slot`, `channel`)
+            `datetime` DATETIME(3) NOT NULL, `crate` SMALLINT NOT NULL DEFAULT 0,
+            `slot` SMALLINT NOT NULL, `channel` SMALLINT NOT NULL,
+            `power` BOOLEAN, `vmon` FLOAT, `imon` FLOAT, `status` INT, `board_temp` FLOAT,
+            PRIMARY KEY (`crate`, `slot`, `channel`, `datetime`)
         );""", 
         "CREATE INDEX IF NOT EXISTS idx_hv_datetime ON HV_DATA (datetime);",
+        """CREATE TABLE IF NOT EXISTS HV_SETPOINT_LOG (
+            `datetime` DATETIME(3) NOT NULL, `crate` SMALLINT NOT NULL DEFAULT 0,
+            `slot` SMALLINT NOT NULL, `channel` SMALLINT NOT NULL,
+            `v0set` FLOAT, `i0set` FLOAT,
+            PRIMARY KEY (`crate`, `slot`, `channel`, `datetime`)
+        );""",
         """CREATE TABLE IF NOT EXISTS UPS_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `status` VARCHAR(20), `linev` FLOAT,
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `status` VARCHAR(20), `linev` FLOAT,
             `bcharge` FLOAT, `timeleft` FLOAT
         );""", 
-        "CREATE INDEX IF NOT EXISTS idx_ups_datetime ON UPS_DATA (datetime);",
         """CREATE TABLE IF NOT EXISTS PDU_DATA (
             id INT AUTO_INCREMENT PRIMARY KEY,
             datetime DATETIME(3) NOT NULL,
@@ -79,11 +98,9 @@ class DatabaseWorker(QObject):
         "CREATE INDEX IF NOT EXISTS idx_pdu_time ON PDU_DATA (datetime);",
         "CREATE INDEX IF NOT EXISTS idx_pdu_port ON PDU_DATA (port_idx);",
         """CREATE TABLE IF NOT EXISTS FIRE_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `status_code` INT, `is_fire` BOOLEAN, `is_fault` BOOLEAN);""",
-        "CREATE INDEX IF NOT EXISTS idx_fire_datetime ON FIRE_DATA (datetime);",
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `status_code` INT, `is_fire` BOOLEAN, `is_fault` BOOLEAN);""",
         """CREATE TABLE IF NOT EXISTS VOC_DATA (
-            `datetime` DATETIME NOT NULL PRIMARY KEY, `concentration` FLOAT, `alarm_status` INT, `unit` VARCHAR(10));""",
-        "CREATE INDEX IF NOT EXISTS idx_voc_datetime ON VOC_DATA (datetime);"
+            `datetime` DATETIME(3) NOT NULL PRIMARY KEY, `concentration` FLOAT, `alarm_status` INT, `unit` VARCHAR(10));"""
     ]
 
     def __init__(self, db_pool, db_config, data_queue: queue.Queue):
@@ -92,6 +109,16 @@ class DatabaseWorker(QObject):
         self.db_config = db_config
         self.data_queue = data_queue
         self._is_running = True
+        self.error_count = 0
+        self.rollback_count = 0
+        self.dropped_rows = 0
+        self.max_retries = db_config.get('max_batch_retries', 60)
+        self.last_flush_ts = 0.0
+        self.flushed_through_ts = 0.0   # 이 시각 이전에 큐에 들어온 레코드는 모두 커밋되었다.
+        self.last_flush_lag_s = 0.0
+        self.last_publish_ts = None
+        self.hv_has_crate = True
+        self._foreign_crate_warned = False
         self.batch_timer = QTimer(self)
         self.batch_timer.timeout.connect(self.process_batch)
 
@@ -121,6 +148,25 @@ class DatabaseWorker(QObject):
                 conn.commit()
                 logging.info("Successfully added 'board_temp' column to HV_DATA table.")
 
+            cursor.execute("""
+                SELECT COUNT(*) 
+                FROM INFORMATION_SCHEMA.COLUMNS 
+                WHERE TABLE_SCHEMA = ? AND TABLE_NAME = 'HV_DATA' AND COLUMN_NAME = 'v0set'
+            """, (self.db_config['database'],))
+            if cursor.fetchone()[0] > 0:
+                logging.warning("HV_DATA uses the legacy schema (second-resolution keys, per-minute setpoints). "
+                                "Run 'python migrate_schema.py' to convert it.")
+
+            cursor.execute("""
+                SELECT COUNT(DISTINCT TABLE_NAME)
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = ? AND TABLE_NAME IN ('HV_DATA', 'HV_SETPOINT_LOG') AND COLUMN_NAME = 'crate'
+            """, (self.db_config['database'],))
+            self.hv_has_crate = cursor.fetchone()[0] == 2
+            if not self.hv_has_crate:
+                logging.warning("HV tables have no 'crate' column; only crate 0 HV rows are written, other crates are dropped. "
+                                "Run 'python migrate_schema.py' to enable multi-crate keys.")
+
             logging.info("Database tables and indexes are ready.")
             return True
         except mariadb.Error as e:
@@ -142,11 +188,17 @@ class DatabaseWorker(QObject):
     @pyqtSlot()
     def process_batch(self):
         if not self._is_running: return
+        drain_ts = time.time()
         batch_size = self.data_queue.qsize()
-        if batch_size == 0: return
+        if batch_size == 0:
+            self.flushed_through_ts = drain_ts
+            self._publish_metrics({}, 0, None, {}, None, None, True)
+            return
 
         batch = {k: [] for k in self.SQL_INSERT.keys()}
+        attempts = {}   # 타입별로 이미 실패한 횟수 (재시도로 되돌아온 묶음)
         processed_record_count = 0 
+        oldest_ts = None
 
         for _ in range(batch_size):
             try:
@@ -156,35 +208,158 @@ class DatabaseWorker(QObject):
                     data_payload = item.get('data')
 
                     if data_type in batch:
+                        attempts[data_type] = max(attempts.get(data_type, 0), item.get('attempts', 0))
                         if isinstance(data_payload, list):
                             batch[data_type].extend(data_payload)
                             processed_record_count += len(data_payload)
+                            if data_payload: oldest_ts = self._older(oldest_ts, data_payload[0][0])
                         elif data_payload: 
                             batch[data_type].append(data_payload)
                             processed_record_count += 1
+                            oldest_ts = self._older(oldest_ts, data_payload[0])
                         else:
                              logging.debug(f"Received empty payload for type {data_type}")
                 self.data_queue.task_done()
             except queue.Empty: break
         
         if processed_record_count == 0: return
+        if not self.hv_has_crate: self._drop_foreign_crates(batch)
         
         conn = None
+        success = False
+        pool_wait_ms, commit_ms = None, None
+        exec_ms = {}
         try:
+            t0 = time.perf_counter()
             conn = self.db_pool.get_connection()
+            pool_wait_ms = (time.perf_counter() - t0) * 1000
             conn.database = self.db_config['database']
             cursor = conn.cursor()
-            for type_key, data_list in batch.items():
-                if data_list:
-                    cursor.executemany(self.SQL_INSERT[type_key], data_list)
-            conn.commit()
+            try:
+                for type_key, data_list in batch.items():
+                    if data_list:
+                        t0 = time.perf_counter()
+                        self._write_rows(cursor, type_key, data_list)
+                        exec_ms[type_key] = (time.perf_counter() - t0) * 1000
+                t0 = time.perf_counter()
+                conn.commit()
+                commit_ms = (time.perf_counter() - t0) * 1000
+            except self.DATA_ERRORS as e:
+                # [핵심] 잘못된 행 하나 때문에 배치 전체가 영원히 재시도되지 않도록, 타입별로 나눠 기록하며 문제 행만 버린다.
+                logging.error(f"DB insert data error: {e}. Isolating bad rows...")
+                self.error_count += 1
+                conn.rollback()
+                self.rollback_count += 1
+                for type_key in [k for k, v in batch.items() if v]:
+                    self.dropped_rows += self._isolate_bad_rows(conn, type_key, batch[type_key])
+                    batch[type_key] = []   # 기록(또는 폐기)이 끝난 타입은 이후 연결 오류 때 되돌리지 않는다.
+            success = True
+            self.last_flush_ts = time.time()
+            self.flushed_through_ts = drain_ts
             logging.info(f"Successfully inserted batch of {processed_record_count} records.")
         except mariadb.Error as e:
             logging.error(f"DB insert error: {e}. Rolling back...")
-            if conn: conn.rollback()
+            self.error_count += 1
+            if conn:
+                try:
+                    conn.rollback()
+                    self.rollback_count += 1
+                except mariadb.Error: pass
+            # [핵심] 실패한 배치는 큐에 되돌려 다음 주기에 재시도한다 (DB 복구 시 누락 없음).
+            # max_batch_retries 번 연속 실패한 묶음은 큐가 끝없이 늘지 않도록 버린다.
+            for type_key, data_list in batch.items():
+                if not data_list: continue
+                tries = attempts.get(type_key, 0) + 1
+                if tries > self.max_retries:
+                    self.dropped_rows += len(data_list)
+                    logging.error(f"DB dropped {len(data_list)} {type_key} records after {self.max_retries} failed flushes.")
+                else:
+                    self.data_queue.put({'type': type_key, 'data': data_list, 'attempts': tries})
         finally:
             if conn: conn.close()
 
+        rows = {k: len(v) for k, v in batch.items() if v}
+        self._publish_metrics(rows, processed_record_count, oldest_ts, exec_ms, pool_wait_ms, commit_ms, success)
+
+    def _drop_foreign_crates(self, batch):
+        """
+        crate 컬럼이 없는(마이그레이션 전) HV 테이블에는 크레이트 0 의 행만 기록한다.
+        다른 크레이트의 행은 (slot, channel, datetime) 키가 크레이트 0 과 겹쳐 서로 덮이거나 섞이므로 버린다.
+        """
+        for type_key in self.LEGACY_HV_INSERT:
+            rows = batch[type_key]
+            keep = [row for row in rows if row[1] == 0]
+            if len(keep) == len(rows): continue
+            batch[type_key] = keep
+            self.dropped_rows += len(rows) - len(keep)
+            if self._foreign_crate_warned: continue
+            self._foreign_crate_warned = True
+            crates = sorted({row[1] for row in rows if row[1] != 0})
+            message = (f"HV tables have no 'crate' column: dropping HV rows from crate(s) {crates}. "
+                       f"Run 'python migrate_schema.py' to record multiple crates.")
+            logging.error(message)
+            self.error_occurred.emit(message)
+
+    def _write_rows(self, cursor, type_key, rows):
+        if type_key in self.LEGACY_HV_INSERT and not self.hv_has_crate:
+            cursor.executemany(self.LEGACY_HV_INSERT[type_key], [row[:1] + row[2:] for row in rows])
+        else:
+            cursor.executemany(self.SQL_INSERT[type_key], rows)
+
+    def _isolate_bad_rows(self, conn, type_key, rows):
+        """데이터 오류가 난 묶음을 반씩 나눠 다시 기록하고, 혼자서도 실패하는 행만 버린다. 버린 행 수를 반환한다."""
+        try:
+            self._write_rows(conn.cursor(), type_key, rows)
+            conn.commit()
+            return 0
+        except self.DATA_ERRORS as e:
+            conn.rollback()
+            if len(rows) == 1:
+                logging.error(f"DB dropped bad {type_key} record {rows[0]!r}: {e}")
+                return 1
+        mid = len(rows) // 2
+        return self._isolate_bad_rows(conn, type_key, rows[:mid]) + self._isolate_bad_rows(conn, type_key, rows[mid:])
+
+    @staticmethod
+    def _older(current, ts):
+        if not isinstance(ts, (int, float)): return current
+        return ts if current is None or ts < current else current
+
+    def _publish_metrics(self, rows, rows_total, oldest_ts, exec_ms, pool_wait_ms, commit_ms, success):
+        """쓰기 경로 텔레메트리를 구조화된 딕셔너리로 발행한다 (지식망 및 메트릭 엔드포인트용)."""
+        now = time.time()
+        elapsed = now - self.last_publish_ts if self.last_publish_ts else None
+        self.last_publish_ts = now
+        oldest_age_s = (now - oldest_ts) if (oldest_ts is not None and not success) else 0.0
+        if oldest_ts is not None and success:
+            # 방금 기록된 레코드가 큐에서 기다린 최대 시간
+            self.last_flush_lag_s = now - oldest_ts
+
+        metrics = {
+            'ts': now,
+            'flush_ok': success,
+            'rows': rows,
+            'rows_total': rows_total,
+            'rows_per_s': (rows_total / elapsed) if (elapsed and success) else 0.0,
+            'executemany_ms': exec_ms,
+            'commit_ms': commit_ms if commit_ms is not None else 0.0,
+            'pool_wait_ms': pool_wait_ms if pool_wait_ms is not None else 0.0,
+            'queue_depth': self.data_queue.qsize(),
+            'oldest_unflushed_age_s': oldest_age_s,
+            'last_flush_lag_s': self.last_flush_lag_s,
+            'last_flush_ts': self.last_flush_ts,
+            'flushed_through_ts': self.flushed_through_ts,
+            'errors_total': self.error_count,
+            'rollbacks_total': self.rollback_count,
+            'rows_dropped_total': self.dropped_rows,
+        }
+        self.metrics_ready.emit(metrics)
+
+        alarm_age = self.db_config.get('alarm_spool_age_s', 300)
+        if oldest_age_s > alarm_age:
+            logging.warning(f"DB persistence is falling behind: oldest unflushed record is {oldest_age_s:.0f} s old "
+                            f"({metrics['queue_depth']} items queued).")
+
     @pyqtSlot()
     def stop(self):
         self._is_running = False
@@ -94,8 +94,7 @@ class FireWorker(QObject):
             self.error_occurred.emit(f"Fire Detector Comm Error: {e}")
 
     def _enqueue_db_data(self, ts, code, fire, fault):
-        dt_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-        self.data_queue.put({'type': 'FIRE', 'data': (dt_str, code, fire, fault)})
+        self.data_queue.put({'type': 'FIRE', 'data': (ts, code, fire, fault)})
 
     @pyqtSlot()
     def stop_worker(self):
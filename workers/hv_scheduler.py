@@ -0,0 +1,150 @@
+# workers/hv_scheduler.py
+
+import time
+import logging
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
+from core.app_config import hv_mainframes
+from core.hv_frame import HVFrameEncoder
+from workers.hv_worker import HVWorker
+
+
+class HVScheduler(QObject):
+    """
+    [다중 크레이트 HV 수집 스케줄러]
+    caen_hv.mainframes 의 크레이트마다 HVWorker(연결, 핸들, 폴링 단계, 재연결, 제어 명령 큐)를 하나씩 두고
+    타이머 하나로 모든 크레이트의 폴링 주기를 돌린다. 한 틱에서 모든 크레이트의 읽기를 먼저 발행한 뒤 모으므로
+    크레이트끼리 동시에 진행되며, 느린 파라미터(셋포인트, 보드 온도)는 크레이트마다 위상을 어긋나게 두어
+    같은 틱에 몰리지 않게 한다. 결과는 (crate, slot, channel) 행으로 합친 델타 프레임 하나로 내보낸다.
+    WorkerManager 에는 기존 HVWorker 와 같은 시그널을 가진 'caen_hv' 워커로 보인다.
+    """
+    data_ready = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+    connection_status = pyqtSignal(bool)
+    control_command_status = pyqtSignal(str)
+    setpoints_ready = pyqtSignal(dict)
+    metrics_ready = pyqtSignal(dict)
+    command_completed = pyqtSignal(dict)
+    status_events = pyqtSignal(list)
+    burst_data = pyqtSignal(dict)
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        self.interval_ms = config.get("polling_interval_ms", 1000)
+        self.crates = {}
+        for i, mf in enumerate(hv_mainframes(config)):
+            crate = HVWorker(mf, parent=self)
+            crate.scheduled = True
+            crate.phase = i * (len(crate.parameters_to_fetch) + 1)
+            self._connect_crate(crate)
+            self.crates[crate.crate] = crate
+        self.connected = {c: False for c in self.crates}
+        self.crate_metrics = {}
+
+        # 크레이트별 행 배치를 이어 붙인 전체 배치
+        encoders = [crate.encoder for crate in self.crates.values()]
+        frame_cfg = config.get('frame', {})
+        self.encoder = HVFrameEncoder(np.concatenate([e.slot for e in encoders]), np.concatenate([e.channel for e in encoders]),
+                                      deadbands=frame_cfg.get('deadbands'), delta_only=frame_cfg.get('delta_only', False),
+                                      keyframe_every=frame_cfg.get('keyframe_interval_s', 60) * 1000.0 / self.interval_ms,
+                                      crates=np.concatenate([e.crate for e in encoders]))
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    def _connect_crate(self, crate):
+        crate.error_occurred.connect(self.error_occurred.emit)
+        crate.connection_status.connect(lambda ok, c=crate.crate: self._on_crate_connection(c, ok))
+        crate.control_command_status.connect(self.control_command_status.emit)
+        crate.setpoints_ready.connect(self.setpoints_ready.emit)
+        crate.metrics_ready.connect(lambda m, name=crate.name: self.crate_metrics.__setitem__(name, m))
+        crate.command_completed.connect(self.command_completed.emit)
+        crate.status_events.connect(self.status_events.emit)
+        crate.burst_data.connect(self.burst_data.emit)
+        crate.urgent_update.connect(self._on_urgent_update)
+
+    @pyqtSlot()
+    def start_worker(self):
+        for crate in self.crates.values(): crate.start_worker()
+        self.timer.start(self.interval_ms)
+        logging.info(f"HV scheduler polling {len(self.crates)} crate(s) every {self.interval_ms} ms.")
+
+    def _on_crate_connection(self, crate, ok):
+        # 전체 연결 상태는 모든 크레이트가 연결되어 있을 때만 True 이다.
+        self.connected[crate] = ok
+        self.connection_status.emit(all(self.connected.values()))
+
+    @pyqtSlot()
+    def tick(self):
+        t0 = time.monotonic()
+        # [핵심] 모든 크레이트의 읽기를 먼저 발행하고 나서 차례로 모은다.
+        pending = [(crate, crate.begin_cycle()) for crate in self.crates.values()]
+        fresh = False
+        for crate, reads in pending:
+            if reads and crate.finish_cycle(reads): fresh = True
+        # 새 값이 없으면 프레임만 건너뛴다. 연결이 끊긴 동안에도 연결 수/재연결 지표는 계속 내보낸다.
+        if fresh: self.data_ready.emit(self._build_frame())
+        self._publish_metrics((time.monotonic() - t0) * 1000.0)
+
+    def _on_urgent_update(self):
+        # 구독 이벤트로 트립/전원 변경이 오면 바로 내보낸다. 공유 타이머는 다시 시작하지 않는다:
+        # 한 크레이트의 Status 가 깜빡일 때 모든 크레이트의 틱이 밀리지 않도록, 급한 프레임 빈도는 크레이트 쪽에서 제한한다.
+        self.data_ready.emit(self._build_frame())
+
+    def _build_frame(self):
+        matrices = [crate.value_matrix() for crate in self.crates.values()]
+        board_temps = {}
+        for _, temps in matrices: board_temps.update(temps)
+        return self.encoder.encode(np.vstack([values for values, _ in matrices]), board_temps)
+
+    def _publish_metrics(self, tick_ms):
+        """
+        크레이트별 지표를 {크레이트 이름: 값} 라벨로 합쳐 한 번에 발행한다.
+        크레이트가 하나뿐이면 기존 지표 이름과 모양을 그대로 유지한다.
+        """
+        metrics = {'ts': time.time(), 'tick_ms': tick_ms, 'interval_ms': self.interval_ms,
+                   'crates': len(self.crates), 'crates_connected': sum(self.connected.values())}
+        if len(self.crates) == 1:
+            for crate_metrics in self.crate_metrics.values(): metrics.update(crate_metrics)
+            self.metrics_ready.emit(metrics)
+            return
+        for name, crate_metrics in self.crate_metrics.items():
+            for key, value in crate_metrics.items():
+                if key in ('ts', 'interval_ms'): continue
+                merged = metrics.setdefault(key, {})
+                if key == 'slot_busy_ms':
+                    for slot, ms in value.items(): merged[f"{name}/S{slot}"] = ms
+                elif key == 'status_flags':
+                    for flag, n in value.items(): merged[flag] = merged.get(flag, 0) + n
+                else:
+                    merged[name] = value
+        self.metrics_ready.emit(metrics)
+
+    def submit_command(self, command):
+        """command['crate'] (기본: 첫 크레이트) 의 명령 큐로 보낸다. 어느 스레드에서나 호출할 수 있다."""
+        crate = self.crates.get(command.get('crate', next(iter(self.crates))))
+        if crate is None:
+            self.control_command_status.emit(f"HV Control Error: unknown crate {command.get('crate')}.")
+            return
+        crate.submit_command(command)
+
+    def start_burst(self, request):
+        """request['crate'] (기본: 첫 크레이트) 에서 버스트 캡처를 시작한다. 크레이트마다 하나씩 동시에 돌 수 있다."""
+        crate = self.crates.get(request.get('crate', next(iter(self.crates))))
+        if crate is None:
+            self.control_command_status.emit(f"HV burst rejected: unknown crate {request.get('crate')}.")
+            return False
+        return crate.start_burst(request)
+
+    def stop_burst(self, crate=None):
+        for c, worker in self.crates.items():
+            if crate is None or c == crate: worker.stop_burst()
+
+    @pyqtSlot(int, int, int)
+    def fetch_setpoints(self, crate, slot, channel):
+        if crate in self.crates: self.crates[crate].fetch_setpoints(slot, channel)
+
+    @pyqtSlot()
+    def stop_worker(self):
+        self.timer.stop()
+        for crate in self.crates.values(): crate.stop_worker()
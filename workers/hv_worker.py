@@ -1,141 +1,927 @@
 # workers/hv_worker.py
 
+import time
+import queue
 import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
+from core.hv_frame import HV_FIELDS, HVFrameEncoder
+from core.hv_profile import group_setpoints, channel_count, validate_profile
+from core.hv_status import StatusTracker
+from core.hv_burst import BURST_PARAMS
+from workers import caen_simulator
 
 try:
     from caen_libs import caenhvwrapper as hv
 except ImportError:
     hv = None
 
+class PollPreempted(Exception):
+    """비상 명령 때문에 폴링 읽기를 건너뛸 때 쓰는 내부 신호."""
+
+
+class ProfileAborted(Exception):
+    """비상 명령 때문에 프로파일 적용의 남은 쓰기를 버릴 때 쓰는 내부 신호."""
+
+
 class HVWorker(QObject):
     """
     [CAEN HV 통신 전담 워커]
     C++ 래퍼를 통한 원격 제어 명령 하달 및 폴링을 전담한다.
     지식망으로부터 전달된 딕셔너리 포맷의 명령을 해석하여 하드웨어 제어를 수행한다.
+    폴링은 여러 개의 장치 핸들(poll_connections)을 스레드 풀에서 나눠 쓰며, (슬롯, 파라미터) 단위의
+    읽기를 한꺼번에 발행하므로 한 주기의 시간은 왕복 횟수가 아니라 핸들당 왕복 수에 비례한다.
+    acquisition_mode 가 "subscribe" 이면 VMon/IMon/Status/Pw 변경을 메인프레임의 이벤트로 받고,
+    구독하지 못한 파라미터만 계속 폴링한다.
+    결과는 채널당 한 행인 NumPy 델타 프레임(core.hv_frame)으로 내보낸다.
+    프레임을 만들 때마다 Status 벡터를 비트 플래그 배열로 풀어(core.hv_status) 바뀐 플래그를 이벤트로 알린다.
+    읽기 실패는 (슬롯, 파라미터) 단위로 격리해 그 항목만 간격을 늘려 다시 시도하며, 한 주기의 모든 읽기가
+    실패하면 연결이 끊긴 것으로 보고 지수 백오프로 자동 재연결한 뒤 폴링을 이어 간다.
+    제어 명령은 submit_command() 로 우선순위 큐에 넣어 전용 스레드에서 실행하며, 대기 중인 명령이 있으면
+    폴링 읽기가 양보하고, 비상(emergency) 명령은 진행 중인 폴링 주기를 호출 사이에서 끊는다.
+    셋포인트 프로파일(apply_profile)은 같은 값의 채널을 다채널 호출로 묶어 슬롯별로 병렬 적용하고,
+    다음 폴링에서 읽은 값으로 적용 결과를 확인한다.
+    버스트 캡처는 선택한 채널의 IMon/VMon 만 전용 스레드에서 연속으로 읽어 묶음으로 내보내며(수동 또는
+    IMon 임계값 상향 돌파 시 자동), 같은 핸들을 나눠 쓰는 정규 폴링은 평소 주기로 계속된다.
     """
-    data_ready = pyqtSignal(dict)
+    data_ready = pyqtSignal(object)
     error_occurred = pyqtSignal(str)
     connection_status = pyqtSignal(bool)
     control_command_status = pyqtSignal(str)
     setpoints_ready = pyqtSignal(dict)
+    metrics_ready = pyqtSignal(dict)
+    command_completed = pyqtSignal(dict)
+    status_events = pyqtSignal(list)
+    burst_data = pyqtSignal(dict)  # 버스트 샘플 묶음 (chunk_ms 마다, 마지막 묶음은 done=True)
+    urgent_update = pyqtSignal()   # 스케줄러 아래에서 트립/전원 변경 이벤트가 왔을 때
+
+    PRIORITIES = {'emergency': 0, 'control': 1}
+
+    FLOAT_PARAMS = ('VMon', 'IMon', 'V0Set', 'I0Set')
+    # 파라미터별 기본 폴링 주기(초). 모니터 값은 매 주기, 드물게 바뀌는 설정값/보드 온도는 느리게 읽는다.
+    DEFAULT_POLL_TIERS_S = {'VMon': 1, 'IMon': 1, 'Status': 1, 'Pw': 5, 'Temp': 10, 'V0Set': 60, 'I0Set': 60}
+    SUBSCRIBE_PARAMS = ['VMon', 'IMon', 'Status', 'Pw']
+    # 이 파라미터가 바뀐 이벤트가 오면 다음 폴링 주기를 기다리지 않고 바로 프레임을 내보낸다.
+    URGENT_PARAMS = ('Status', 'Pw')
+    # 연속 실패가 이 횟수에 이르면 마지막 값을 버리고 그 항목을 '값 없음'(NaN)으로 표시한다.
+    FAILURES_BEFORE_BLANK = 3
+    # 핸들을 기다리다 연결 상태를 다시 확인하는 간격 (초)
+    HANDLE_WAIT_S = 0.5
+    MAX_READ_BACKOFF_CYCLES = 60
 
-    def __init__(self, config):
-        super().__init__()
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
         self.config = config
+        # 여러 크레이트를 HVScheduler 가 함께 돌릴 때: 크레이트 번호, 자체 폴링 타이머 대신 스케줄러가 주기를 준다.
+        self.crate = config.get('crate', 0)
+        self.name = config.get('name', 'main')
+        self.label = "CAEN HV" if self.name == 'main' else f"CAEN HV [{self.name}]"
+        self.scheduled = False
+        self.phase = 0
         self.device = None
+        self.devices = []
+        # [핵심] 핸들 큐는 워커 수명 동안 하나만 쓴다. 재연결 때는 비우고 다시 채우며, 세대 번호로 옛 핸들을 가려낸다.
+        self._handles = queue.Queue()
+        self._generation = 0
+        self.poll_pool = None
+        self.poll_pool_size = 0
         self._is_running = False
         self.polling_timer = QTimer(self)
         self.polling_timer.timeout.connect(self.poll_data)
+        self.event_timer = QTimer(self)
+        self.event_timer.timeout.connect(self.drain_events)
+        self.event_device = None
+        self.subscribed = set()     # 이벤트로 갱신되는 (slot, param)
+        self.events_total = 0
+        # 급한 프레임(트립/전원 변경)은 이 간격 안에 한 번만 내보낸다. 남은 변화는 다음 허용 시점에 모아 보낸다.
+        self.urgent_min_s = self.config.get('urgent_min_interval_ms', 250) / 1000.0
+        self._urgent_at = 0.0
+        self._urgent_pending = False
+        self.urgent_frames_total = 0
+        self.reconnect_timer = QTimer(self)
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self._reconnect)
+        reconnect_cfg = self.config.get('reconnect', {})
+        self.reconnect_initial_s = reconnect_cfg.get('initial_s', 2.0)
+        self.reconnect_max_s = reconnect_cfg.get('max_s', 60.0)
+        self.reconnect_attempts = 0
+        self.reconnects_total = 0
+        self.cycles_lost_total = 0
+        self.last_recovery_s = 0.0
+        self.lost_at = None
+        # 격리된 읽기: (slot, param) -> 연속 실패 횟수 / 다시 시도할 주기 번호
+        self.read_failures = {}
+        self.retry_at = {}
+        self.read_errors_total = 0
+        # 모든 읽기가 실패한 주기에 띄운 연결 확인: (future, 실패 원인). 다음 주기 시작 때 결과를 본다.
+        self._probe_pending = None
         
         self.parameters_to_fetch = ['Pw', 'VMon', 'IMon', 'V0Set', 'I0Set', 'Status']
         self.crate_map = {int(k): v for k, v in self.config.get('crate_map', {}).items()}
+        self.interval_ms = self.config.get("polling_interval_ms", 1000)
+        tiers_s = dict(self.DEFAULT_POLL_TIERS_S, **self.config.get('poll_tiers_s', {}))
+        self.poll_every = {p: max(int(round(tiers_s.get(p, 1) * 1000.0 / self.interval_ms)), 1)
+                           for p in ['Temp'] + self.parameters_to_fetch}
+        # 최근에 읽은 값 {(slot, param): [채널별 값]} 및 다음 주기에 반드시 다시 읽을 항목
+        self.values = {}
+        self.stale = set()
+        self.cycles_total = 0
+        self.overruns_total = 0
+        self.preempted_total = 0
+
+        # 제어 명령 큐: (우선순위, 순번, 등록 시각, 명령). 명령이 대기/실행 중이면 _idle 이 내려간다.
+        self._commands = queue.PriorityQueue()
+        self._command_seq = itertools.count()
+        self._idle = threading.Event(); self._idle.set()
+        self._emergency = threading.Event()
+        self._command_lock = threading.Lock()
+        self._command_thread = None
+        self._written_at = {}     # (slot, param) -> 마지막 쓰기 시각 (그 전에 시작된 폴링 읽기는 버린다)
+        # 확인 대기 중인 프로파일: {'name', 'expected': {(slot, param): {channel: 값}}, 'mismatches': [...]}
+        self._verifying = None
+
+        # 버스트 캡처: 한 번에 하나. 자동 트리거는 감시 채널(비어 있으면 전체)의 IMon 상향 돌파로 건다.
+        burst_cfg = self.config.get('burst', {})
+        auto_cfg = burst_cfg.get('auto', {})
+        self.burst_duration_s = burst_cfg.get('duration_s', 10.0)
+        self.burst_max_rate_hz = burst_cfg.get('max_rate_hz', 0)
+        self.burst_chunk_s = burst_cfg.get('chunk_ms', 250) / 1000.0
+        self.burst_max_channels = burst_cfg.get('max_channels', 32)
+        self.burst_threshold = auto_cfg.get('imon_threshold_ua') if auto_cfg.get('enabled') else None
+        self.burst_cooldown_s = auto_cfg.get('cooldown_s', 60.0)
+        self.burst_watch = {(int(slot), int(ch)) for slot, ch in auto_cfg.get('channels', [])}
+        self.bursts_total = 0
+        self._above = {}           # slot -> 직전 주기의 채널별 임계값 초과 여부
+        self._burst_ids = itertools.count(1)
+        self._burst_lock = threading.Lock()
+        self._burst_stop = threading.Event()
+        self._burst_thread = None
+        self._burst_ended = None   # 마지막 버스트가 끝난 시각 (자동 트리거 쿨다운)
+        # 폴링 주기가 발행되어 아직 모이지 않았으면 내려간다. 버스트는 이 동안 핸들을 폴링에 양보한다.
+        self._poll_idle = threading.Event(); self._poll_idle.set()
+
+        # 프레임 행 배치: crate_map 순서의 슬롯별 채널 0..n-1
+        self.slot_rows = {}
+        for slot in self.crate_map:
+            start = sum(len(r) for r in self.slot_rows.values())
+            self.slot_rows[slot] = np.arange(start, start + self.crate_map[slot]['channels'])
+        layout = [(slot, ch) for slot in self.crate_map for ch in self._channels(slot)]
+        frame_cfg = self.config.get('frame', {})
+        self.encoder = HVFrameEncoder([s for s, _ in layout], [c for _, c in layout],
+                                      deadbands=frame_cfg.get('deadbands'), delta_only=frame_cfg.get('delta_only', False),
+                                      keyframe_every=frame_cfg.get('keyframe_interval_s', 60) * 1000.0 / self.interval_ms,
+                                      crates=[self.crate] * len(layout))
+        self.status_tracker = StatusTracker(self.config.get('system_type'), self.encoder.slot, self.encoder.channel, self.crate)
 
     @pyqtSlot()
     def start_worker(self):
-        if not hv:
+        if not hv and not self.simulated:
             self.error_occurred.emit("caenhvwrapper library not found.")
             return
 
         self._is_running = True
+        self._command_thread = threading.Thread(target=self._command_loop, name='caen_command', daemon=True)
+        self._command_thread.start()
         try:
-            system_type = getattr(hv.SystemType, self.config["system_type"])
-            link_type = getattr(hv.LinkType, self.config["link_type"])
-            
-            logging.info(f"Connecting to CAEN HV at {self.config['ip_address']}...")
-            self.device = hv.Device.open(
-                system_type, link_type, self.config["ip_address"],
-                self.config["username"], self.config["password"]
-            )
-            logging.info("Successfully connected to CAEN HV system.")
-            self.connection_status.emit(True)
-            self.polling_timer.start(self.config["polling_interval_ms"])
-
+            self._connect()
         except Exception as e:
             logging.error(f"Failed to connect to CAEN HV system: {e}")
             self.error_occurred.emit(f"CAEN Connection Error: {e}")
             self.connection_status.emit(False)
+            # 처음 연결에 실패해도 멈추지 않고 재연결을 시도한다.
+            self.lost_at = time.monotonic()
+            self._schedule_reconnect()
 
-    def poll_data(self):
-        if not self._is_running or not self.device:
-            return
-        
+    def _connect(self):
+        """핸들을 열고 폴링(및 구독)을 시작한다. 첫 핸들을 열지 못하면 예외를 그대로 올린다."""
+        logging.info(f"Connecting to {self.label} at {self.config['ip_address']}...")
+        devices = [self._open_device()]
+        # [핵심] 추가 핸들은 실패해도 치명적이지 않다. 열린 만큼만 병렬로 쓴다.
+        n_handles = self.config.get('poll_connections', min(max(len(self.crate_map), 1), 3))
+        for _ in range(max(n_handles, 1) - 1):
+            try:
+                devices.append(self._open_device())
+            except Exception as e:
+                logging.warning(f"Could not open additional CAEN handle ({len(devices)} in use): {e}")
+                break
+        self._drain_handles()
+        self._generation += 1
+        for device in devices: self._handles.put((self._generation, device))
+        self.devices, self.device = devices, devices[0]
+        # 열린 핸들 수가 바뀌었으면 (재연결 시 추가 핸들 실패 등) 폴링 풀도 그 수에 맞춰 새로 만든다.
+        if self.poll_pool is None or self.poll_pool_size != len(devices):
+            if self.poll_pool is not None: self.poll_pool.shutdown(wait=False)
+            self.poll_pool = ThreadPoolExecutor(max_workers=len(devices), thread_name_prefix='caen_poll')
+            self.poll_pool_size = len(devices)
+        logging.info(f"Successfully connected to CAEN HV system ({len(self.devices)} handles).")
+        self.connection_status.emit(True)
+        if self.config.get('acquisition_mode', 'poll') == 'subscribe': self._subscribe()
+        if not self.scheduled: self.polling_timer.start(self.interval_ms)
+
+    def _connection_lost(self, error):
+        """연결이 끊겼을 때: 폴링을 멈추고 핸들을 닫은 뒤 재연결을 예약한다. 캐시 값은 다시 읽을 때까지 남긴다."""
+        logging.error(f"{self.label} connection lost: {error}")
+        self.error_occurred.emit(f"{self.label} communication error: {error}. Reconnecting...")
+        self.connection_status.emit(False)
+        self.polling_timer.stop()
+        self._probe_pending = None
+        self._close_event_device()
+        self._close_devices()
+        self.lost_at = time.monotonic()
+        self.reconnect_attempts = 0
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        delay = min(self.reconnect_initial_s * 2 ** self.reconnect_attempts, self.reconnect_max_s)
+        self.reconnect_attempts += 1
+        logging.info(f"Reconnecting to {self.label} in {delay:.0f} s (attempt {self.reconnect_attempts}).")
+        self.reconnect_timer.start(int(delay * 1000))
+
+    @pyqtSlot()
+    def _reconnect(self):
+        if not self._is_running: return
         try:
-            collected_data = {'slots': {}}
+            self._connect()
+        except Exception as e:
+            logging.warning(f"{self.label} reconnect attempt {self.reconnect_attempts} failed: {e}")
+            self._schedule_reconnect()
+            return
+        # [핵심] 끊긴 동안 값이 바뀌었을 수 있으므로 모든 항목을 다음 주기에 다시 읽는다.
+        down_s = time.monotonic() - self.lost_at
+        self.stale |= set(self.values)
+        self.read_failures.clear(); self.retry_at.clear()
+        self.reconnects_total += 1
+        self.cycles_lost_total += int(down_s * 1000.0 / self.interval_ms)
+        self.last_recovery_s = down_s
+        self.lost_at, self.reconnect_attempts = None, 0
+        logging.info(f"{self.label} reconnected after {down_s:.1f} s.")
+
+    @property
+    def simulated(self):
+        return self.config.get("system_type") == "SIMULATOR"
 
-            for slot, board_info in self.crate_map.items():
-                channel_list = list(range(board_info['channels']))
-                
+    def _open_device(self):
+        # system_type 이 "SIMULATOR" 이면 같은 인터페이스의 시뮬레이션 메인프레임 핸들을 쓴다.
+        if self.simulated: return caen_simulator.open_device(self.config)
+        system_type = getattr(hv.SystemType, self.config["system_type"])
+        link_type = getattr(hv.LinkType, self.config["link_type"])
+        return hv.Device.open(system_type, link_type, self.config["ip_address"],
+                              self.config["username"], self.config["password"])
+
+    def _subscribe(self):
+        """
+        [이벤트 구독]
+        전용 핸들로 모든 채널의 VMon/IMon/Status/Pw 변경 이벤트를 구독한다. 채널 하나에서 여러 파라미터를
+        한 번에 구독하다 실패하면 파라미터별로 다시 시도해, 지원되지 않는 파라미터만 폴링으로 남긴다.
+        (slot, param) 은 그 슬롯의 모든 채널이 구독에 성공했을 때만 폴링 대상에서 빠진다.
+        """
+        try:
+            self.event_device = self._open_device()
+        except Exception as e:
+            logging.warning(f"Could not open CAEN event handle, staying in polling mode: {e}")
+            return
+        failed = set()
+        for slot in self.crate_map:
+            for ch in self._channels(slot):
                 try:
-                    temp_values = self.device.get_bd_param([slot], 'Temp')
-                    board_temp = float(temp_values[0]) if temp_values else -1.0
+                    self.event_device.subscribe_channel_params(slot, ch, self.SUBSCRIBE_PARAMS)
+                    continue
                 except Exception:
-                    board_temp = -1.0
-
-                slot_channels_data = {ch: {} for ch in channel_list}
-                for param in self.parameters_to_fetch:
-                    values = self.device.get_ch_param(slot, channel_list, param)
-                    for ch, value in zip(channel_list, values):
-                        try:
-                            if param in ['VMon', 'IMon', 'V0Set', 'I0Set']:
-                                slot_channels_data[ch][param] = float(value)
-                            else:
-                                slot_channels_data[ch][param] = int(value)
-                        except (ValueError, TypeError):
-                            slot_channels_data[ch][param] = value
-                
-                collected_data['slots'][slot] = {
-                    'board_temp': board_temp,
-                    'channels': slot_channels_data
-                }
-                
-            self.data_ready.emit(collected_data)
+                    pass
+                for param in self.SUBSCRIBE_PARAMS:
+                    try:
+                        self.event_device.subscribe_channel_params(slot, ch, [param])
+                    except Exception:
+                        failed.add((slot, param))
+        self.subscribed = {(slot, p) for slot in self.crate_map for p in self.SUBSCRIBE_PARAMS} - failed
+        if not self.subscribed:
+            logging.warning("CAEN parameter subscription is not supported here; staying in polling mode.")
+            self._close_event_device()
+            return
+        if failed:
+            logging.warning(f"Polling unsubscribable parameters: {sorted(failed)}")
+        logging.info(f"Subscribed to {len(self.subscribed)} (slot, parameter) event streams.")
+        self.event_timer.start(self.config.get('event_interval_ms', 100))
+
+    @pyqtSlot()
+    def drain_events(self):
+        """쌓인 이벤트를 꺼내 값 캐시에 반영한다. 트립/전원 변화가 있으면 바로 프레임을 내보낸다."""
+        if not self._is_running or not self.event_device: return
+        try:
+            events, _ = self.event_device.get_event_data()
         except Exception as e:
-            logging.error(f"Error fetching CAEN data (including temp): {e}")
-            self.error_occurred.emit(f"CAEN Communication Error: {e}")
-            self.polling_timer.stop()
-            self.connection_status.emit(False)
+            logging.error(f"CAEN event stream failed, falling back to polling: {e}")
+            self.error_occurred.emit(f"CAEN event stream lost, polling instead: {e}")
+            self._close_event_device()
+            return
+        urgent = False
+        for ev in events:
+            if getattr(ev.type, 'name', str(ev.type)) != 'PARAMETER': continue
+            key = (ev.board_index, ev.item_id)
+            values = self.values.get(key)
+            if key not in self.subscribed or values is None or not 0 <= ev.channel_index < len(values): continue
+            value = self._convert(ev.item_id, ev.value)
+            if ev.item_id in self.URGENT_PARAMS and values[ev.channel_index] != value: urgent = True
+            values[ev.channel_index] = value
+            self.events_total += 1
+        # [핵심] 폴링 타이머는 건드리지 않는다. 다시 시작하면 Status 가 계속 깜빡일 때 poll_data 가 영영 돌지 못한다.
+        # 대신 급한 프레임을 urgent_min_interval_ms 당 한 번으로 묶어 DB/그래프 누적 주기가 크게 늘지 않게 한다.
+        self._urgent_pending = self._urgent_pending or urgent
+        now = time.monotonic()
+        if not self._urgent_pending or now - self._urgent_at < self.urgent_min_s: return
+        self._urgent_pending, self._urgent_at = False, now
+        self.urgent_frames_total += 1
+        if self.scheduled: self.urgent_update.emit()
+        else: self.data_ready.emit(self._build_frame())
+
+    def _close_event_device(self):
+        self.event_timer.stop()
+        device, self.event_device, self.subscribed = self.event_device, None, set()
+        if device is None: return
+        for slot in self.crate_map:
+            for ch in self._channels(slot):
+                try: device.unsubscribe_channel_params(slot, ch, self.SUBSCRIBE_PARAMS)
+                except Exception: pass
+        try:
+            device.close()
+        except Exception as e:
+            logging.error(f"Error closing CAEN event handle: {e}")
+
+    @contextmanager
+    def _handle(self):
+        """
+        핸들 하나를 빌린다. 같은 핸들을 두 스레드가 동시에 쓰지 않도록 큐로 주고받는다.
+        무한정 기다리지 않고 HANDLE_WAIT_S 마다 연결 상태를 다시 확인해, 끊긴 동안에는 예외로 빠져나온다.
+        빌린 사이에 재연결되었으면 (세대가 바뀌었으면) 닫힌 옛 핸들은 큐에 돌려놓지 않는다.
+        """
+        while True:
+            if self.device is None: raise RuntimeError(f"{self.label} is not connected")
+            try:
+                generation, device = self._handles.get(timeout=self.HANDLE_WAIT_S)
+            except queue.Empty:
+                continue
+            if generation == self._generation: break
+        try:
+            yield device
+        finally:
+            if generation == self._generation: self._handles.put((generation, device))
+
+    def _drain_handles(self):
+        while True:
+            try: self._handles.get_nowait()
+            except queue.Empty: return
+
+    def _read(self, slot, param, channel_list):
+        # [핵심] 비상 명령이 걸리면 남은 읽기를 버리고, 일반 명령이 대기 중이면 끝날 때까지 양보한다.
+        if self._emergency.is_set(): raise PollPreempted()
+        while not self._idle.wait(self.HANDLE_WAIT_S):
+            if not self._is_running: raise PollPreempted()
+        if self._emergency.is_set(): raise PollPreempted()
+        t0 = time.monotonic()
+        with self._handle() as device:
+            if param == 'Temp':
+                values = device.get_bd_param([slot], 'Temp')
+            else:
+                values = device.get_ch_param(slot, channel_list, param)
+        return values, t0
+
+    def _convert(self, param, value):
+        try:
+            return float(value) if param in self.FLOAT_PARAMS else int(value)
+        except (ValueError, TypeError):
+            return value
+
+    def _channels(self, slot):
+        return list(range(self.crate_map[slot]['channels']))
+
+    def _due_reads(self):
+        """
+        이번 주기에 읽을 (슬롯, 파라미터) 목록. 각 파라미터는 자신의 주기(poll_every)마다 읽으며,
+        느린 파라미터끼리 같은 주기에 몰리지 않도록 파라미터 순번만큼 위상을 어긋나게 둔다.
+        아직 값이 없거나 제어 명령으로 무효화된 항목은 주기와 무관하게 바로 읽고, 이벤트로 갱신되는 항목은 읽지 않는다.
+        읽기가 실패하고 있는 항목은 실패 횟수에 따라 2, 4, 8... 주기 뒤에 다시 읽는다.
+        """
+        due = []
+        for slot in self.crate_map:
+            for offset, param in enumerate(['Temp'] + self.parameters_to_fetch):
+                every = self.poll_every[param]
+                # 격리된(실패 중인) 항목은 백오프가 끝날 때까지 건너뛴다.
+                if self.retry_at.get((slot, param), 0) > self.cycles_total: continue
+                if (slot, param) not in self.values or (slot, param) in self.stale:
+                    due.append((slot, param))
+                elif (slot, param) not in self.subscribed and (self.cycles_total + offset + self.phase) % every == 0:
+                    due.append((slot, param))
+        return due
+
+    def poll_data(self):
+        pending = self.begin_cycle()
+        if pending and self.finish_cycle(pending): self.data_ready.emit(self._build_frame())
+
+    def begin_cycle(self):
+        """
+        이번 주기에 읽을 (슬롯, 파라미터)를 모두 발행하고 (시작 시각, {키: future}) 를 돌려준다. 연결되지 않았으면 None.
+        스케줄러는 모든 크레이트의 begin_cycle 을 먼저 부른 뒤 finish_cycle 로 모으므로 크레이트끼리도 동시에 읽는다.
+        """
+        if not self._is_running or not self.device: return None
+        if self._probe_failed(): return None
+        # [핵심] 이번 주기에 읽을 (슬롯, 파라미터)를 먼저 전부 발행하고 나중에 모은다.
+        due = self._due_reads()
+        if due: self._poll_idle.clear()
+        reads = {(slot, param): self.poll_pool.submit(self._read, slot, param, self._channels(slot)) for slot, param in due}
+        return time.monotonic(), reads
+
+    def finish_cycle(self, pending):
+        """발행한 읽기를 모아 값 캐시에 반영한다. 새 값으로 프레임을 만들 수 있으면 True."""
+        cycle_start, reads = pending
+        try:
+            slot_ms = {}
+            preempted = False
+            failed = {}
+            for (slot, param), future in reads.items():
+                try:
+                    values, t0 = future.result()
+                except PollPreempted:
+                    preempted = True; continue
+                except Exception as e:
+                    failed[(slot, param)] = e; continue
+                slot_ms[slot] = slot_ms.get(slot, 0.0) + (time.monotonic() - t0) * 1000.0
+                if (slot, param) in self.read_failures: self._read_recovered(slot, param)
+                # 읽기 도중 제어 명령이 같은 값을 바꿨다면 이 결과는 이미 낡았다.
+                if t0 < self._written_at.get((slot, param), 0.0): continue
+                self.values[(slot, param)] = [self._convert(param, v) for v in values]
+                self.stale.discard((slot, param))
+                if self._verifying: self._verify_profile(slot, param)
+
+            if failed and len(failed) == len(reads) and not self._start_probe(failed):
+                self._connection_lost(next(iter(failed.values())))
+                return False
+            if failed: self._isolate(failed)
+
+            if preempted:
+                # 비상 명령에 자리를 내준 주기는 프레임을 내보내지 않는다. 다음 주기가 바로 이어받는다.
+                self.preempted_total += 1
+                logging.info(f"{self.label} poll cycle preempted by an emergency command.")
+                return False
+            self._check_burst_trigger()
+            self._publish_cycle((time.monotonic() - cycle_start) * 1000.0, len(reads), slot_ms)
+            return True
+        except Exception as e:
+            # 읽기 밖의 예상하지 못한 오류. 이 주기만 버리고 다음 주기는 계속한다.
+            logging.error(f"Error in {self.label} poll cycle: {e}")
+            self.error_occurred.emit(f"{self.label} poll cycle error: {e}")
+            return False
+        finally:
+            self._poll_idle.set()
+
+    def _start_probe(self, failed):
+        """
+        [핵심] 모든 읽기가 실패하면 이번 주기에 읽지 않은 다른 슬롯 하나의 보드 온도를 폴링 풀에서 읽어 본다.
+        응답 없는 크레이트가 스케줄러 tick 을 붙잡지 않도록 기다리지 않고, 결과는 다음 주기 시작 때 _probe_failed 가 본다.
+        확인할 다른 슬롯이 없으면 False (바로 연결 끊김으로 처리).
+        """
+        others = [slot for slot in self.crate_map if slot not in {slot for slot, _ in failed}]
+        if not others: return False
+        if self._probe_pending is None:
+            self._probe_pending = (self.poll_pool.submit(self._probe, others[0]), next(iter(failed.values())))
+        return True
+
+    def _probe_failed(self):
+        """끝난 연결 확인이 실패했으면 연결 끊김으로 처리하고 True. 다른 슬롯도 응답하지 않으면 연결 자체의 문제다."""
+        if self._probe_pending is None or not self._probe_pending[0].done(): return False
+        future, error = self._probe_pending
+        self._probe_pending = None
+        if future.result(): return False
+        self._connection_lost(error)
+        return True
+
+    def _probe(self, slot):
+        try:
+            self._read(slot, 'Temp', None)
+            return True
+        except PollPreempted:
+            return True
+        except Exception:
+            return False
+
+    def _isolate(self, failed):
+        """실패한 (슬롯, 파라미터)를 백오프 대상으로 돌린다. 새로 실패한 항목은 슬롯별로 한 줄씩 경고한다."""
+        new = {}
+        for (slot, param), e in failed.items():
+            n = self.read_failures.get((slot, param), 0) + 1
+            self.read_failures[(slot, param)] = n
+            self.retry_at[(slot, param)] = self.cycles_total + min(2 ** n, self.MAX_READ_BACKOFF_CYCLES)
+            self.read_errors_total += 1
+            if n == 1: new.setdefault(slot, []).append(f"{param} ({e})")
+            # 오래된 값을 계속 보여 주지 않도록 비운다. 프레임에서는 NaN(값 없음)이 된다.
+            if n == self.FAILURES_BEFORE_BLANK: self.values.pop((slot, param), None)
+        for slot, items in new.items():
+            logging.warning(f"{self.label} slot {slot}: isolating failed reads, retrying with backoff: {', '.join(items)}")
+            self.error_occurred.emit(f"{self.label} slot {slot} read failed: {', '.join(items)}")
+
+    def _read_recovered(self, slot, param):
+        n = self.read_failures.pop((slot, param))
+        self.retry_at.pop((slot, param), None)
+        logging.info(f"{self.label} slot {slot} {param} readable again after {n} failed attempts.")
+
+    def _build_frame(self):
+        """값 캐시를 델타 프레임으로 인코딩한다 (스케줄러 없이 단독으로 돌 때)."""
+        return self.encoder.encode(*self.value_matrix())
+
+    def value_matrix(self):
+        """
+        값 캐시를 (채널 × 파라미터) 행렬과 {(crate, slot): 보드 온도} 로 모은다. 아직 읽지 못한 값은 NaN.
+        Status 비트 전이도 이때 찾아 status_events 로 알린다.
+        """
+        values = np.full((len(self.encoder.slot), len(HV_FIELDS)), np.nan)
+        board_temps = {}
+        for slot, rows in self.slot_rows.items():
+            for j, param in enumerate(HV_FIELDS):
+                cached = self.values.get((slot, param))
+                if cached is None: continue
+                try:
+                    values[rows[:len(cached)], j] = np.asarray(cached[:len(rows)], dtype=np.float64)
+                except (ValueError, TypeError):
+                    # 변환되지 않은 문자열 값 등은 그 파라미터만 비워 둔다.
+                    pass
+            temp_values = self.values.get((slot, 'Temp'))
+            board_temps[(self.crate, slot)] = float(temp_values[0]) if temp_values else -1.0
+        # [핵심] 트립 등 상태 비트 전이는 채널 루프 없이 이번 Status 벡터와 직전 플래그의 비교로 찾는다.
+        events = self.status_tracker.update(values[:, HV_FIELDS.index('Status')], time.time())
+        if events: self.status_events.emit(events)
+        return values, board_temps
+
+    def _publish_cycle(self, cycle_ms, calls, slot_ms):
+        """한 폴링 주기의 소요 시간을 지표로 발행한다. 주기가 폴링 간격을 넘으면 경고한다."""
+        self.cycles_total += 1
+        if cycle_ms > self.interval_ms:
+            self.overruns_total += 1
+            # 매 주기 로그가 쌓이지 않도록 첫 번째와 이후 60 회마다 한 번만 남긴다.
+            if self.overruns_total % 60 == 1:
+                logging.warning(f"CAEN poll cycle took {cycle_ms:.0f} ms (> {self.interval_ms} ms interval, "
+                                f"{self.overruns_total} overruns); add poll_connections or reduce parameters.")
+        self.metrics_ready.emit({
+            'ts': time.time(),
+            'cycle_ms': cycle_ms,
+            'interval_ms': self.interval_ms,
+            'utilization': cycle_ms / self.interval_ms if self.interval_ms else 0.0,
+            'calls_per_cycle': calls,
+            'handles': len(self.devices),
+            'slot_busy_ms': slot_ms,
+            'cycles_total': self.cycles_total,
+            'overruns_total': self.overruns_total,
+            'subscribed': len(self.subscribed),
+            'events_total': self.events_total,
+            'urgent_frames_total': self.urgent_frames_total,
+            'preempted_total': self.preempted_total,
+            'status_flags': self.status_tracker.active_counts(),
+            'degraded_reads': len(self.read_failures),
+            'read_errors_total': self.read_errors_total,
+            'reconnects_total': self.reconnects_total,
+            'cycles_lost_total': self.cycles_lost_total,
+            'last_recovery_s': self.last_recovery_s,
+            'bursts_total': self.bursts_total,
+        })
 
     @pyqtSlot(int, int)
     def fetch_setpoints(self, slot, channel):
+        """셋포인트 요청은 폴링 캐시에서 바로 답한다. 캐시에 없을 때(연결 직후 등)만 장치를 읽는다."""
         if not self.device: return
         try:
-            v0set = self.device.get_ch_param(slot, [channel], 'V0Set')[0]
-            i0set = self.device.get_ch_param(slot, [channel], 'I0Set')[0]
+            v0set, i0set = self._cached(slot, channel, 'V0Set'), self._cached(slot, channel, 'I0Set')
+            if v0set is None or i0set is None:
+                with self._handle() as device:
+                    v0set = device.get_ch_param(slot, [channel], 'V0Set')[0]
+                    i0set = device.get_ch_param(slot, [channel], 'I0Set')[0]
             self.setpoints_ready.emit({'V0Set': float(v0set), 'I0Set': float(i0set)})
         except Exception as e:
             logging.warning(f"Could not fetch setpoints for S{slot}C{channel}: {e}")
 
+    def _cached(self, slot, channel, param):
+        values = self.values.get((slot, param))
+        if values is None or (slot, param) in self.stale or not 0 <= channel < len(values): return None
+        return values[channel]
+
+    def _mark_stale(self, slot, params):
+        """쓰기가 끝난 (slot, param) 을 다음 폴링 주기에 반드시 다시 읽도록 표시한다."""
+        written = time.monotonic()
+        for param in params:
+            self._written_at[(slot, param)] = written
+            self.stale.add((slot, param))
+        return written
+
+    def _refresh(self, device, slot, params):
+        """제어 명령 직후 바뀐 파라미터를 슬롯 전체에 대해 다시 읽어 캐시를 갱신한다. 실패하면 다음 주기에 읽는다."""
+        self._mark_stale(slot, params)
+        for param in params:
+            try:
+                values = device.get_ch_param(slot, self._channels(slot), param)
+                self.values[(slot, param)] = [self._convert(param, v) for v in values]
+                self.stale.discard((slot, param))
+            except Exception as e:
+                logging.warning(f"Could not refresh {param} for slot {slot} after control command: {e}")
+
+    def submit_command(self, command):
+        """
+        [제어 명령 등록 (어느 스레드에서나 호출 가능)]
+        명령을 우선순위 큐에 넣고 바로 돌아온다. command['priority'] 가 'emergency' 이면 대기 중인 일반 명령보다
+        먼저 실행되고, 진행 중인 폴링 주기는 다음 호출 경계에서 중단된다. 완료는 command_completed 로 알린다.
+        """
+        priority = self.PRIORITIES.get(command.get('priority', 'control'), self.PRIORITIES['control'])
+        with self._command_lock:
+            self._idle.clear()
+            if priority == self.PRIORITIES['emergency']: self._emergency.set()
+            self._commands.put((priority, next(self._command_seq), time.monotonic(), command))
+
+    def _command_loop(self):
+        while True:
+            priority, _, queued_at, command = self._commands.get()
+            if command is None:
+                # 종료: 폴링 읽기가 양보 대기에 묶여 있지 않도록 풀어 준다.
+                self._emergency.clear(); self._idle.set()
+                break
+            started = time.monotonic()
+            done_at = self.execute_control_command(command)
+            finished = time.monotonic()
+            self.command_completed.emit({
+                'type': command.get('type'), 'name': command.get('name'), 'crate': self.crate, 'slot': command.get('slot'), 'channels': command.get('channels'),
+                'priority': command.get('priority', 'control'), 'ok': done_at is not None,
+                # 등록부터 하드웨어 쓰기 완료까지 (대기 시간 포함)
+                'latency_ms': ((done_at or finished) - queued_at) * 1000.0,
+                'wait_ms': (started - queued_at) * 1000.0,
+            })
+            with self._command_lock:
+                if self._commands.empty():
+                    self._emergency.clear()
+                    self._idle.set()
+
     @pyqtSlot(dict)
     def execute_control_command(self, command):
+        """명령 하나를 실행한다 (명령 스레드 전용). 하드웨어 쓰기가 끝난 시각을 돌려주며, 실패하면 None."""
         if not self.device:
             self.control_command_status.emit("Error: HV device not connected.")
-            return
+            return None
         try:
             cmd_type = command.get('type')
+            if cmd_type == 'apply_profile': return self._apply_profile(command)
             slot = command.get('slot')
             channels = command.get('channels')
-            
-            if cmd_type == 'set_params':
-                params_to_set = command.get('params')
-                for param, value in params_to_set.items():
-                    self.device.set_ch_param(slot, channels, param, value)
-                self.control_command_status.emit(f"Successfully applied parameters to Slot {slot}, Ch {channels}.")
-            elif cmd_type == 'set_power':
-                power_state = command.get('value')
-                self.device.set_ch_param(slot, channels, 'Pw', 1 if power_state else 0)
-                state_str = "ON" if power_state else "OFF"
-                self.control_command_status.emit(f"Successfully turned Power {state_str} for Slot {slot}, Ch {channels}.")
+            done_at = None
+            # [핵심] 비상 명령은 쓰기 직후 동기 재읽기를 하지 않는다. 다음 비상 명령이 그만큼 늦어지지 않도록
+            # 항목만 stale 로 표시하고 폴링이 다시 읽게 둔다.
+            emergency = command.get('priority') == 'emergency'
+            refresh = (lambda device, slot, params: self._mark_stale(slot, params)) if emergency else self._refresh
+
+            with self._handle() as device:
+                if cmd_type == 'set_params':
+                    params_to_set = command.get('params')
+                    for param, value in params_to_set.items():
+                        device.set_ch_param(slot, channels, param, value)
+                    done_at = time.monotonic()
+                    refresh(device, slot, params_to_set.keys())
+                    self.control_command_status.emit(f"Successfully applied parameters to Slot {slot}, Ch {channels}.")
+                elif cmd_type == 'set_power':
+                    power_state = command.get('value')
+                    device.set_ch_param(slot, channels, 'Pw', 1 if power_state else 0)
+                    done_at = time.monotonic()
+                    refresh(device, slot, ['Pw'])
+                    state_str = "ON" if power_state else "OFF"
+                    self.control_command_status.emit(f"Successfully turned Power {state_str} for Slot {slot}, Ch {channels}.")
+            return done_at
         except Exception as e:
             self.control_command_status.emit(f"HV Control Error: {e}")
+            return None
+
+    def _apply_profile(self, command):
+        """
+        [셋포인트 프로파일 적용]
+        command['setpoints'] = {slot: {channel: {param: value}}}. 슬롯마다 핸들 하나로 묶음 호출을 차례로 보내고,
+        슬롯끼리는 핸들 수만큼 동시에 진행한다. 읽기 확인은 바로 하지 않고 해당 (slot, param) 을 다음 폴링
+        주기에 다시 읽도록 표시해 둔다. 비상 명령이 들어오면 호출 사이에서 남은 쓰기를 버리고 '중단'으로 알린다.
+        한 슬롯이라도 실패하거나 중단되면 None 을 돌려준다.
+        """
+        name = command.get('name', 'profile')
+        # [핵심] 하드웨어에 쓰기 전에 이 크레이트의 구성과 보드 한계값으로 다시 검사한다.
+        try:
+            setpoints = validate_profile(command.get('setpoints', {}), self.crate_map)
+        except ValueError as e:
+            self.control_command_status.emit(f"Profile '{name}' rejected: {e}")
+            return None
+        plan = group_setpoints(setpoints)
+
+        # 프로파일 자체가 비상 명령이면 자기 자신 때문에 멈추지 않는다.
+        abortable = command.get('priority') != 'emergency'
+        written_calls = []
+
+        def apply_slot(slot, calls):
+            written = set()
+            try:
+                with self._handle() as device:
+                    for param, value, chans in calls:
+                        # [핵심] 호출 경계마다 비상 명령을 확인해 남은 쓰기를 모두 버린다.
+                        if abortable and self._emergency.is_set(): raise ProfileAborted()
+                        device.set_ch_param(slot, chans, param, value)
+                        written.add(param); written_calls.append(slot)
+            finally:
+                # 이미 쓴 항목은 중단/실패해도 다음 주기에 다시 읽어 실제 값을 보여 준다.
+                if written: self._mark_stale(slot, written)
+            return time.monotonic()
+
+        t0 = time.monotonic()
+        errors, aborted, done_at = {}, [], t0
+        # [핵심] 폴링 풀은 양보 대기 중인 읽기가 차지하고 있을 수 있으므로 적용 전용 풀을 잠깐 띄운다.
+        with ThreadPoolExecutor(max_workers=max(min(len(plan), len(self.devices)), 1), thread_name_prefix='caen_apply') as pool:
+            futures = {pool.submit(apply_slot, slot, calls): slot for slot, calls in plan.items()}
+            for future, slot in futures.items():
+                try:
+                    done_at = max(done_at, future.result())
+                except ProfileAborted:
+                    aborted.append(slot)
+                except Exception as e:
+                    errors[slot] = str(e)
+        n_calls = sum(len(calls) for calls in plan.values())
+        elapsed = (time.monotonic() - t0) * 1000.0
+        expected = {}
+        for slot, chans in setpoints.items():
+            if slot in errors or slot in aborted: continue
+            for ch, params in chans.items():
+                for param, value in params.items():
+                    if param in self.parameters_to_fetch: expected.setdefault((slot, param), {})[ch] = value
+        self._verifying = {'name': name, 'expected': expected, 'mismatches': []} if expected else None
+        if aborted:
+            logging.warning(f"{self.label}: profile '{name}' aborted by emergency command after {len(written_calls)}/{n_calls} calls.")
+            self.control_command_status.emit(f"Profile '{name}' ABORTED by emergency command after {len(written_calls)} of {n_calls} calls; "
+                                             f"unfinished slots: {sorted(aborted)}" + (f"; failed slots: {errors}" if errors else ""))
+            return None
+        if errors:
+            self.control_command_status.emit(f"Profile '{name}' partially applied; failed slots: {errors}")
+            return None
+        self.control_command_status.emit(f"Profile '{name}' applied to {channel_count(setpoints)} channels "
+                                         f"in {n_calls} calls ({elapsed:.0f} ms). Verifying on next poll...")
+        return done_at
+
+    def _verify_profile(self, slot, param):
+        """폴링으로 새로 읽은 셋포인트를 프로파일 값과 비교한다. 모든 항목을 확인하면 결과를 한 번 알린다."""
+        check = self._verifying
+        expected = check['expected'].pop((slot, param), None)
+        if expected is None: return
+        values = self.values[(slot, param)]
+        for ch, value in expected.items():
+            if abs(float(values[ch]) - value) > 0.05: check['mismatches'].append(f"S{slot}C{ch} {param}={values[ch]} (want {value})")
+        if check['expected']: return
+        self._verifying = None
+        bad = check['mismatches']
+        if bad: self.control_command_status.emit(f"Profile '{check['name']}' readback mismatch on {len(bad)} values: {', '.join(bad[:10])}")
+        else: self.control_command_status.emit(f"Profile '{check['name']}' verified by readback.")
+
+    @property
+    def burst_active(self):
+        return self._burst_thread is not None and self._burst_thread.is_alive()
+
+    def start_burst(self, request):
+        """
+        [버스트 캡처 시작 (어느 스레드에서나 호출 가능)]
+        request: {'channels': [(slot, channel)], 'duration_s' (기본 burst.duration_s), 'trigger': 'manual' | 'auto'}.
+        선택 채널의 IMon/VMon 을 전용 스레드에서 쉬지 않고(또는 burst.max_rate_hz 까지) 읽는다. 제어 명령에는
+        정규 폴링과 똑같이 양보한다. 이미 버스트가 진행 중이거나 채널이 잘못되었으면 거절하고 False.
+        """
+        by_slot = {}
+        for slot, ch in request.get('channels', []):
+            slot, ch = int(slot), int(ch)
+            if slot in self.crate_map and 0 <= ch < self.crate_map[slot]['channels']: by_slot.setdefault(slot, set()).add(ch)
+        by_slot = {slot: sorted(chans) for slot, chans in sorted(by_slot.items())}
+        n_channels = sum(len(chans) for chans in by_slot.values())
+        reason = None
+        if not self.device: reason = "not connected"
+        elif not n_channels: reason = "no valid channels selected"
+        elif n_channels > self.burst_max_channels: reason = f"{n_channels} channels exceed burst.max_channels ({self.burst_max_channels})"
+        with self._burst_lock:
+            if reason is None and self.burst_active: reason = "another burst is running"
+            if reason:
+                self.control_command_status.emit(f"{self.label} burst rejected: {reason}.")
+                return False
+            burst = {'id': next(self._burst_ids), 'crate': self.crate, 'trigger': request.get('trigger', 'manual'),
+                     'channels': [(slot, ch) for slot, chans in by_slot.items() for ch in chans],
+                     'duration_s': float(request.get('duration_s') or self.burst_duration_s)}
+            self._burst_stop.clear()
+            self.bursts_total += 1
+            self._burst_thread = threading.Thread(target=self._burst_loop, args=(burst, by_slot), name='caen_burst', daemon=True)
+            self._burst_thread.start()
+        self.control_command_status.emit(f"{self.label} burst #{burst['id']} started ({burst['trigger']}): "
+                                         f"{n_channels} channels for {burst['duration_s']:.0f} s.")
+        return True
+
+    def stop_burst(self):
+        self._burst_stop.set()
+
+    def _burst_loop(self, burst, by_slot):
+        """버스트 스레드. 한 샘플은 선택한 슬롯마다 IMon, VMon 다채널 읽기 한 번씩이다."""
+        column = {key: j for j, key in enumerate(burst['channels'])}
+        cols = {slot: [column[(slot, ch)] for ch in chans] for slot, chans in by_slot.items()}
+        period = 1.0 / self.burst_max_rate_hz if self.burst_max_rate_hz else 0.0
+        samples = {'ts': [], 'IMon': [], 'VMon': []}
+        started = time.monotonic()
+        last_emit, end = started, started + burst['duration_s']
+        n_samples, errors = 0, 0
+        while self._is_running and not self._burst_stop.is_set() and time.monotonic() < end:
+            t_sample, ts = time.monotonic(), time.time()
+            row = {param: np.full(len(column), np.nan) for param in BURST_PARAMS}
+            try:
+                for slot, chans in by_slot.items():
+                    for param in BURST_PARAMS:
+                        # [핵심] 폴링 주기가 진행 중이면 그 읽기가 끝날 때까지 핸들을 양보한다. 핸들이 하나뿐이어도
+                        # 버스트가 핸들을 곧바로 다시 잡아 폴링을 굶기지 않는다 (주기가 멈춰도 한 주기 이상은 기다리지 않는다).
+                        self._poll_idle.wait(self.interval_ms / 1000.0)
+                        values, _ = self._read(slot, param, chans)
+                        row[param][cols[slot]] = np.asarray(values[:len(chans)], dtype=np.float64)
+            except PollPreempted:
+                # 비상 명령이 끝날 때까지 쉬고, 그 사이의 샘플은 비워 둔다.
+                self._idle.wait(1.0); continue
+            except Exception as e:
+                errors += 1
+                if errors >= self.FAILURES_BEFORE_BLANK:
+                    logging.error(f"{self.label} burst #{burst['id']} aborted: {e}")
+                    self.error_occurred.emit(f"{self.label} burst #{burst['id']} aborted: {e}")
+                    break
+                continue
+            errors = 0
+            n_samples += 1
+            samples['ts'].append(ts)
+            for param in BURST_PARAMS: samples[param].append(row[param])
+            now = time.monotonic()
+            if now - last_emit >= self.burst_chunk_s:
+                self._emit_burst(burst, samples, False, n_samples, now - started)
+                samples = {'ts': [], 'IMon': [], 'VMon': []}
+                last_emit = now
+            if period: self._burst_stop.wait(max(period - (now - t_sample), 0.0))
+        elapsed = time.monotonic() - started
+        self._emit_burst(burst, samples, True, n_samples, elapsed)
+        self._burst_ended = time.monotonic()
+        logging.info(f"{self.label} burst #{burst['id']} finished: {n_samples} samples in {elapsed:.1f} s "
+                     f"({n_samples / elapsed if elapsed else 0.0:.1f} Hz).")
+
+    def _emit_burst(self, burst, samples, done, n_samples, elapsed):
+        k = len(burst['channels'])
+        self.burst_data.emit(dict(burst, done=done, samples_total=n_samples, rate_hz=n_samples / elapsed if elapsed else 0.0,
+                                  ts=np.asarray(samples['ts'], dtype=np.float64),
+                                  imon=np.asarray(samples['IMon'], dtype=np.float64).reshape(-1, k),
+                                  vmon=np.asarray(samples['VMon'], dtype=np.float64).reshape(-1, k)))
+
+    def _check_burst_trigger(self):
+        """
+        [자동 버스트 트리거]
+        감시 채널의 IMon 이 임계값을 아래에서 위로 넘으면 넘은 채널들로 버스트를 시작한다. 슬롯마다 벡터 비교
+        한 번이며, 연결 직후의 첫 값은 기준으로만 쓴다. 버스트 중이거나 쿨다운 중이면 건너뛴다.
+        """
+        if self.burst_threshold is None: return
+        crossed = []
+        for slot in self.crate_map:
+            imon = self.values.get((slot, 'IMon'))
+            if imon is None: continue
+            above = np.asarray(imon, dtype=np.float64) > self.burst_threshold
+            prev = self._above.get(slot)
+            self._above[slot] = above
+            if prev is None or len(prev) != len(above): continue
+            crossed += [(slot, ch) for ch in np.flatnonzero(above & ~prev).tolist()
+                        if not self.burst_watch or (slot, ch) in self.burst_watch]
+        if not crossed or self.burst_active: return
+        if self._burst_ended is not None and time.monotonic() - self._burst_ended < self.burst_cooldown_s: return
+        names = ', '.join(f'S{s}CH{c}' for s, c in crossed[:8]) + (f" (+{len(crossed) - 8})" if len(crossed) > 8 else '')
+        logging.warning(f"{self.label} IMon > {self.burst_threshold} uA on {names}; starting burst.")
+        self.start_burst({'channels': crossed[:self.burst_max_channels], 'trigger': 'auto'})
 
     @pyqtSlot()
     def stop_worker(self):
         self._is_running = False
+        self._burst_stop.set()
         self.polling_timer.stop()
-        if self.device:
+        self.reconnect_timer.stop()
+        if self._command_thread:
+            # 이미 들어온 명령(비상 차단 포함)은 모두 실행한 뒤 끝낸다.
+            self._commands.put((len(self.PRIORITIES), next(self._command_seq), time.monotonic(), None))
+            self._command_thread.join(timeout=10.0)
+            self._command_thread = None
+        if self._burst_thread:
+            self._burst_thread.join(timeout=5.0)
+            self._burst_thread = None
+        self._close_event_device()
+        if self.poll_pool:
+            self.poll_pool.shutdown(wait=True)
+            self.poll_pool, self.poll_pool_size = None, 0
+        self._close_devices()
+        self.values.clear(); self.stale.clear()
+
+    def _close_devices(self):
+        devices, self.devices, self.device = self.devices, [], None
+        # 세대를 올려 빌려 간 핸들이 돌아와도 버려지게 하고, 대기 중인 스레드는 연결 끊김을 보고 빠져나온다.
+        self._generation += 1
+        self._drain_handles()
+        for device in devices:
             try:
-                self.device.close()
-                logging.info("CAEN device closed.")
+                device.close()
             except Exception as e:
-                logging.error(f"Error closing CAEN device: {e}")
\ No newline at end of file
+                logging.error(f"Error closing CAEN device: {e}")
+        if devices: logging.info(f"CAEN device closed ({len(devices)} handles).")
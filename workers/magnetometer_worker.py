@@ -86,8 +86,7 @@ class MagnetometerWorker(QObject):
             self.samples = [[] for _ in range(4)]
 
     def _enqueue_db_data(self, ts, data):
-        dt_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-        self.data_queue.put({'type': 'MAG', 'data': (dt_str, round(data[0],2), round(data[1],2), round(data[2],2), round(data[3],2))})
+        self.data_queue.put({'type': 'MAG', 'data': (ts, round(data[0],2), round(data[1],2), round(data[2],2), round(data[3],2))})
 
     @pyqtSlot()
     def stop(self):
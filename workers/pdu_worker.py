@@ -2,7 +2,6 @@
 
 import time
 import logging
-from datetime import datetime
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
 from pymodbus.client import ModbusTcpClient
 from pymodbus.exceptions import ModbusException, ConnectionException
@@ -69,8 +68,7 @@ class PDUWorker(QObject):
 
         data_gui = {'global': {}, 'outputs': {}}
         db_payloads = []
-        timestamp = datetime.now()
-        timestamp_db = timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        timestamp_db = time.time()
 
         try:
             with self.get_client() as client:
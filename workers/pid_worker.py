@@ -70,8 +70,7 @@ class PidWorker(QObject):
             self.error_occurred.emit(f"PID Detector Comm Error: {e}")
 
     def _enqueue_db_data(self, ts, conc, alarm):
-        dt_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-        self.data_queue.put({'type': 'VOC', 'data': (dt_str, round(conc, 3), alarm, 'ppm')})
+        self.data_queue.put({'type': 'VOC', 'data': (ts, round(conc, 3), alarm, 'ppm')})
 
     @pyqtSlot()
     def stop_worker(self):
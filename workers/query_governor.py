@@ -0,0 +1,176 @@
+# workers/query_governor.py
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+class QueryCancelled(Exception):
+    """사용자가 새 조회를 시작하거나 취소를 요청하여 중단된 분석 쿼리."""
+
+
+class QueryGovernor:
+    """
+    [분석 쿼리 관제탑]
+    읽기 전용 커넥션 풀(선택적으로 리플리카)을 통해서만 분석 쿼리를 실행시키고,
+    동시 실행 수를 제한하며 나머지는 대기열에 세운다. 모든 세션에 max_statement_time 을 걸고,
+    소유자(owner, 예: 패널 이름) 단위로 대기 중인 요청은 폐기하고 실행 중인 쿼리는 KILL QUERY 로 중단한다.
+    쓰기 풀(DatabaseWorker)과 커넥션을 공유하지 않으므로 기록이 분석 뒤에서 기다리는 일이 없다.
+    """
+    SCHEMA_QUEUE_TIMEOUT_S = 5.0
+
+    def __init__(self, read_pool, db_config):
+        self.read_pool = read_pool
+        self.db_config = db_config
+        read_cfg = db_config.get('read_pool', {})
+        self.database = read_cfg.get('database', db_config.get('database'))
+        self.max_concurrent = read_cfg.get('max_concurrent_queries', 2)
+        self.max_statement_time_s = read_cfg.get('max_statement_time_s', 120)
+        self.queue_timeout_s = read_cfg.get('queue_timeout_s', 300)
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._tokens = {}       # owner -> set(token)
+        self._active_ids = {}   # token -> set(connection_id)
+        self._columns = {}      # (table, column) -> 있는지 여부 (확인하지 못한 것은 없는 것으로 보관)
+
+    @property
+    def available(self):
+        return self.read_pool is not None
+
+    def _new_token(self, owner):
+        token = threading.Event()
+        with self._lock:
+            self._tokens.setdefault(owner, set()).add(token)
+        return token
+
+    def _drop_token(self, owner, token):
+        with self._lock:
+            self._tokens.get(owner, set()).discard(token)
+
+    def _open(self):
+        conn = self.read_pool.get_connection()
+        conn.database = self.database
+        return conn
+
+    @contextmanager
+    def connection(self, owner, token=None, statement_time_s=None, queue_timeout_s=None):
+        """
+        동시 실행 한도 안에서 읽기 커넥션을 빌려준다. 취소되면 QueryCancelled 를 던진다.
+        statement_time_s 로 세션의 max_statement_time 을 바꿀 수 있다 (0 = 제한 없음, 긴 내보내기용).
+        queue_timeout_s 는 빈 자리를 기다리는 한도이다 (기본값은 설정의 queue_timeout_s).
+        """
+        if not self.available:
+            raise RuntimeError("Read connection pool not available.")
+        own_token = token is None
+        token = token or self._new_token(owner)
+
+        queue_timeout_s = self.queue_timeout_s if queue_timeout_s is None else queue_timeout_s
+        deadline = time.monotonic() + queue_timeout_s
+        while not self._slots.acquire(timeout=0.2):
+            if token.is_set():
+                if own_token: self._drop_token(owner, token)
+                raise QueryCancelled(f"Query for '{owner}' cancelled while queued.")
+            if time.monotonic() > deadline:
+                if own_token: self._drop_token(owner, token)
+                raise TimeoutError(f"Query for '{owner}' waited more than {queue_timeout_s} s for a read slot.")
+
+        conn = None
+        conn_id = None
+        try:
+            if token.is_set():
+                raise QueryCancelled(f"Query for '{owner}' cancelled.")
+            conn = self._open()
+            cursor = conn.cursor()
+            limit = self.max_statement_time_s if statement_time_s is None else statement_time_s
+            cursor.execute(f"SET SESSION max_statement_time = {float(limit)}")
+            conn_id = conn.connection_id
+            with self._lock:
+                self._active_ids.setdefault(token, set()).add(conn_id)
+            yield conn
+            if token.is_set():
+                raise QueryCancelled(f"Query for '{owner}' cancelled.")
+        except QueryCancelled:
+            raise
+        except Exception:
+            # KILL QUERY 로 중단된 쿼리는 드라이버 오류로 올라오므로 취소로 변환한다.
+            if token.is_set():
+                raise QueryCancelled(f"Query for '{owner}' cancelled.")
+            raise
+        finally:
+            with self._lock:
+                ids = self._active_ids.get(token)
+                if ids is not None:
+                    ids.discard(conn_id)
+                    if not ids: del self._active_ids[token]
+            if own_token: self._drop_token(owner, token)
+            if conn: conn.close()
+            self._slots.release()
+
+    def has_column(self, table, column):
+        """
+        읽기 DB 의 table 에 column 이 있는지 (스키마 마이그레이션 전 DB 구분용). 결과는 한 번만 조회해 보관한다.
+        긴 분석 쿼리 뒤에서 오래 기다리지 않도록 빈 자리는 SCHEMA_QUEUE_TIMEOUT_S 만 기다리며,
+        확인하지 못하면(풀 없음, 자리 없음, DB 오류) 없는 것(False)으로 보고 그 결과도 보관한다.
+        """
+        key = (table, column)
+        if key in self._columns: return self._columns[key]
+        try:
+            with self.connection('schema', queue_timeout_s=self.SCHEMA_QUEUE_TIMEOUT_S) as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+                    WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? AND COLUMN_NAME = ?
+                """, (self.database, table, column))
+                self._columns[key] = cursor.fetchone()[0] > 0
+        except Exception as e:
+            logging.warning(f"Could not check column {table}.{column}, assuming it is missing: {e}")
+            self._columns[key] = False
+        return self._columns[key]
+
+    def new_token(self, owner):
+        """여러 커넥션에 걸친 한 번의 조회를 하나의 취소 단위로 묶을 때 사용한다."""
+        return self._new_token(owner)
+
+    def release_token(self, owner, token):
+        self._drop_token(owner, token)
+
+    def cancel(self, owner):
+        """owner 의 대기 중인 요청을 폐기하고, 실행 중인 쿼리는 KILL QUERY 로 중단시킨다."""
+        with self._lock:
+            tokens = list(self._tokens.get(owner, set()))
+        return self._cancel_tokens(tokens, owner)
+
+    def cancel_token(self, token):
+        """하나의 조회 단위(token)만 취소한다. 같은 owner 의 새 조회에는 영향을 주지 않는다."""
+        return self._cancel_tokens([token], "job")
+
+    def _cancel_tokens(self, tokens, label):
+        with self._lock:
+            for token in tokens: token.set()
+            conn_ids = [cid for t in tokens for cid in self._active_ids.get(t, ())]
+        if not conn_ids: return 0
+        if self._kill(conn_ids):
+            logging.info(f"Cancelled {len(conn_ids)} running analysis queries for '{label}'.")
+        return len(conn_ids)
+
+    def abort(self, conn):
+        """취소 표시 없이 conn 에서 실행 중인 쿼리만 끊는다 (행 수 한도 도달 등으로 결과가 더 필요 없을 때)."""
+        self._kill([conn.connection_id])
+
+    def _kill(self, conn_ids):
+        killer = None
+        try:
+            killer = self._open()
+            cursor = killer.cursor()
+            for conn_id in conn_ids:
+                try:
+                    cursor.execute(f"KILL QUERY {int(conn_id)}")
+                except Exception as e:
+                    logging.debug(f"KILL QUERY {conn_id} failed: {e}")
+            return True
+        except Exception as e:
+            logging.warning(f"Could not kill analysis queries {conn_ids}: {e}")
+            return False
+        finally:
+            if killer: killer.close()
@@ -96,8 +96,7 @@ class RadonWorker(QObject):
             logging.error(f"Radon parsing/comm error: {e}")
 
     def _enqueue_db_data(self, ts, mu, sigma):
-        dt_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-        self.data_queue.put({'type': 'RADON', 'data': (dt_str, round(mu, 2), round(sigma, 2))})
+        self.data_queue.put({'type': 'RADON', 'data': (ts, round(mu, 2), round(sigma, 2))})
 
     @pyqtSlot()
     def stop(self):
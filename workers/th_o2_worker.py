@@ -75,8 +75,7 @@ class ThO2Worker(QObject):
             self.samples = {'temp': [], 'humi': [], 'o2': []}
 
     def _enqueue_db_data(self, ts, t, h, o):
-        dt_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-        self.data_queue.put({'type': 'TH_O2', 'data': (dt_str, round(t, 2), round(h, 2), round(o, 2))})
+        self.data_queue.put({'type': 'TH_O2', 'data': (ts, round(t, 2), round(h, 2), round(o, 2))})
 
     @pyqtSlot()
     def stop_worker(self):
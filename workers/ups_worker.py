@@ -56,8 +56,7 @@ class UPSWorker(QObject):
             self.timer.stop()
 
     def _enqueue_db_data(self, ts, data):
-        dt_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
-        db_tuple = (dt_str, data['STATUS'], data['LINEV'], data['BCHARGE'], data['TIMELEFT'])
+        db_tuple = (ts, data['STATUS'], data['LINEV'], data['BCHARGE'], data['TIMELEFT'])
         self.data_queue.put({'type': 'UPS', 'data': db_tuple})
 
     @pyqtSlot()